@@ -0,0 +1,22 @@
+"""
+Summarise the AvCan fire fragments (tables and choropleth).
+
+The work lives in src/pipeline/summarize.py; this script is kept for the
+numbered workflow and is the same as `wildfire summarize` (same flags).
+"""
+
+#-- Packages --#
+from pathlib import Path
+import sys
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+#--- Local ---#
+from src.pipeline.summarize import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Offline benchmark suite for the merge (03), overlay (05) and severe-burn
+severity stages on synthetic data (src/synthetic_data.py).
+
+Each scale preset (years, fires per year, vertices, overlap fraction,
+subregions, raster extent) is generated once into a work folder keyed by
+its parameters. Every stage then runs in a fresh interpreter, so its peak
+RSS is its own, and is timed (wall and CPU, including worker processes).
+Results are appended as JSON lines tagged with the git commit, and each
+run is compared against the last result for the same scale and stage from
+a different commit, so regressions show up across commits.
+
+    python src/benchmark.py --scales small medium --repeat 3
+"""
+
+#-- Packages --#
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import uuid
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+#--- Local ---#
+from src.manifest import config_fingerprint, save_manifest
+
+
+#-- Constants --#
+
+RESULTS_PATH = REPO_ROOT / 'ouputs' / 'benchmarks' / 'benchmark_results.jsonl'
+WORK_DIR = Path(tempfile.gettempdir()) / 'wildfire_benchmarks'
+STAGES = ['merge', 'overlay', 'severity']
+LAST_YEAR = 2024                                # Synthetic years end here (preflight reference year)
+RASTER_SCALE = 30                               # dNBR / DEM pixel size (m)
+CENTRE = (-1_800_000, 800_000)                  # Working-CRS centre of every synthetic extent
+
+# Scale presets
+SCALES = {
+    'small':  {'years': 3,  'fires_per_year': 300,  'vertices': 64,  'overlap': 0.1, 'subregions': 20,  'extent_km': 60},
+    'medium': {'years': 6,  'fires_per_year': 2000, 'vertices': 128, 'overlap': 0.1, 'subregions': 60,  'extent_km': 150},
+    'large':  {'years': 11, 'fires_per_year': 6000, 'vertices': 256, 'overlap': 0.1, 'subregions': 120, 'extent_km': 200},
+}
+
+
+#-- Helper Functions --#
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return out.stdout.strip() + ('-dirty' if dirty else '') if out.returncode == 0 else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    """
+    Peak resident set size. On Linux the process's own peak comes from
+    VmHWM, because ru_maxrss survives exec and would include the parent's
+    peak from before the stage interpreter was spawned.
+    """
+    if who == resource.RUSAGE_SELF and Path('/proc/self/status').exists():
+        for line in Path('/proc/self/status').read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 2 ** 10
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10     # bytes on macOS, KiB on Linux
+
+
+def cpu_seconds() -> float:
+    """
+    CPU time of this process and its finished children (worker pools).
+    """
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def extent_for(params: dict) -> tuple:
+    half = params['extent_km'] * 500
+    return CENTRE[0] - half, CENTRE[1] - half, CENTRE[0] + half, CENTRE[1] + half
+
+
+#-- Data --#
+
+def prepare_data(params: dict, work_dir=WORK_DIR, seed: int = 0) -> Path:
+    """
+    Generate (once per parameter set) the NBAC zips, fires / subregions
+    GeoParquet and dNBR / DEM rasters for one scale.
+    """
+    from src.synthetic_data import (
+        synthetic_dem, synthetic_dnbr, synthetic_fires, synthetic_subregions, write_nbac_zips,
+    )
+
+    data_dir = Path(work_dir) / config_fingerprint({**params, 'seed': seed})
+    done = data_dir / '_generated.json'
+    if done.exists():
+        return data_dir
+
+    extent = extent_for(params)
+    years = range(LAST_YEAR - params['years'] + 1, LAST_YEAR + 1)
+    print(f" Generating {params['years']} x {params['fires_per_year']} fires, {params['vertices']} vertices -> {data_dir}")
+    fires = synthetic_fires(years, params['fires_per_year'], params['vertices'], params['overlap'], extent, seed=seed)
+    regions = synthetic_subregions(params['subregions'], extent=extent, seed=seed)
+    write_nbac_zips(fires, data_dir / 'nbac_zips')
+    fires.to_parquet(data_dir / 'fires.parquet')
+    regions.to_parquet(data_dir / 'regions.parquet')
+    synthetic_dem(data_dir / 'dem.tif', extent, RASTER_SCALE, seed=seed)
+    synthetic_dnbr(data_dir / 'dnbr.tif', fires[fires['year'] == LAST_YEAR], extent, RASTER_SCALE, seed=seed)
+    save_manifest({'params': params, 'seed': seed}, done)
+    return data_dir
+
+
+#-- Stages --#
+# Each stage: load(data_dir) -> inputs, run(inputs, scratch, workers) -> (rows_in, rows_out)
+
+def load_merge(data_dir):
+    return {'zip_dir': Path(data_dir) / 'nbac_zips'}
+
+
+def run_merge(inputs, scratch, workers):
+    """
+    03 (in-memory path): preflight, parallel read, concat, clean, compact, GeoParquet.
+    """
+    import pandas as pd
+    import geopandas as gpd
+    from src.nbac_io import (
+        clean_nbac_layer, list_nbac_sources, preflight_nbac_sources, read_nbac_layers, write_fires_parquet,
+    )
+    from src.projection import WORKING_CRS
+
+    sources = list_nbac_sources(inputs['zip_dir'])
+    preflight = preflight_nbac_sources(sources, reference_year=LAST_YEAR, target_crs=WORKING_CRS)
+    layers = read_nbac_layers(sources, plans=preflight['plans'], workers=workers)
+    fires = gpd.GeoDataFrame(pd.concat(list(layers.values()), ignore_index=True), crs=preflight['target_crs'])
+    fires = clean_nbac_layer(fires)
+    write_fires_parquet(fires, Path(scratch) / 'Canada_fires.parquet')
+    return sum(m['features'] for m in preflight['metadata'].values()), len(fires)
+
+
+def load_overlay(data_dir):
+    import geopandas as gpd
+    fires = gpd.read_parquet(Path(data_dir) / 'fires.parquet').drop(columns='prov_terr')
+    return {'fires': fires, 'regions': gpd.read_parquet(Path(data_dir) / 'regions.parquet')}
+
+
+def run_overlay(inputs, scratch, workers):
+    """
+    05: fires x subregions overlay and per-fragment hectares.
+    """
+    from src.overlay import overlay_fires_regions, parallel_overlay_fires_regions
+
+    if workers > 1:
+        fire_stats = parallel_overlay_fires_regions(inputs['fires'], inputs['regions'], workers=workers)
+    else:
+        fire_stats = overlay_fires_regions(inputs['fires'], inputs['regions'])
+    fire_stats['subreg_ha'] = fire_stats.geometry.area / 10_000
+    return len(inputs['fires']), len(fire_stats)
+
+
+def load_severity(data_dir):
+    import rasterio
+    from src.overlay import overlay_fires_regions
+
+    # AvCan fires (fire x subregion fragments) of the year the dNBR shows
+    inputs = load_overlay(data_dir)
+    fires = overlay_fires_regions(inputs['fires'][inputs['fires']['year'] == LAST_YEAR], inputs['regions'])
+    with rasterio.open(Path(data_dir) / 'dnbr.tif') as src:
+        grid = {'crs': src.crs, 'transform': src.transform, 'width': src.width, 'height': src.height, 'scale': src.res[0]}
+        dnbr = src.read(1)
+    return {'fires': fires, 'dnbr': dnbr, 'grid': grid, 'dem': Path(data_dir) / 'dem.tif'}
+
+
+def run_severity(inputs, scratch, workers):
+    """
+    Severe-burn patches from dNBR: bigPatchMask, terrain, label-once patch stats.
+    """
+    from src.severity_local import big_patch_mask, grid_patches
+    from src.severity_params import HIGH_THR, min_patch_pixels
+    from src.terrain_tiles import terrain_layers
+
+    big_mask = big_patch_mask(inputs['dnbr'], HIGH_THR, min_patch_pixels(scale=inputs['grid']['scale']))
+    terrain = terrain_layers(inputs['dem'], inputs['grid'])
+    patches = grid_patches(inputs['fires'], big_mask, inputs['grid'], terrain)
+    return len(inputs['fires']), len(patches)
+
+
+STAGE_FUNCTIONS = {
+    'merge': (load_merge, run_merge),
+    'overlay': (load_overlay, run_overlay),
+    'severity': (load_severity, run_severity),
+}
+
+
+def _stage_worker(stage, data_dir, workers, conn):
+    """
+    Child process: load a stage's inputs, then time the stage itself.
+    """
+    try:
+        load, run = STAGE_FUNCTIONS[stage]
+        inputs = load(data_dir)
+        input_rss = peak_rss_mb()
+        with tempfile.TemporaryDirectory(prefix=f'bench_{stage}_') as scratch:
+            wall, cpu = time.perf_counter(), cpu_seconds()
+            rows_in, rows_out = run(inputs, scratch, workers)
+            wall, cpu = time.perf_counter() - wall, cpu_seconds() - cpu
+        conn.send({
+            'status': 'ok',
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            'rows_in': int(rows_in),
+            'rows_out': int(rows_out),
+            'rows_per_s': round(rows_in / wall, 1) if wall else None,
+            'input_rss_mb': round(input_rss, 1),
+            'peak_rss_mb': round(max(peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN)), 1),
+        })
+    except Exception as e:
+        conn.send({'status': 'error', 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()})
+    finally:
+        conn.close()
+
+
+def run_stage(stage, data_dir, workers=1) -> dict:
+    """
+    Run one stage in a fresh interpreter and return its measurements.
+    """
+    # Spawn, not fork: a forked child would inherit (and report) the parent's RSS
+    ctx = multiprocessing.get_context('spawn')
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_stage_worker, args=(stage, str(data_dir), workers, send))
+    proc.start()
+    send.close()
+    try:
+        result = recv.recv()
+    except EOFError:
+        result = {'status': 'error', 'error': 'stage process exited without a result'}
+    proc.join()
+    if proc.exitcode not in (0, None) and result.get('status') == 'ok':
+        result = {'status': 'error', 'error': f'exit code {proc.exitcode}'}
+    return result
+
+
+#-- Results --#
+
+def load_results(path) -> list[dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def previous_result(history, record) -> dict | None:
+    """
+    Latest successful result for the same scale, parameters and stage from another commit.
+    """
+    matches = [
+        r for r in history
+        if r.get('status') == 'ok' and r['scale'] == record['scale'] and r['stage'] == record['stage']
+        and r['params'] == record['params'] and r.get('commit') != record.get('commit')
+    ]
+    return matches[-1] if matches else None
+
+
+def append_results(records, path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+#-- Main --#
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the merge, overlay and severity stages on synthetic data.")
+    parser.add_argument("--scales", nargs="+", default=['small', 'medium'], choices=[*SCALES, 'custom'])
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for the merge read / overlay")
+    parser.add_argument("--years", type=int, default=None, help="custom scale: fire years")
+    parser.add_argument("--fires-per-year", type=int, default=None, help="custom scale: fires per year")
+    parser.add_argument("--vertices", type=int, default=None, help="custom scale: vertices per fire")
+    parser.add_argument("--overlap", type=float, default=None, help="custom scale: share of fires overlapping another")
+    parser.add_argument("--subregions", type=int, default=None, help="custom scale: AvCan-like subregions")
+    parser.add_argument("--extent-km", type=float, default=None, help="custom scale: side of the study area / rasters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work", type=Path, default=WORK_DIR, help="Folder for generated data (reused across runs)")
+    parser.add_argument("--out", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    overrides = {k: getattr(args, k) for k in SCALES['small'] if getattr(args, k) is not None}
+    history = load_results(args.out)
+    run = {
+        'run_id': uuid.uuid4().hex[:12],
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+    }
+    print(f"Benchmark run {run['run_id']} at commit {run['commit']}")
+
+    records = []
+    for scale in args.scales:
+        params = {**SCALES.get(scale, SCALES['small']), **overrides}
+        data_dir = prepare_data(params, args.work, args.seed)
+        for stage in args.stages:
+            for repeat in range(args.repeat):
+                record = {**run, 'scale': scale, 'params': params, 'seed': args.seed, 'stage': stage, 'repeat': repeat}
+                record.update(run_stage(stage, data_dir, args.workers))
+                records.append(record)
+
+                if record['status'] != 'ok':
+                    print(f" {scale:>7} {stage:<9} ERROR {record['error']}")
+                    continue
+                line = (f" {scale:>7} {stage:<9} {record['wall_s']:>9.3f} s wall {record['cpu_s']:>9.3f} s cpu "
+                        f"{record['peak_rss_mb']:>8.1f} MB peak  {record['rows_in']} -> {record['rows_out']} rows")
+                previous = previous_result(history, record)
+                if previous:
+                    line += f"  ({record['wall_s'] / previous['wall_s'] - 1:+.0%} vs {previous['commit']})"
+                print(line)
+
+    append_results(records, args.out)
+    print(f"Results appended to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
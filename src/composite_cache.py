@@ -0,0 +1,187 @@
+"""
+On-disk LRU cache of finished NBR composites.
+
+A composite is identified by its footprint, date window, cloud threshold
+and MASK_VERSION (plus backend specifics such as grid scale), so the
+fixed POST_YEAR composite is built once for every fire year and a pre-fire
+window shared by neighbouring subregions is built once for all of them.
+
+CompositeCache is backend-agnostic: each entry maps a key to a location
+(a local .npy path, or an Earth Engine asset id) with its size and last
+use. When the total size passes the budget the least recently used
+entries are evicted through the remove callable.
+
+local_composite() is the local raster backend: the grid is covered by
+FOOTPRINT_TILE-pixel tiles snapped to a fixed origin, so the same tile is
+reused whatever subregion or fire-year grid it falls in.
+"""
+
+#-- Packages --#
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import threading
+
+import numpy as np
+
+from src.manifest import config_fingerprint, save_manifest
+from src.nbr_composite import MEMORY_MB, composite_nbr
+from src.raster_grid import analysis_grid, bounds_overlap, grid_bounds
+from src.severity_params import MASK_VERSION, MAX_CLOUDY_PCT
+
+
+#-- Constants --#
+
+CACHE_VERSION = 1
+CACHE_BUDGET_MB = 4096                          # Default size budget for cached composites
+FOOTPRINT_TILE = 512                            # Local footprint tile side (pixels)
+
+
+#-- Helper Functions --#
+
+def composite_key(footprint, start: str, end: str, max_cloudy_pct: float = MAX_CLOUDY_PCT,
+                  mask_version: int = MASK_VERSION, **extra) -> dict:
+    """
+    Identity of one composite; extra holds backend specifics (scale, crs, scene set, ...).
+    """
+    return {
+        'footprint': footprint,
+        'start': start,
+        'end': end,
+        'max_cloudy_pct': max_cloudy_pct,
+        'mask_version': mask_version,
+        **extra,
+    }
+
+
+def key_id(key: dict) -> str:
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
+#-- Cache --#
+
+class CompositeCache:
+    """
+    cache = CompositeCache(index_path, budget_mb, remove=os.remove)
+    location = cache.get(key)               # None on a miss
+    cache.put(key, location, nbytes)        # may evict older entries
+
+    The index is a JSON file written atomically on every change; access is
+    thread-safe.
+    """
+
+    def __init__(self, index_path, budget_mb: float = CACHE_BUDGET_MB, remove=None):
+        self.index_path = Path(index_path)
+        self.budget = budget_mb * 2 ** 20
+        self.remove = remove
+        self._lock = threading.Lock()
+        index = json.loads(self.index_path.read_text()) if self.index_path.exists() else {}
+        self.entries = index.get('entries', {}) if index.get('version') == CACHE_VERSION else {}
+
+    def _save(self) -> None:
+        save_manifest({'version': CACHE_VERSION, 'entries': self.entries}, self.index_path)
+
+    def get(self, key: dict):
+        with self._lock:
+            entry = self.entries.get(key_id(key))
+            if entry is None:
+                return None
+            entry['last_used'] = _now()
+            self._save()
+            return entry['location']
+
+    def put(self, key: dict, location, nbytes: int) -> None:
+        with self._lock:
+            self.entries[key_id(key)] = {
+                'key': key, 'location': location, 'bytes': int(nbytes), 'last_used': _now(),
+            }
+            self._evict(keep=key_id(key))
+            self._save()
+
+    def total_bytes(self) -> int:
+        return sum(e['bytes'] for e in self.entries.values())
+
+    def _evict(self, keep: str) -> None:
+        """
+        Drop least recently used entries (never keep) until under budget.
+        """
+        for kid, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            if self.total_bytes() <= self.budget:
+                break
+            if kid == keep:
+                continue
+            if self.remove is not None:
+                try:
+                    self.remove(entry['location'])
+                except Exception as e:
+                    print(f"  Cache eviction failed for {entry['location']}: {e}")
+            del self.entries[kid]
+
+
+#-- Local Backend --#
+
+def local_cache(cache_dir, budget_mb: float = CACHE_BUDGET_MB) -> CompositeCache:
+    """
+    CompositeCache of .npy composites under cache_dir.
+    """
+    return CompositeCache(Path(cache_dir) / 'index.json', budget_mb, remove=lambda p: Path(p).unlink(missing_ok=True))
+
+
+def footprint_tiles(grid: dict, tile: int = FOOTPRINT_TILE):
+    """
+    (ix, iy, tile grid) for every fixed-origin footprint tile that grid touches.
+    """
+    size = tile * grid['scale']
+    xmin, ymin, xmax, ymax = grid_bounds(grid)
+    for iy in range(int(np.floor(ymin / size)), int(np.ceil(ymax / size))):
+        for ix in range(int(np.floor(xmin / size)), int(np.ceil(xmax / size))):
+            bounds = (ix * size, iy * size, (ix + 1) * size, (iy + 1) * size)
+            yield ix, iy, analysis_grid(bounds, grid['scale'], grid['crs'])
+
+
+def _paste(dst: np.ndarray, dst_grid: dict, src: np.ndarray, src_grid: dict) -> None:
+    """
+    Copy the overlap of two pixel-aligned grids from src into dst.
+    """
+    scale = dst_grid['scale']
+    col = int(round((src_grid['transform'].c - dst_grid['transform'].c) / scale))
+    row = int(round((dst_grid['transform'].f - src_grid['transform'].f) / scale))
+    r0, c0 = max(row, 0), max(col, 0)
+    r1, c1 = min(row + src.shape[0], dst.shape[0]), min(col + src.shape[1], dst.shape[1])
+    if r1 > r0 and c1 > c0:
+        dst[r0:r1, c0:c1] = src[r0 - row:r1 - row, c0 - col:c1 - col]
+
+
+def local_composite(scenes, grid: dict, start: str, end: str, cache: CompositeCache | None = None,
+                    max_cloudy_pct: float = MAX_CLOUDY_PCT, memory_mb: float = MEMORY_MB,
+                    workers: int | None = None) -> np.ndarray:
+    """
+    Median NBR of scenes (already filtered to start / end and
+    max_cloudy_pct) on grid. With a cache, the composite is assembled from
+    cached footprint tiles, and missing tiles are composited and stored.
+    """
+    if cache is None:
+        return composite_nbr(scenes, grid, memory_mb=memory_mb, workers=workers)
+
+    out = np.full((grid['height'], grid['width']), np.nan, dtype=np.float32)
+    for ix, iy, tile_grid in footprint_tiles(grid):
+        tile_scenes = [s for s in scenes if bounds_overlap(s['bounds'], grid_bounds(tile_grid))]
+        if not tile_scenes:
+            continue
+        key = composite_key(
+            [ix, iy], start, end, max_cloudy_pct,
+            scale=grid['scale'], crs=str(grid['crs']), tile=FOOTPRINT_TILE,
+            scenes=config_fingerprint(sorted(Path(s['path']).name for s in tile_scenes)),
+        )
+        path = cache.get(key)
+        if path is None or not Path(path).exists():
+            path = cache.index_path.parent / f'{key_id(key)}.npy'
+            composite_nbr(tile_scenes, tile_grid, out_path=path, memory_mb=memory_mb, workers=workers)
+            cache.put(key, str(path), Path(path).stat().st_size)
+        _paste(out, grid, np.load(path, mmap_mode='r'), tile_grid)
+    return out
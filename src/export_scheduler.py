@@ -0,0 +1,292 @@
+"""
+Concurrent export-task scheduler with a persistent job journal.
+
+Combos (e.g. (subregion, fireYear)) are submitted by a caller-supplied
+function that starts an export and returns its task (anything with
+.status() -> {'state': ..., 'id': ..., 'error_message': ...}, like
+ee.batch.Task), or None when there is nothing to export. Up to
+max_concurrent combos are in flight at once; each task is polled until it
+finishes and transient failures are retried with exponential backoff and
+full jitter.
+
+Every state change is written to a JSON journal, so a rerun skips combos
+already completed or skipped, re-attaches to tasks still running on the
+server and resubmits only unfinished or failed combos.
+
+LocalBatch is an offline stand-in for ee.batch used to exercise the
+scheduler without Earth Engine.
+"""
+
+#-- Packages --#
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import itertools
+import json
+import random
+import threading
+import time
+
+from src.manifest import save_manifest
+
+
+#-- Constants --#
+
+JOURNAL_VERSION = 1
+MAX_CONCURRENT = 4                              # Concurrent export tasks
+MAX_ATTEMPTS = 4                                # Submissions per combo before giving up
+POLL_INTERVAL_S = 30                            # Seconds between task status polls
+BACKOFF_BASE_S = 15                             # First retry delay (before jitter)
+BACKOFF_CAP_S = 600                             # Longest retry delay
+
+ACTIVE_STATES = {'UNSUBMITTED', 'READY', 'RUNNING', 'CANCEL_REQUESTED'}
+DONE_STATES = {'completed', 'skipped'}          # Journal states a rerun leaves alone
+
+# Failure messages worth retrying (matched lower-case)
+TRANSIENT_ERRORS = (
+    'internal error', 'backend error', 'timed out', 'deadline', 'too many',
+    'rate limit', 'quota', 'unavailable', 'connection', 'try again',
+)
+
+
+#-- Helper Functions --#
+
+def is_transient(message) -> bool:
+    message = str(message or '').lower()
+    return any(pattern in message for pattern in TRANSIENT_ERRORS)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_S, cap: float = BACKOFF_CAP_S, rng=random.random) -> float:
+    """
+    Full-jitter exponential backoff before retry number attempt (1-based).
+    """
+    return rng() * min(cap, base * 2 ** (attempt - 1))
+
+
+def combo_key(combo) -> str:
+    return '|'.join(str(part) for part in combo)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+#-- Journal --#
+
+class ExportJournal:
+    """
+    Thread-safe on-disk record of every combo's export state.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        journal = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.combos = journal.get('combos', {}) if journal.get('version') == JOURNAL_VERSION else {}
+
+    def get(self, combo) -> dict:
+        with self._lock:
+            return dict(self.combos.get(combo_key(combo), {}))
+
+    def update(self, combo, **fields) -> None:
+        with self._lock:
+            entry = self.combos.setdefault(combo_key(combo), {'attempts': 0})
+            entry.update(fields, updated=_now())
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            save_manifest({'version': JOURNAL_VERSION, 'combos': self.combos}, self.path)
+
+    def pending(self, combos) -> list:
+        """
+        Combos a run still has to do: everything not completed or skipped.
+        """
+        return [c for c in combos if self.get(c).get('state') not in DONE_STATES]
+
+
+#-- Scheduler --#
+
+class ExportScheduler:
+    """
+    scheduler = ExportScheduler(submit, journal_path, max_concurrent=4)
+    states = scheduler.run(combos)          # combo -> final journal state
+
+    submit(combo) starts one export and returns its task (or None to skip).
+    attach(task_id), when given, returns a pollable handle for a task
+    started by an earlier run. status(task) defaults to task.status().
+    """
+
+    def __init__(self, submit, journal_path, max_concurrent=MAX_CONCURRENT, max_attempts=MAX_ATTEMPTS,
+                 poll_interval=POLL_INTERVAL_S, backoff_base=BACKOFF_BASE_S, backoff_cap=BACKOFF_CAP_S,
+                 attach=None, status=None, sleep=time.sleep, rng=random.random):
+        self.submit = submit
+        self.journal = ExportJournal(journal_path)
+        self.max_concurrent = max_concurrent
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.attach = attach
+        self.status = status or (lambda task: task.status())
+        self.sleep = sleep
+        self.rng = rng
+
+    def _wait(self, combo, task) -> dict:
+        """
+        Poll task until it leaves the active states; returns its last status.
+        """
+        failures = 0
+        while True:
+            try:
+                status = self.status(task)
+            except Exception as e:
+                failures += 1
+                if not is_transient(e) or failures >= self.max_attempts:
+                    raise
+                self.sleep(backoff_delay(failures, self.backoff_base, self.backoff_cap, self.rng))
+                continue
+            failures = 0
+            state = status.get('state', 'UNKNOWN')
+            if state not in ACTIVE_STATES:
+                return status
+            if self.journal.get(combo).get('task_state') != state:
+                self.journal.update(combo, state='running', task_state=state)
+            self.sleep(self.poll_interval)
+
+    def _resume(self, combo):
+        """
+        Handle on a task from an earlier run that may still be active.
+        """
+        entry = self.journal.get(combo)
+        if self.attach is None or entry.get('state') != 'running' or not entry.get('task_id'):
+            return None
+        try:
+            return self.attach(entry['task_id'])
+        except Exception:
+            return None
+
+    def run_combo(self, combo) -> str:
+        """
+        Drive one combo to a final state: completed, skipped or failed.
+        """
+        task = self._resume(combo)
+        attempts = self.journal.get(combo).get('attempts', 0) if task is not None else 0
+        while True:
+            if task is None:
+                if attempts >= self.max_attempts:
+                    self.journal.update(combo, state='failed')
+                    return 'failed'
+                attempts += 1
+                try:
+                    task = self.submit(combo)
+                except Exception as e:
+                    message = str(e)
+                    self.journal.update(combo, state='retrying', attempts=attempts, error=message)
+                    if not is_transient(message):
+                        self.journal.update(combo, state='failed')
+                        return 'failed'
+                    self.sleep(backoff_delay(attempts, self.backoff_base, self.backoff_cap, self.rng))
+                    continue
+                if task is None:
+                    self.journal.update(combo, state='skipped', attempts=attempts, error=None)
+                    return 'skipped'
+                task_id = getattr(task, 'id', None)
+                self.journal.update(combo, state='running', attempts=attempts, task_id=task_id, error=None)
+
+            status = self._wait(combo, task)
+            task = None
+            if status.get('state') == 'COMPLETED':
+                self.journal.update(combo, state='completed', task_state='COMPLETED', error=None)
+                return 'completed'
+
+            message = status.get('error_message') or status.get('state')
+            self.journal.update(combo, state='retrying', task_state=status.get('state'), error=message)
+            if not is_transient(message):
+                self.journal.update(combo, state='failed')
+                return 'failed'
+            self.sleep(backoff_delay(max(attempts, 1), self.backoff_base, self.backoff_cap, self.rng))
+
+    def run(self, combos) -> dict:
+        """
+        Run every combo the journal has not finished; returns combo -> state.
+        """
+        combos = list(combos)
+        todo = self.journal.pending(combos)
+        print(f' Export scheduler: {len(todo)} of {len(combos)} combos to run, up to {self.max_concurrent} at once')
+        with ThreadPoolExecutor(max_workers=max(self.max_concurrent, 1)) as pool:
+            for combo, future in [(c, pool.submit(self.run_combo, c)) for c in todo]:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.journal.update(combo, state='failed', error=str(e))
+        return {c: self.journal.get(c).get('state') for c in combos}
+
+
+#-- Local ee.batch Stand-in --#
+
+class LocalTask:
+    """
+    Offline export task: READY, then RUNNING, then COMPLETED (or FAILED with
+    error) after a fixed number of status polls.
+    """
+
+    def __init__(self, task_id, description, polls=2, error=None):
+        self.id = task_id
+        self.description = description
+        self.error = error
+        self._polls_left = polls
+        self._state = 'UNSUBMITTED'
+
+    def start(self):
+        self._state = 'READY'
+
+    def status(self) -> dict:
+        if self._state in ('READY', 'RUNNING'):
+            self._polls_left -= 1
+            if self._polls_left <= 0:
+                self._state = 'FAILED' if self.error else 'COMPLETED'
+            else:
+                self._state = 'RUNNING'
+        status = {'id': self.id, 'state': self._state, 'description': self.description}
+        if self._state == 'FAILED':
+            status['error_message'] = self.error
+        return status
+
+
+class LocalBatch:
+    """
+    Stand-in for ee.batch: create_task() hands out LocalTasks, failing a
+    share of them (transient_rate with a retryable message, fatal_rate with
+    a permanent one). errors scripts failures instead: description -> the
+    error message (None = success) of each successive task with that
+    description. Tasks stay addressable by id through get_task().
+    """
+
+    TRANSIENT_ERROR = 'Internal error. Please try again.'
+    FATAL_ERROR = 'Collection query aborted: invalid geometry.'
+
+    def __init__(self, polls=2, transient_rate=0.0, fatal_rate=0.0, seed=0, errors=None):
+        self.polls = polls
+        self.transient_rate = transient_rate
+        self.fatal_rate = fatal_rate
+        self.errors = {k: list(v) for k, v in (errors or {}).items()}
+        self.tasks = {}
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create_task(self, description) -> LocalTask:
+        with self._lock:
+            draw = self._rng.random()
+            task_id = f'LOCAL{next(self._ids):06d}'
+            scripted = description in self.errors
+            error = self.errors[description].pop(0) if self.errors.get(description) else None
+        if not scripted:
+            if draw < self.fatal_rate:
+                error = self.FATAL_ERROR
+            elif draw < self.fatal_rate + self.transient_rate:
+                error = self.TRANSIENT_ERROR
+        task = LocalTask(task_id, description, self.polls, error)
+        self.tasks[task_id] = task
+        return task
+
+    def get_task(self, task_id) -> LocalTask:
+        return self.tasks[task_id]
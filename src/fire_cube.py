@@ -0,0 +1,234 @@
+"""
+Dense (subregion x year x cause) aggregation cube over the AvCan fire
+fragments (fire_stats).
+
+Each year is stored as its own compressed .npz slice. A manifest keeps a
+content hash of every year's input rows, so a refresh recomputes only the
+years whose fragments changed. Reductions are vectorised with bincount
+(and a lexsort for the per-cell maximum) over flattened (subregion, cause)
+cell ids. Subregions are keyed on (region, subregion), so a name reused in
+two regions keeps separate cells.
+
+A fire crossing subregions has one fragment in each, so the cells count it
+once per subregion. Each slice therefore also holds a (cause) slice over
+distinct fires, from which the year and cause totals are taken.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.manifest import load_manifest, save_manifest
+
+
+#-- Constants --#
+
+CUBE_VERSION = 2
+MISSING_LABEL = 'NA'                            # Label for missing cause / region values
+INPUT_COLUMNS = ['gid', 'fireid', 'year', 'cause', 'region', 'subregion', 'subreg_ha', 'tot_adj_ha']
+
+# Measure -> dtype of its dense array
+CUBE_MEASURES = {
+    'n_fires': np.uint32,                       # Fire fragments (one per fire per subregion)
+    'subreg_ha': np.float64,                    # Area burned inside the subregion
+    'tot_adj_ha': np.float64,                   # NBAC adjusted area of the fires touching it
+    'largest_fire_ha': np.float64,              # Largest fire (tot_adj_ha) in the cell
+    'largest_fireid': np.int64,                 # fireid of that fire (-1 when the cell is empty)
+}
+
+# Measure -> dtype of the (cause) arrays over distinct fires
+FIRE_MEASURES = {
+    'n_fires': np.uint32,                       # Distinct fires
+    'tot_adj_ha': np.float64,                   # NBAC adjusted area, each fire once
+    'largest_fire_ha': np.float64,
+}
+FIRE_KEY = ['gid', 'fireid']                    # Shared by every fragment of one fire
+
+
+#-- Helper Functions --#
+
+def _labels(values: pd.Series) -> pd.Series:
+    return values.astype(object).where(values.notna(), MISSING_LABEL).astype(str)
+
+
+def cube_axes(fire_stats: pd.DataFrame) -> dict:
+    """
+    Sorted subregion / region / cause labels spanned by fire_stats; the
+    subregion axis has one entry per (region, subregion) pair.
+    """
+    pairs = (
+        fire_stats[['region', 'subregion']].apply(_labels)
+        .drop_duplicates().sort_values(['subregion', 'region'])
+    )
+    return {
+        'subregion': pairs['subregion'].tolist(),
+        'region': pairs['region'].tolist(),
+        'cause': sorted(_labels(fire_stats['cause']).unique().tolist()),
+    }
+
+
+def _subregion_codes(rows: pd.DataFrame, axes: dict) -> np.ndarray:
+    pairs = pd.MultiIndex.from_arrays([axes['region'], axes['subregion']])
+    return pairs.get_indexer(pd.MultiIndex.from_arrays([_labels(rows['region']), _labels(rows['subregion'])]))
+
+
+def compute_fire_slice(year_rows: pd.DataFrame, axes: dict) -> dict:
+    """
+    (cause) arrays for one year over distinct fires, each counted once
+    however many subregions its fragments fall in.
+    """
+    fires = year_rows.drop_duplicates(FIRE_KEY)
+    cause = pd.Categorical(_labels(fires['cause']), categories=axes['cause']).codes
+    adj_ha = fires['tot_adj_ha'].to_numpy(dtype=np.float64)
+    largest = np.zeros(len(axes['cause']))
+    np.maximum.at(largest, cause, adj_ha)
+    return {
+        'n_fires': np.bincount(cause, minlength=len(axes['cause'])).astype(FIRE_MEASURES['n_fires']),
+        'tot_adj_ha': np.bincount(cause, weights=adj_ha, minlength=len(axes['cause'])),
+        'largest_fire_ha': largest,
+    }
+
+
+def compute_year_slice(year_rows: pd.DataFrame, axes: dict) -> dict:
+    """
+    (subregion x cause) arrays for one year of fragments.
+    """
+    n_sub, n_cause = len(axes['subregion']), len(axes['cause'])
+    sub = _subregion_codes(year_rows, axes)
+    cause = pd.Categorical(_labels(year_rows['cause']), categories=axes['cause']).codes
+    cell = sub.astype(np.int64) * n_cause + cause
+    size = n_sub * n_cause
+
+    adj_ha = year_rows['tot_adj_ha'].to_numpy(dtype=np.float64)
+    out = {
+        'n_fires': np.bincount(cell, minlength=size).astype(CUBE_MEASURES['n_fires']),
+        'subreg_ha': np.bincount(cell, weights=year_rows['subreg_ha'].to_numpy(dtype=np.float64), minlength=size),
+        'tot_adj_ha': np.bincount(cell, weights=adj_ha, minlength=size),
+        'largest_fire_ha': np.zeros(size),
+        'largest_fireid': np.full(size, -1, dtype=np.int64),
+    }
+    if len(cell):
+        # Largest fire per cell: last row of each cell after sorting by area
+        order = np.lexsort((adj_ha, cell))
+        last = np.r_[cell[order][1:] != cell[order][:-1], True]
+        top = order[last]
+        out['largest_fire_ha'][cell[top]] = adj_ha[top]
+        fireid = year_rows['fireid'].to_numpy(dtype=np.float64, na_value=-1)
+        out['largest_fireid'][cell[top]] = fireid[top].astype(np.int64)
+    return {k: v.reshape(n_sub, n_cause) for k, v in out.items()}
+
+
+def _rows_hash(rows: pd.DataFrame) -> str:
+    hashed = pd.util.hash_pandas_object(rows.reset_index(drop=True), index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()[:16]
+
+
+def refresh_cube(fire_stats: pd.DataFrame, cube_dir) -> dict:
+    """
+    Bring the on-disk cube up to date with fire_stats.
+
+    Only years whose input rows changed are recomputed; a change of the
+    subregion / cause axes recomputes everything. Returns
+    year -> 'rebuilt' | 'reused' | 'removed'.
+    """
+    cube_dir = Path(cube_dir)
+    manifest_path = cube_dir / '_manifest.json'
+    manifest = load_manifest(manifest_path)
+
+    rows = pd.DataFrame(fire_stats[INPUT_COLUMNS])
+    for col in ('gid', 'cause', 'region', 'subregion'):
+        rows[col] = _labels(rows[col])
+    axes = cube_axes(rows)
+    axes_changed = manifest.get('axes') != axes or manifest.get('version') != CUBE_VERSION
+    if axes_changed:
+        manifest = {'partitions': {}, 'hash_cache': {}}
+
+    status = {}
+    for year, year_rows in rows.groupby('year', sort=True):
+        year = int(year)
+        key = _rows_hash(year_rows)
+        out_path = cube_dir / f"year={year}.npz"
+        if manifest['partitions'].get(str(year), {}).get('rows_hash') == key and out_path.exists():
+            status[year] = 'reused'
+            continue
+        cube_dir.mkdir(parents=True, exist_ok=True)
+        fire_slice = {f'fires_{k}': v for k, v in compute_fire_slice(year_rows, axes).items()}
+        np.savez_compressed(out_path, **compute_year_slice(year_rows, axes), **fire_slice)
+        manifest['partitions'][str(year)] = {'rows_hash': key, 'rows': len(year_rows)}
+        status[year] = 'rebuilt'
+
+    for key in sorted(set(manifest['partitions']) - {str(y) for y in status}):
+        (cube_dir / f"year={key}.npz").unlink(missing_ok=True)
+        del manifest['partitions'][key]
+        status[int(key)] = 'removed'
+
+    manifest.update({'version': CUBE_VERSION, 'axes': axes})
+    save_manifest(manifest, manifest_path)
+    return status
+
+
+def load_cube(cube_dir, years=None) -> dict:
+    """
+    Stack the stored slices into {'axes': ..., measure: array[subregion, year, cause],
+    'fires': {measure: array[year, cause] over distinct fires}}.
+    """
+    cube_dir = Path(cube_dir)
+    manifest = json.loads((cube_dir / '_manifest.json').read_text())
+    stored = sorted(int(y) for y in manifest['partitions'])
+    years = [y for y in stored if years is None or y in years]
+    slices = [np.load(cube_dir / f"year={y}.npz") for y in years]
+    cube = {'axes': {**manifest['axes'], 'year': years}}
+    for measure in CUBE_MEASURES:
+        cube[measure] = np.stack([s[measure] for s in slices], axis=1) if slices else np.empty((0, 0, 0))
+    cube['fires'] = {
+        measure: np.stack([s[f'fires_{measure}'] for s in slices]) if slices else np.empty((0, 0))
+        for measure in FIRE_MEASURES
+    }
+    return cube
+
+
+def cube_to_frame(cube: dict) -> pd.DataFrame:
+    """
+    Long table of the non-empty cells.
+    """
+    axes = cube['axes']
+    s, y, c = np.nonzero(cube['n_fires'])
+    frame = pd.DataFrame({
+        'region': np.asarray(axes['region'])[s],
+        'subregion': np.asarray(axes['subregion'])[s],
+        'year': np.asarray(axes['year'])[y],
+        'cause': np.asarray(axes['cause'])[c],
+    })
+    for measure in CUBE_MEASURES:
+        frame[measure] = cube[measure][s, y, c]
+    return frame
+
+
+def summarize_cube(cube: dict, by: str = 'subregion') -> pd.DataFrame:
+    """
+    Totals by 'subregion', 'year' or 'cause', reduced straight from the cube.
+    Year and cause totals count each fire once (the distinct-fire slices);
+    subreg_ha is additive across subregions and summed from the cells.
+    """
+    axis = {'subregion': 0, 'year': 1, 'cause': 2}[by]
+    other = tuple(a for a in (0, 1, 2) if a != axis)
+    if by == 'subregion':
+        totals = {m: cube[m] for m in FIRE_MEASURES}
+        totals_axes = other
+    else:
+        totals = cube['fires']
+        totals_axes = 1 if by == 'year' else 0
+    summary = pd.DataFrame({
+        by: cube['axes'][by],
+        'n_fires': totals['n_fires'].sum(axis=totals_axes),
+        'subreg_ha': cube['subreg_ha'].sum(axis=other),
+        'tot_adj_ha': totals['tot_adj_ha'].sum(axis=totals_axes),
+        'largest_fire_ha': totals['largest_fire_ha'].max(axis=totals_axes, initial=0),
+    })
+    if by == 'subregion':
+        summary.insert(0, 'region', cube['axes']['region'])
+    return summary
@@ -0,0 +1,220 @@
+"""
+Persisted, memory-mapped index over the AvCan fire fragments (fire_stats).
+
+An index directory holds:
+- rows.arrow: the fragments (attributes + WKB geometry) as uncompressed
+  Arrow IPC, memory-mapped so only the requested rows are touched
+- a packed STR R-tree over fragment bboxes (rtree_*.npy)
+- sorted secondary keys on subregion, region, year and fireid (key_*.npy)
+
+FragmentIndex answers questions like "fires in Kootenay Boundary between
+2017 and 2021" in milliseconds without loading the whole output.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyarrow as pa
+import shapely
+
+
+#-- Constants --#
+
+INDEX_VERSION = 1
+FANOUT = 16                                     # R-tree node capacity
+KEY_COLUMNS = ['subregion', 'region', 'year', 'fireid']
+
+
+#-- Build --#
+
+def _str_order(boxes: np.ndarray, fanout: int) -> np.ndarray:
+    """
+    Sort-Tile-Recursive packing order for bboxes (xmin, ymin, xmax, ymax).
+    """
+    n = len(boxes)
+    if n == 0:
+        return np.arange(0)
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    n_slices = int(np.ceil(np.sqrt(np.ceil(n / fanout))))
+    slice_size = n_slices * fanout
+    by_x = np.argsort(cx, kind='stable')
+    order = [chunk[np.argsort(cy[chunk], kind='stable')] for chunk in np.array_split(by_x, range(slice_size, n, slice_size))]
+    return np.concatenate(order)
+
+
+def _node_boxes(boxes: np.ndarray, fanout: int) -> np.ndarray:
+    """
+    Bounding box of each consecutive group of `fanout` boxes.
+    """
+    starts = np.arange(0, len(boxes), fanout)
+    return np.column_stack([
+        np.minimum.reduceat(boxes[:, 0], starts),
+        np.minimum.reduceat(boxes[:, 1], starts),
+        np.maximum.reduceat(boxes[:, 2], starts),
+        np.maximum.reduceat(boxes[:, 3], starts),
+    ])
+
+
+def build_fragment_index(fire_stats: gpd.GeoDataFrame, index_dir, fanout: int = FANOUT) -> Path:
+    """
+    Write a fragment index for fire_stats into index_dir (replaced if present).
+    """
+    index_dir = Path(index_dir)
+    if index_dir.exists():
+        shutil.rmtree(index_dir)
+    index_dir.mkdir(parents=True)
+
+    # Rows: attributes + WKB geometry, uncompressed Arrow IPC for memory-mapping
+    attrs = pd.DataFrame(fire_stats.drop(columns=fire_stats.geometry.name))
+    attrs['geometry'] = shapely.to_wkb(fire_stats.geometry.values.to_numpy())
+    table = pa.Table.from_pandas(attrs.reset_index(drop=True), preserve_index=False)
+    with pa.OSFile(str(index_dir / 'rows.arrow'), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=64 * 1024)
+
+    # Spatial: packed R-tree levels, leaves first
+    boxes = shapely.bounds(fire_stats.geometry.values.to_numpy())
+    order = _str_order(boxes, fanout)
+    np.save(index_dir / 'rtree_order.npy', order)
+    level = boxes[order]
+    np.save(index_dir / 'rtree_items.npy', level)
+    n_levels = 0
+    while len(level) > 1:
+        level = _node_boxes(level, fanout)
+        np.save(index_dir / f'rtree_level_{n_levels}.npy', level)
+        n_levels += 1
+
+    # Secondary keys: sorted values + row positions
+    labels = {}
+    for col in KEY_COLUMNS:
+        if col not in fire_stats.columns:
+            continue
+        values = fire_stats[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            cat = values.astype(str).astype('category')
+            labels[col] = list(cat.cat.categories)
+            values = cat.cat.codes
+        values = values.fillna(-1).to_numpy(dtype=np.int64)      # Missing keys sort first
+        rows = np.argsort(values, kind='stable')
+        np.save(index_dir / f'key_{col}.npy', values[rows])
+        np.save(index_dir / f'key_{col}_rows.npy', rows)
+
+    (index_dir / 'meta.json').write_text(json.dumps({
+        'version': INDEX_VERSION,
+        'rows': len(fire_stats),
+        'fanout': fanout,
+        'levels': n_levels,
+        'keys': [c for c in KEY_COLUMNS if c in fire_stats.columns],
+        'labels': labels,
+        'crs': fire_stats.crs.to_wkt() if fire_stats.crs else None,
+    }))
+    return index_dir
+
+
+#-- Query --#
+
+def _intersects(boxes: np.ndarray, bbox) -> np.ndarray:
+    xmin, ymin, xmax, ymax = bbox
+    return (boxes[:, 0] <= xmax) & (boxes[:, 2] >= xmin) & (boxes[:, 1] <= ymax) & (boxes[:, 3] >= ymin)
+
+
+class FragmentIndex:
+    """
+    Memory-mapped query interface over a fragment index directory.
+
+    idx = FragmentIndex(path)
+    rows = idx.query(subregion="Kootenay Boundary", years=(2017, 2021))
+    idx.frame(rows)          # GeoDataFrame of the matching fragments
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        self.meta = json.loads((self.index_dir / 'meta.json').read_text())
+        self.crs = self.meta['crs']
+        self._rows = pa.ipc.open_file(pa.memory_map(str(self.index_dir / 'rows.arrow'), 'r')).read_all()
+        self._order = self._load('rtree_order.npy')
+        self._items = self._load('rtree_items.npy')
+        self._levels = [self._load(f'rtree_level_{i}.npy') for i in range(self.meta['levels'])]
+
+    def _load(self, name):
+        return np.load(self.index_dir / name, mmap_mode='r')
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def _key_range(self, col, lo, hi) -> np.ndarray:
+        keys = self._load(f'key_{col}.npy')
+        start = np.searchsorted(keys, lo, side='left')
+        stop = np.searchsorted(keys, hi, side='right')
+        return np.sort(self._load(f'key_{col}_rows.npy')[start:stop])
+
+    def _key_rows(self, col, value) -> np.ndarray:
+        if col not in self.meta['keys']:
+            raise KeyError(f"{col!r} is not indexed; indexed keys: {self.meta['keys']}")
+        labels = self.meta['labels'].get(col)
+        if isinstance(value, tuple):
+            lo, hi = value
+            return self._key_range(col, lo, hi)
+        values = value if isinstance(value, (list, set, np.ndarray)) else [value]
+        if labels is not None:
+            values = [labels.index(str(v)) for v in values if str(v) in labels]
+        parts = [self._key_range(col, v, v) for v in values]
+        return np.unique(np.concatenate(parts)) if parts else np.arange(0)
+
+    def bbox_rows(self, bbox) -> np.ndarray:
+        """
+        Rows whose bbox intersects bbox (index CRS), via the R-tree.
+        """
+        fanout = self.meta['fanout']
+        n_children = [len(self._items)] + [len(level) for level in self._levels[:-1]]
+        nodes = np.arange(len(self._levels[-1])) if self._levels else np.arange(len(self._items))
+        for level, n in zip(reversed(self._levels), reversed(n_children)):
+            hits = nodes[_intersects(level[nodes], bbox)]
+            nodes = (hits[:, None] * fanout + np.arange(fanout)).ravel()
+            nodes = nodes[nodes < n]
+        items = nodes[_intersects(self._items[nodes], bbox)]
+        return np.sort(self._order[items])
+
+    def query(self, subregion=None, region=None, years=None, fireid=None, bbox=None) -> np.ndarray:
+        """
+        Row positions matching every given filter. Values may be a single
+        value or a list; years and fireid also accept an inclusive (lo, hi)
+        tuple; bbox is (xmin, ymin, xmax, ymax) in the index CRS.
+        """
+        result = None
+        for col, value in (('subregion', subregion), ('region', region), ('year', years), ('fireid', fireid)):
+            if value is None:
+                continue
+            rows = self._key_rows(col, value)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        if bbox is not None:
+            rows = self.bbox_rows(bbox)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return np.arange(len(self)) if result is None else result
+
+    def rows(self, rows, columns=None) -> pd.DataFrame:
+        """
+        Attribute rows (no geometry) for row positions.
+        """
+        table = self._rows.take(pa.array(np.asarray(rows, dtype=np.int64)))
+        columns = [c for c in (columns or table.column_names) if c != 'geometry']
+        return table.select(columns).to_pandas()
+
+    def geometries(self, rows) -> np.ndarray:
+        """
+        Shapely geometries for row positions.
+        """
+        wkb = self._rows.column('geometry').take(pa.array(np.asarray(rows, dtype=np.int64)))
+        return shapely.from_wkb(wkb.to_numpy(zero_copy_only=False))
+
+    def frame(self, rows, columns=None) -> gpd.GeoDataFrame:
+        """
+        Matching fragments as a GeoDataFrame.
+        """
+        return gpd.GeoDataFrame(self.rows(rows, columns), geometry=self.geometries(rows), crs=self.crs)
@@ -0,0 +1,109 @@
+"""
+Content-hash build manifests for incremental pipeline rebuilds.
+
+A manifest is a JSON file recording, for each output partition, the hash
+of its input plus the code and config fingerprints used to build it. A
+partition is rebuilt only when one of those changes.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import hashlib
+import json
+import os
+
+
+#-- Constants --#
+
+HASH_CHUNK = 1024 * 1024                        # 1 MiB reads
+
+
+#-- Helper Functions --#
+
+def file_sha256(path, cache: dict | None = None) -> str:
+    """
+    SHA-256 of a file. cache (path -> {'size','mtime_ns','sha256'}) from a
+    previous manifest skips re-hashing files whose size and mtime are unchanged.
+    """
+    path = Path(path)
+    stat = path.stat()
+    cached = (cache or {}).get(str(path))
+    if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+        return cached['sha256']
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    if cache is not None:
+        cache[str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': h.hexdigest()}
+    return h.hexdigest()
+
+
+def source_files(path) -> list[Path]:
+    """
+    The files on disk behind a source path: the zip for /vsizip/ paths,
+    the shapefile and all of its sidecars (.dbf, .prj, ...) for .shp paths,
+    else the path itself.
+    """
+    path = str(path)
+    if path.startswith('/vsizip/'):
+        return [Path(path[len('/vsizip'):].split('.zip/', 1)[0] + '.zip')]
+    path = Path(path)
+    if path.suffix == '.shp':
+        return sorted(f for f in path.parent.glob(f"{path.stem}.*") if f.is_file())
+    return [path]
+
+
+def code_fingerprint(*paths) -> str:
+    """
+    Short hash of the source files that produce an output.
+    """
+    h = hashlib.sha256()
+    for path in sorted(map(str, paths)):
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def config_fingerprint(config: dict) -> str:
+    """
+    Short hash of a JSON-serialisable build configuration.
+    """
+    blob = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def load_manifest(path) -> dict:
+    """
+    Load a manifest, or an empty one if it does not exist yet.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {'partitions': {}, 'hash_cache': {}}
+    manifest = json.loads(path.read_text())
+    manifest.setdefault('partitions', {})
+    manifest.setdefault('hash_cache', {})
+    return manifest
+
+
+def save_manifest(manifest: dict, path) -> None:
+    """
+    Write a manifest atomically (temp file + rename).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True, default=str))
+    os.replace(tmp, path)
+
+
+def is_current(manifest: dict, key: str, entry: dict, base_dir) -> bool:
+    """
+    True when a partition was built from the same inputs, code and config
+    and its recorded outputs (relative to base_dir) still exist.
+    """
+    previous = manifest['partitions'].get(key)
+    if not previous:
+        return False
+    same = all(previous.get(k) == v for k, v in entry.items() if k != 'outputs')
+    return same and all((Path(base_dir) / p).exists() for p in previous.get('outputs', []))
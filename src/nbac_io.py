@@ -0,0 +1,563 @@
+"""
+Readers for the yearly NBAC archives shared by the pipeline scripts.
+
+NBAC zips can be read in place through GDAL's /vsizip/ virtual filesystem,
+so nothing needs to be extracted to disk before loading.
+"""
+
+#-- Packages --#
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import importlib.util
+import os
+import re
+import zipfile
+import shutil
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyogrio
+
+from src import manifest as manifest_module
+from src.projection import WORKING_CRS, to_export_crs
+from src.manifest import (
+    file_sha256,
+    code_fingerprint,
+    config_fingerprint,
+    load_manifest,
+    save_manifest,
+    is_current,
+    source_files,
+)
+
+
+#-- Constants --#
+
+# Canonical analysis column -> source field names seen across NBAC years
+NBAC_COLUMN_ALIASES = {
+    'gid':       ['GID'],
+    'fireid':    ['NFIREID', 'FIREID'],
+    'year':      ['YEAR'],
+    'prov_terr': ['ADMIN_AREA', 'PROV_TERR'],
+    'natpark':   ['NATPARK'],
+    'adj_ha':    ['ADJ_HA'],
+    'cause':     ['FIRECAUS', 'FIRECAUSE', 'CAUSE'],
+}
+
+# Source fields behind the analysis columns
+# ['gid','fireid','year','prov_terr','natpark','adj_ha','cause','geometry']
+NBAC_ANALYSIS_FIELDS = [f for aliases in NBAC_COLUMN_ALIASES.values() for f in aliases]
+
+# Columns kept in the cleaned Canada fires outputs
+NBAC_ANALYSIS_COLUMNS = ['gid', 'fireid', 'year', 'prov_terr', 'natpark', 'adj_ha', 'cause', 'geometry']
+
+# Low-cardinality columns stored as categoricals / integers stored at their smallest width
+CATEGORY_COLUMNS = ['prov_terr', 'natpark', 'cause', 'region', 'subregion']
+INTEGER_COLUMNS = ['year', 'fireid']
+
+# Fixed dtypes for year partitions: every year=YYYY/ file shares one schema
+# whatever its value ranges (year itself lives in the directory name)
+PARTITION_DTYPES = {
+    'gid': 'string',
+    'fireid': 'Int32',
+    'year': 'int16',
+    'prov_terr': 'string',
+    'natpark': 'string',
+    'adj_ha': 'float64',
+    'cause': 'string',
+}
+
+# Processed outputs in order of preference for downstream scripts
+OUTPUT_PATTERNS = ['*_parquet', '*.parquet', '*.shp']
+
+USE_ARROW = importlib.util.find_spec('pyarrow') is not None
+
+MANIFEST_NAME = '_manifest.json'                # Build manifest inside each partitioned dataset
+
+
+#-- Helper Functions --#
+
+def unzip_to_folder(zip_path, extract_to):              # Unzip NBAC files to destination
+    """
+    Unzips a ZIP archive into a specified directory.
+    """
+    extract_to = Path(extract_to)
+    extract_to.mkdir(parents=True, exist_ok=True)
+
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(extract_to)                  # Read SHP to destination folder
+
+    macosx_folder = extract_to / '__MACOSX'
+    if macosx_folder.exists():
+        shutil.rmtree(macosx_folder)
+
+
+def find_zip_shapefile(zip_path) -> str | None:
+    """
+    Name of the .shp member inside a zip, ignoring macOS resource forks.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        members = [
+            m for m in zip_ref.namelist()
+            if m.lower().endswith('.shp')
+            and not m.startswith('__MACOSX/')
+            and not Path(m).name.startswith('._')
+        ]
+    return sorted(members)[0] if members else None
+
+
+def vsizip_path(zip_path, member: str) -> str:
+    """
+    GDAL virtual path for a member of a zip archive.
+    """
+    return f"/vsizip/{Path(zip_path).resolve().as_posix()}/{member}"
+
+
+def latest_nbac_releases(zip_paths) -> list[Path]:
+    """
+    Newest NBAC_<year>_YYYYMMDD release of each year (the lexicographically
+    last name, as the download picks it); names without a year are kept.
+    """
+    latest = {}
+    for zip_path in sorted(map(Path, zip_paths)):
+        year = source_year(zip_path.stem)
+        key = zip_path.stem if year is None else year
+        if key in latest:
+            print(f'Older NBAC release {latest[key].name} superseded by {zip_path.name}, skipping.')
+        latest[key] = zip_path
+    return sorted(latest.values())
+
+
+def list_nbac_sources(zip_dir, extract_to=None) -> dict[str, str]:
+    """
+    Map each NBAC zip stem to a readable shapefile path, keeping only the
+    newest release of each year.
+
+    By default the .shp is addressed inside the zip (/vsizip/), nothing is
+    written to disk. Pass extract_to to unzip every archive there first and
+    return the extracted .shp paths instead.
+    """
+    sources = {}
+    for zip_path in latest_nbac_releases(Path(zip_dir).glob('*.zip')):
+        name = zip_path.stem
+        if extract_to is not None:
+            folder = Path(extract_to) / name                    # Retain name identity
+            unzip_to_folder(zip_path, folder)
+            shp = next(folder.rglob('*.shp'), None)
+            if shp:
+                sources[name] = str(shp)
+        else:
+            member = find_zip_shapefile(zip_path)
+            if member:
+                sources[name] = vsizip_path(zip_path, member)
+        if name not in sources:
+            print(f'No shapefile found in {zip_path.name}, skipping.')
+    return sources
+
+
+def source_year(name: str) -> int | None:
+    """
+    Fire year encoded in an NBAC_<year>_YYYYMMDD name.
+    """
+    match = re.search(r"NBAC_(\d{4})", str(name))
+    return int(match.group(1)) if match else None
+
+
+def read_nbac_layer(path: str, columns=None, bbox=None, plan=None) -> gpd.GeoDataFrame:
+    """
+    Read one NBAC layer through pyogrio, decoding only the requested fields.
+
+    Column names are matched case-insensitively against the layer's fields,
+    absent ones are skipped. bbox (minx, miny, maxx, maxy, layer CRS) is
+    applied by the reader, so features outside it are never decoded.
+
+    With a preflight plan (see preflight_nbac_sources) only the planned
+    fields are read, renamed to their canonical names, missing columns are
+    filled and the layer is reprojected to the plan's target CRS.
+    """
+    read_cols = None
+    if plan is not None:
+        read_cols = list(plan['rename'])
+    elif columns is not None:
+        wanted = {c.upper() for c in columns}
+        fields = pyogrio.read_info(path)['fields']
+        read_cols = [f for f in fields if f.upper() in wanted]
+
+    gdf = gpd.read_file(
+        path,
+        engine='pyogrio',
+        columns=read_cols,
+        bbox=bbox,
+        use_arrow=USE_ARROW,
+    )
+    if plan is not None:
+        gdf = apply_column_plan(gdf, plan)
+    return gdf
+
+
+def apply_column_plan(gdf: gpd.GeoDataFrame, plan: dict) -> gpd.GeoDataFrame:
+    """
+    Rename, fill and reproject a layer according to its preflight plan.
+    """
+    gdf = gdf.rename(columns=plan['rename'])
+    for col, value in plan['fill'].items():
+        gdf[col] = value
+    if plan['target_crs'] is not None and gdf.crs != plan['target_crs']:
+        gdf = gdf.to_crs(plan['target_crs'])
+    return gdf[plan['columns'] + [gdf.geometry.name]]
+
+
+def _read_nbac_item(item):
+    name, path, columns, bbox, plan = item
+    return name, read_nbac_layer(path, columns=columns, bbox=bbox, plan=plan)
+
+
+def read_nbac_layers(sources: dict, columns=None, bbox=None, years=None, workers=None, plans=None) -> dict:
+    """
+    Read every NBAC source concurrently across a process pool.
+
+    sources maps name -> path (see list_nbac_sources). years drops whole
+    sources by the year in their name before anything is opened. plans maps
+    name -> column plan from preflight_nbac_sources. Returns
+    name -> GeoDataFrame in the sorted order of the names.
+    """
+    if years is not None:
+        years = set(years)
+        sources = {k: v for k, v in sources.items() if source_year(k) in years}
+
+    plans = plans or {}
+    items = [(name, path, columns, bbox, plans.get(name)) for name, path in sorted(sources.items())]
+    workers = min(workers or os.cpu_count() or 1, len(items) or 1)
+
+    if workers <= 1:
+        return dict(map(_read_nbac_item, items))
+
+    # Items are plain picklable tuples, so any start method works
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_read_nbac_item, items))
+
+
+#-- Preflight --#
+
+def read_layer_metadata(path: str) -> dict:
+    """
+    Field names/types, CRS, feature count and extent of a layer, without
+    decoding any features.
+    """
+    info = pyogrio.read_info(path, force_feature_count=True, force_total_bounds=True)
+    return {
+        'fields': dict(zip(info['fields'], info['dtypes'])),
+        'crs': info['crs'],
+        'features': info['features'],
+        'bounds': info['total_bounds'],
+        'geometry_type': info['geometry_type'],
+    }
+
+
+def plan_columns(fields, name=None, target_crs=None) -> dict:
+    """
+    Map a layer's source fields onto the canonical analysis columns.
+
+    Returns {'rename': {source: canonical}, 'fill': {canonical: value},
+    'missing': [...], 'columns': [...], 'target_crs': ...}. Missing columns
+    are filled with None, except year which falls back on the source name.
+    """
+    by_upper = {f.upper(): f for f in fields}
+    rename, fill, missing = {}, {}, []
+    for canonical, aliases in NBAC_COLUMN_ALIASES.items():
+        field = next((by_upper[a] for a in aliases if a in by_upper), None)
+        if field is not None:
+            rename[field] = canonical
+            continue
+        missing.append(canonical)
+        fill[canonical] = source_year(name) if canonical == 'year' else None
+    return {
+        'rename': rename,
+        'fill': fill,
+        'missing': missing,
+        'columns': list(NBAC_COLUMN_ALIASES),
+        'target_crs': target_crs,
+    }
+
+
+def preflight_nbac_sources(sources: dict, reference_year: int = 2024, target_crs=None) -> dict:
+    """
+    Compare every NBAC layer's metadata against the reference year.
+
+    Only layer headers are read. Returns the per-layer metadata, schema
+    drift (missing / extra fields, type changes) and CRS mismatches versus
+    the reference layer, and a column plan per layer for read_nbac_layers
+    reprojecting to target_crs (default: the reference layer's CRS).
+    """
+    metadata = {name: read_layer_metadata(path) for name, path in sorted(sources.items())}
+
+    candidate = [k for k in metadata if source_year(k) == reference_year]
+    if not candidate:
+        raise KeyError(f"No shapefile for reference year {reference_year} found in NBAC sources.")
+    if len(candidate) > 1:
+        print(f"Multiple shapefiles for reference year {reference_year} found. Using the latest: {candidate}")
+    ref_key = candidate[-1]
+    ref = metadata[ref_key]
+
+    target_crs = target_crs or ref['crs']
+    drift, crs_mismatch, plans = {}, {}, {}
+    for name, meta in metadata.items():
+        missing = sorted(set(ref['fields']) - set(meta['fields']))
+        extra = sorted(set(meta['fields']) - set(ref['fields']))
+        retyped = {
+            f: (ref['fields'][f], dtype)
+            for f, dtype in meta['fields'].items()
+            if f in ref['fields'] and ref['fields'][f] != dtype
+        }
+        if missing or extra or retyped:
+            drift[name] = {'missing': missing, 'extra': extra, 'retyped': retyped}
+        if meta['crs'] != ref['crs']:
+            crs_mismatch[name] = meta['crs']
+        plans[name] = plan_columns(meta['fields'], name=name, target_crs=target_crs)
+
+    return {
+        'reference': ref_key,
+        'reference_crs': ref['crs'],
+        'target_crs': target_crs,
+        'metadata': metadata,
+        'drift': drift,
+        'crs_mismatch': crs_mismatch,
+        'plans': plans,
+    }
+
+
+def print_preflight_report(preflight: dict) -> None:
+    """
+    Print schema drift, CRS mismatches and column fills found by preflight.
+    """
+    ref_key = preflight['reference']
+    n_features = sum(m['features'] for m in preflight['metadata'].values())
+    print(f"{len(preflight['metadata'])} layers, {n_features} features. Reference: {ref_key} ({preflight['reference_crs']})")
+
+    if not preflight['drift']:
+        print(f"All shapefiles match the reference structure: {ref_key}")
+    else:
+        print(f"{len(preflight['drift'])} shapefile(s) differ from reference: {ref_key}\n")
+        for name, diffs in preflight['drift'].items():
+            print(f"- {name}")
+            if diffs['missing']:
+                print(f"   missing: {diffs['missing']}")
+            if diffs['extra']:
+                print(f"   extra:   {diffs['extra']}")
+            for field, (ref_type, this_type) in diffs['retyped'].items():
+                print(f"   type:    {field} {ref_type} -> {this_type}")
+
+    for name, crs in preflight['crs_mismatch'].items():
+        print(f"- {name} CRS {crs} differs from reference {preflight['reference_crs']}")
+    print(f"All layers are reprojected once, on load, to {preflight['target_crs']}")
+
+    for name, plan in preflight['plans'].items():
+        if plan['missing']:
+            print(f"- {name} analysis columns filled on load: {plan['fill']}")
+
+
+#-- Streaming merge --#
+
+def clean_nbac_layer(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Cast and select the analysis columns of a plan-normalised layer.
+    """
+    gdf['year'] = gdf['year'].astype(int)
+    gdf['fireid'] = gdf['fireid'].astype('Int64')      # Nullable: filled if a year lacks it
+    return gdf[NBAC_ANALYSIS_COLUMNS]
+
+
+def _smallest_int_dtype(s: pd.Series) -> str:
+    """
+    Smallest signed integer dtype holding every value (nullable if s has NA).
+    """
+    lo, hi = (int(s.min()), int(s.max())) if s.notna().any() else (0, 0)
+    for bits in (8, 16, 32, 64):
+        info = np.iinfo(f'int{bits}')
+        if info.min <= lo and hi <= info.max:
+            break
+    return f'Int{bits}' if s.isna().any() else f'int{bits}'
+
+
+def compact_fire_dtypes(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Categoricals for low-cardinality text columns and smallest-fit integers.
+    """
+    for col in CATEGORY_COLUMNS:
+        if col in gdf.columns:
+            gdf[col] = gdf[col].astype('category')
+    for col in INTEGER_COLUMNS:
+        if col in gdf.columns:
+            gdf[col] = gdf[col].astype(_smallest_int_dtype(gdf[col]))
+    return gdf
+
+
+def partition_fire_dtypes(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    PARTITION_DTYPES for the columns gdf has, so partitions written from
+    years with different value ranges (or an all-null column) still read
+    back as one dataset.
+    """
+    return gdf.astype({c: dtype for c, dtype in PARTITION_DTYPES.items() if c in gdf.columns})
+
+
+def write_fires_parquet(gdf: gpd.GeoDataFrame, out_path, compact: bool = True) -> Path:
+    """
+    Write GeoParquet: WKB geometry plus a per-row bbox covering column, so
+    readers can skip row groups outside a bbox. compact shrinks dtypes to
+    fit this file's values; otherwise the fixed PARTITION_DTYPES are used.
+    """
+    gdf = compact_fire_dtypes(gdf) if compact else partition_fire_dtypes(gdf)
+    gdf.to_parquet(out_path, index=False, write_covering_bbox=True)
+    return Path(out_path)
+
+
+def write_year_partition(gdf: gpd.GeoDataFrame, dataset_dir, year: int, name: str) -> Path:
+    """
+    Replace the year=YYYY/ partition of a Hive-partitioned GeoParquet dataset.
+
+    The partition key lives in the directory name, not in the file.
+    """
+    part_dir = Path(dataset_dir) / f"year={year}"
+    if part_dir.exists():
+        shutil.rmtree(part_dir)                         # Drop stale _YYYYMMDD releases
+    part_dir.mkdir(parents=True)
+    return write_fires_parquet(gdf.drop(columns='year'), part_dir / f"{name}.parquet", compact=False)
+
+
+def stream_merge_nbac(sources: dict, plans: dict, dataset_dir, target_crs=WORKING_CRS,
+                      bbox=None, years=None, append_files=(), force=False) -> dict:
+    """
+    Normalise, clean and reproject one NBAC year at a time into a
+    Hive-partitioned GeoParquet dataset (dataset_dir/year=YYYY/).
+
+    Only one year is held in memory at once. A manifest in dataset_dir
+    records the hash of each input zip plus the code and config used, so
+    only years whose inputs changed are rebuilt (force=True rebuilds all).
+    append_files lists (path, driver) pairs regenerated partition by
+    partition whenever anything changed, e.g. the GeoJSON / Shapefile
+    exports, in EXPORT_CRS. Returns year -> 'rebuilt' | 'reused' | 'removed'.
+    """
+    dataset_dir = Path(dataset_dir)
+    manifest_path = dataset_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+
+    if years is not None:
+        years = set(years)
+        sources = {k: v for k, v in sources.items() if source_year(k) in years}
+
+    code = code_fingerprint(__file__, manifest_module.__file__)
+    config = config_fingerprint({
+        'target_crs': target_crs,
+        'bbox': bbox,
+        'aliases': NBAC_COLUMN_ALIASES,
+        'columns': NBAC_ANALYSIS_COLUMNS,
+    })
+
+    status = {}
+    for name, path in sorted(sources.items()):
+        year = source_year(name)
+        entry = {
+            'source': name,
+            'sha256': {f.name: file_sha256(f, cache=manifest['hash_cache']) for f in source_files(path)},
+            'code': code,
+            'config': config,
+        }
+        if not force and is_current(manifest, str(year), entry, dataset_dir):
+            status[year] = 'reused'
+            continue
+
+        plan = {**plans[name], 'target_crs': target_crs}
+        gdf = clean_nbac_layer(read_nbac_layer(path, bbox=bbox, plan=plan))
+        out_path = write_year_partition(gdf, dataset_dir, year, name)
+        manifest['partitions'][str(year)] = {
+            **entry,
+            'features': len(gdf),
+            'outputs': [out_path.relative_to(dataset_dir).as_posix()],
+        }
+        save_manifest(manifest, manifest_path)          # Progress survives an interrupted run
+        status[year] = 'rebuilt'
+        print(f' NBAC {year}: {len(gdf)} fires written to {dataset_dir.name}/year={year}/')
+        del gdf
+
+    # Years no longer present in the sources (only when building every year)
+    if years is None:
+        for key in sorted(set(manifest['partitions']) - {str(y) for y in status}):
+            shutil.rmtree(dataset_dir / f"year={key}", ignore_errors=True)
+            del manifest['partitions'][key]
+            status[int(key)] = 'removed'
+    save_manifest(manifest, manifest_path)
+
+    changed = any(s != 'reused' for s in status.values())
+    for out_path, driver in append_files:
+        if not changed and Path(out_path).exists():
+            continue
+        Path(out_path).unlink(missing_ok=True)
+        for year in sorted(y for y, s in status.items() if s != 'removed'):
+            gdf = to_export_crs(read_fires_dataset(dataset_dir, years=[year])[NBAC_ANALYSIS_COLUMNS])
+            gdf.to_file(out_path, driver=driver, engine='pyogrio',
+                        mode='a' if Path(out_path).exists() else 'w')
+        print(f' {driver} regenerated from partitions: {Path(out_path).name}')
+
+    return status
+
+
+def read_fires_dataset(dataset_dir, years=None, columns=None, bbox=None) -> gpd.GeoDataFrame:
+    """
+    Read a year-partitioned fires GeoParquet dataset, optionally only some
+    years and only rows whose bbox intersects bbox (dataset CRS).
+    """
+    filters = [('year', 'in', list(years))] if years is not None else None
+    gdf = gpd.read_parquet(dataset_dir, columns=columns, filters=filters, bbox=bbox)
+    if 'year' in gdf.columns:
+        gdf['year'] = gdf['year'].astype(int)           # Partition keys come back as categories
+    return compact_fire_dtypes(gdf)
+
+
+def read_fires(path, columns=None, bbox=None) -> gpd.GeoDataFrame:
+    """
+    Read a processed fires output: partitioned dataset, GeoParquet, Feather
+    or any OGR file (GeoJSON / Shapefile).
+    """
+    path = Path(path)
+    if path.is_dir():
+        return read_fires_dataset(path, columns=columns, bbox=bbox)
+    if path.suffix == '.parquet':
+        return compact_fire_dtypes(gpd.read_parquet(path, columns=columns, bbox=bbox))
+    if path.suffix == '.feather':
+        return compact_fire_dtypes(gpd.read_feather(path, columns=columns))
+    return gpd.read_file(path, engine='pyogrio', columns=columns, bbox=bbox, use_arrow=USE_ARROW)
+
+
+def read_fire_attributes(path, columns=None) -> pd.DataFrame:
+    """
+    Attribute columns of a processed fires output (as read_fires), without
+    reading or decoding any geometry.
+    """
+    path = Path(path)
+    if path.is_dir() or path.suffix == '.parquet':
+        df = pd.read_parquet(path, columns=columns)
+    elif path.suffix == '.feather':
+        df = pd.read_feather(path, columns=columns)
+    else:
+        df = pyogrio.read_dataframe(path, columns=columns, read_geometry=False, use_arrow=USE_ARROW)
+    if 'year' in df.columns:
+        df['year'] = df['year'].astype(int)             # Partition keys come back as categories
+    return compact_fire_dtypes(df)
+
+
+def find_latest_output(folder, patterns=OUTPUT_PATTERNS) -> Path | None:
+    """
+    Latest-year output in folder, preferring the earlier patterns
+    (columnar outputs before Shapefiles).
+    """
+    def max_year(path):
+        years = re.findall(r"\d{4}", path.name)
+        return max(map(int, years)) if years else -1
+
+    for pattern in patterns:
+        found = list(Path(folder).glob(pattern))
+        if found:
+            return max(found, key=max_year)
+    return None
@@ -0,0 +1,153 @@
+"""
+Out-of-core median NBR compositing of Sentinel-2 scenes.
+
+Scenes are streamed window by window onto the analysis grid: each one is
+QA60 cloud / cirrus masked and turned into NBR, then its valid values are
+pushed into a bounded per-pixel buffer of BUFFER_DEPTH observations held
+in a memory-mapped scratch array. Once a pixel has more valid observations
+than the buffer holds, the buffer becomes a reservoir sample of all of
+them, so the composite is the exact median up to BUFFER_DEPTH clear looks
+and an unbiased sample median beyond that.
+
+The window size is chosen so that every worker's share of the buffer fits
+under a memory ceiling, and windows are composited in parallel threads
+(one dataset handle per window, as rasterio handles are not thread-safe).
+"""
+
+#-- Packages --#
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import math
+import os
+import tempfile
+import warnings
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from src.raster_grid import bounds_overlap, grid_windows, warp_to_grid, window_bounds
+from src.severity_params import CIRRUS_BIT, CLOUD_BIT
+
+
+#-- Constants --#
+
+S2_NODATA = 0
+BUFFER_DEPTH = 32                               # Valid observations kept per pixel
+MEMORY_MB = 1024                                # Ceiling for the compositing buffers, all workers
+MIN_CHUNK = 64                                  # Smallest window side (pixels)
+PIXEL_OVERHEAD_BYTES = 48                       # Band reads, NBR, counts and draws per pixel
+
+
+#-- Per-scene NBR --#
+
+def mask_s2_clouds(qa: np.ndarray) -> np.ndarray:
+    """
+    True where QA60 flags neither opaque cloud nor cirrus.
+    """
+    return ((qa & CLOUD_BIT) == 0) & ((qa & CIRRUS_BIT) == 0)
+
+
+def nbr(b8: np.ndarray, b12: np.ndarray) -> np.ndarray:
+    """
+    (B8 - B12) / (B8 + B12) as float32, NaN where undefined.
+    """
+    b8, b12 = b8.astype(np.float32), b12.astype(np.float32)
+    total = b8 + b12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total != 0, (b8 - b12) / total, np.nan).astype(np.float32)
+
+
+def read_scene_nbr(vrt, bands: dict, window: Window) -> np.ndarray:
+    """
+    Cloud-masked NBR of one scene over a grid window (NaN where masked).
+    """
+    b8, b12, qa = vrt.read([bands['B8'], bands['B12'], bands['QA60']], window=window)
+    valid = mask_s2_clouds(qa) & ~((b8 == S2_NODATA) & (b12 == S2_NODATA))
+    out = nbr(b8, b12)
+    out[~valid] = np.nan
+    return out
+
+
+#-- Streaming Buffer --#
+
+def chunk_size(grid: dict, memory_mb: float = MEMORY_MB, workers: int = 1, depth: int = BUFFER_DEPTH) -> int:
+    """
+    Largest window side (a multiple of MIN_CHUNK) whose buffers for all
+    workers fit in memory_mb.
+    """
+    per_pixel = depth * 4 + PIXEL_OVERHEAD_BYTES
+    side = math.isqrt(int(memory_mb * 2 ** 20 / (max(workers, 1) * per_pixel)))
+    side = max(side // MIN_CHUNK * MIN_CHUNK, MIN_CHUNK)
+    return min(side, max(grid['height'], grid['width']))
+
+
+def push_observations(buffer: np.ndarray, count: np.ndarray, values: np.ndarray, rng) -> None:
+    """
+    Add one scene's values (NaN = no observation) to a (depth, h, w) buffer.
+
+    Pixels with free slots append; full pixels keep the new value with
+    probability depth / n (reservoir sampling), replacing a random slot.
+    """
+    depth = buffer.shape[0]
+    rows, cols = np.nonzero(~np.isnan(values))
+    if not len(rows):
+        return
+    seen = count[rows, cols] + 1
+    count[rows, cols] = seen
+    slot = np.where(seen <= depth, seen - 1, np.floor(rng.random(len(rows)) * seen).astype(np.int64))
+    keep = slot < depth
+    buffer[slot[keep], rows[keep], cols[keep]] = values[rows[keep], cols[keep]]
+
+
+def buffer_median(buffer: np.ndarray) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)           # All-NaN pixels stay NaN
+        return np.nanmedian(np.asarray(buffer), axis=0).astype(np.float32)
+
+
+#-- Compositing --#
+
+def composite_nbr(scenes, grid: dict, out_path=None, memory_mb: float = MEMORY_MB, workers: int | None = None,
+                  depth: int = BUFFER_DEPTH, scratch_dir=None, seed: int = 0) -> np.ndarray:
+    """
+    Median cloud-masked NBR of scenes (list_s2_scenes records) on grid.
+
+    The per-pixel buffer lives in a scratch memmap under scratch_dir
+    (default the system temp dir) and is removed afterwards. The composite
+    is returned in memory, or written to out_path (.npy) and returned
+    memory-mapped. NaN where no scene has a clear look.
+    """
+    workers = workers or os.cpu_count()
+    chunk = chunk_size(grid, memory_mb, workers, depth)
+    shape = (grid['height'], grid['width'])
+    if out_path is not None:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=shape)
+    else:
+        out = np.empty(shape, dtype=np.float32)
+
+    with tempfile.TemporaryDirectory(dir=scratch_dir, prefix='nbr_composite_') as scratch:
+        buffer = np.memmap(Path(scratch) / 'buffer.f32', mode='w+', dtype=np.float32, shape=(depth, *shape))
+
+        def composite_window(window):
+            rows, cols = window.toslices()
+            slab = buffer[:, rows, cols]
+            slab[:] = np.nan
+            count = np.zeros(slab.shape[1:], dtype=np.int32)
+            rng = np.random.default_rng((seed, window.row_off, window.col_off))
+            bounds = window_bounds(grid, window)
+            for s in scenes:
+                if not bounds_overlap(s['bounds'], bounds):
+                    continue
+                with rasterio.open(s['path']) as src, warp_to_grid(src, grid, nodata=S2_NODATA) as vrt:
+                    push_observations(slab, count, read_scene_nbr(vrt, s['bands'], window), rng)
+            out[rows, cols] = buffer_median(slab)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(composite_window, grid_windows(grid, chunk)))
+        del buffer
+
+    if out_path is not None:
+        out.flush()
+    return out
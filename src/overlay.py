@@ -0,0 +1,217 @@
+"""
+Fire x AvCan subregion overlay engine.
+
+Replaces gpd.overlay(fires, regions, how="intersection") for the common
+case where most fires lie wholly inside one subregion or outside all of
+them: candidate pairs come from one bulk STRtree query, prepared region
+geometries classify each pair as contained or crossing, and only the
+crossing pairs pay for an exact intersection.
+"""
+
+#-- Packages --#
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+
+#-- Helper Functions --#
+
+def _polygonal(geoms: np.ndarray) -> np.ndarray:
+    """
+    Keep only the polygonal parts of intersection results (as gpd.overlay
+    does with keep_geom_type=True); non-polygonal results become empty.
+    """
+    out = geoms.copy()
+    mixed = np.flatnonzero(shapely.get_type_id(geoms) == 7)          # GeometryCollection
+    for i in mixed:
+        parts = shapely.get_parts(geoms[i])
+        polys = parts[np.isin(shapely.get_type_id(parts), (3, 6))]
+        out[i] = shapely.union_all(polys) if len(polys) else shapely.Polygon()
+    lower_dim = ~np.isin(shapely.get_type_id(out), (3, 6))
+    out[lower_dim] = shapely.Polygon()
+    return out
+
+
+def _valid(geoms: np.ndarray) -> np.ndarray:
+    invalid = ~shapely.is_valid(geoms)
+    if invalid.any():
+        geoms = geoms.copy()
+        geoms[invalid] = shapely.make_valid(geoms[invalid])
+    return geoms
+
+
+def candidate_pairs(fire_geoms: np.ndarray, region_geoms: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (fire index, region index) of every intersecting pair, from one bulk
+    STRtree query, sorted by fire then region.
+    """
+    tree = shapely.STRtree(region_geoms)
+    fire_idx, region_idx = tree.query(fire_geoms, predicate='intersects')
+    order = np.lexsort((region_idx, fire_idx))
+    return fire_idx[order], region_idx[order]
+
+
+def classify_pairs(fire_geoms, region_geoms, fire_idx, region_idx) -> np.ndarray:
+    """
+    True where the fire lies entirely inside the region (passes through
+    unchanged), False where it crosses the region boundary.
+    """
+    shapely.prepare(region_geoms)
+    return shapely.contains(region_geoms[region_idx], fire_geoms[fire_idx])
+
+
+def overlay_indices(fire_geoms: np.ndarray, region_geoms: np.ndarray):
+    """
+    Core of the overlay on plain geometry arrays. Returns (fire index,
+    region index, geometry) for every non-empty polygonal fragment.
+    """
+    fire_idx, region_idx = candidate_pairs(fire_geoms, region_geoms)
+    contained = classify_pairs(fire_geoms, region_geoms, fire_idx, region_idx)
+
+    geoms = fire_geoms[fire_idx].copy()
+    crossing = ~contained
+    if crossing.any():
+        geoms[crossing] = _polygonal(
+            shapely.intersection(fire_geoms[fire_idx[crossing]], region_geoms[region_idx[crossing]])
+        )
+    keep = ~shapely.is_empty(geoms)
+    return fire_idx[keep], region_idx[keep], geoms[keep]
+
+
+def _overlay_frame(fires, regions, fire_idx, region_idx, geoms) -> gpd.GeoDataFrame:
+    """
+    Attach fire and region attributes to overlay fragments (gpd.overlay layout).
+    """
+    left = fires.drop(columns=fires.geometry.name).iloc[fire_idx].reset_index(drop=True)
+    right = regions.drop(columns=regions.geometry.name).iloc[region_idx].reset_index(drop=True)
+    shared = left.columns.intersection(right.columns)
+    if len(shared):
+        left = left.rename(columns={c: f"{c}_1" for c in shared})
+        right = right.rename(columns={c: f"{c}_2" for c in shared})
+
+    return gpd.GeoDataFrame(
+        pd.concat([left, right], axis=1),
+        geometry=geoms,
+        crs=fires.crs,
+    )
+
+
+def overlay_fires_regions(fires: gpd.GeoDataFrame, regions: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Intersection overlay of fires with regions, same output schema as
+    gpd.overlay(fires, regions, how="intersection"): fire attributes,
+    region attributes, and the fire geometry cut to each region.
+    """
+    if fires.crs != regions.crs:
+        raise ValueError(f"CRS mismatch: fires {fires.crs} vs regions {regions.crs}")
+
+    fire_geoms = _valid(fires.geometry.values.to_numpy())
+    region_geoms = _valid(regions.geometry.values.to_numpy())
+    return _overlay_frame(fires, regions, *overlay_indices(fire_geoms, region_geoms))
+
+
+#-- Parallel overlay --#
+
+def partition_fires(fires: gpd.GeoDataFrame, partitions: int, by: str = 'tile') -> list[np.ndarray]:
+    """
+    Split fire row positions into partitions.
+
+    by='tile': a grid of roughly `partitions` spatial tiles, each fire
+    assigned to exactly one tile by its representative point, so a fire
+    crossing a tile edge is never processed twice.
+    by='year': consecutive chunks of fire years.
+    No fires, no partitions.
+    """
+    if by not in ('tile', 'year'):
+        raise ValueError(f"Unknown partitioning {by!r}, expected 'tile' or 'year'.")
+    if fires.empty:
+        return []
+    if by == 'year':
+        years = fires['year'].to_numpy()
+        chunks = np.array_split(np.unique(years), min(partitions, len(np.unique(years))))
+        return [np.flatnonzero(np.isin(years, chunk)) for chunk in chunks]
+
+    points = shapely.point_on_surface(fires.geometry.values.to_numpy())
+    x, y = shapely.get_x(points), shapely.get_y(points)
+    n = max(1, int(np.ceil(np.sqrt(partitions))))
+    col = np.clip(((x - x.min()) / (np.ptp(x) or 1) * n).astype(int), 0, n - 1)
+    row = np.clip(((y - y.min()) / (np.ptp(y) or 1) * n).astype(int), 0, n - 1)
+    tile = row * n + col
+    return [np.flatnonzero(tile == t) for t in np.unique(tile)]
+
+
+def _overlay_partition(payload):
+    """
+    Worker: overlay one partition passed as WKB buffers.
+    Returns (fire positions, region positions, WKB fragments).
+    """
+    fire_pos, fire_wkb, region_pos, region_wkb = payload
+    fire_idx, region_idx, geoms = overlay_indices(shapely.from_wkb(fire_wkb), shapely.from_wkb(region_wkb))
+    return fire_pos[fire_idx], region_pos[region_idx], shapely.to_wkb(geoms)
+
+
+def parallel_overlay_fires_regions(fires: gpd.GeoDataFrame, regions: gpd.GeoDataFrame,
+                                   partitions: int = 16, workers: int | None = None,
+                                   by: str = 'tile') -> gpd.GeoDataFrame:
+    """
+    overlay_fires_regions() run per partition in worker processes.
+
+    Geometries travel as WKB; only regions near each partition are sent,
+    and at most two partitions per worker are in flight at once, which
+    bounds memory. Results are combined in fire/region order, so the
+    output equals the serial overlay.
+    """
+    if fires.crs != regions.crs:
+        raise ValueError(f"CRS mismatch: fires {fires.crs} vs regions {regions.crs}")
+    if fires.empty or regions.empty:
+        return overlay_fires_regions(fires, regions)                 # Empty result, same schema
+
+    fire_geoms = _valid(fires.geometry.values.to_numpy())
+    region_geoms = _valid(regions.geometry.values.to_numpy())
+    region_tree = shapely.STRtree(region_geoms)
+
+    def payloads():
+        for fire_pos in partition_fires(fires, partitions, by=by):
+            if not len(fire_pos):
+                continue
+            bounds = shapely.total_bounds(fire_geoms[fire_pos])
+            region_pos = np.sort(region_tree.query(shapely.box(*bounds)))
+            if not len(region_pos):
+                continue
+            yield fire_pos, shapely.to_wkb(fire_geoms[fire_pos]), region_pos, shapely.to_wkb(region_geoms[region_pos])
+
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers <= 1:
+        results = [_overlay_partition(p) for p in payloads()]
+    else:
+        # Payloads are WKB buffers and index arrays, so any start method works
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for payload in payloads():
+                pending.add(pool.submit(_overlay_partition, payload))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(f.result() for f in done)
+            results.extend(f.result() for f in pending)
+
+    if results:
+        fire_idx = np.concatenate([r[0] for r in results])
+        region_idx = np.concatenate([r[1] for r in results])
+        geoms = shapely.from_wkb(np.concatenate([r[2] for r in results]))
+    else:
+        fire_idx = region_idx = np.array([], dtype=int)
+        geoms = np.array([], dtype=object)
+
+    # Each fire belongs to one partition, so pairs are unique; drop any repeats defensively
+    pairs = pd.DataFrame({'f': fire_idx, 'r': region_idx})
+    first = ~pairs.duplicated().to_numpy()
+    order = np.lexsort((region_idx[first], fire_idx[first]))
+    return _overlay_frame(
+        fires, regions,
+        fire_idx[first][order], region_idx[first][order], geoms[first][order],
+    )
@@ -0,0 +1,13 @@
+"""
+Importable pipeline stages behind the `wildfire` command (src/pipeline/cli.py).
+
+    download    NBAC yearly zips and StatsCan province boundaries
+    merge       clean and merge the NBAC years into one fires layer
+    overlay     split the fires by Avalanche Canada subregion
+    summarize   subregion x year x cause tables and choropleth
+
+Each stage module exposes its work as functions plus a main(argv); severity
+runs src/severe_burns_ee.py or src/severity_local.py. Importing this
+package imports nothing heavy: geopandas, ee, plotly and the like are only
+loaded by the stage that uses them.
+"""
@@ -0,0 +1,9 @@
+"""
+python -m src.pipeline <command> ...  (same as the `wildfire` launcher)
+"""
+
+import sys
+
+from src.pipeline.cli import main
+
+sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+The `wildfire` command: one entry point for every pipeline stage.
+
+    wildfire download  [--only nbac|provinces] ...
+    wildfire merge     [--years ...] [--stream] ...
+    wildfire overlay   [--workers N] ...
+    wildfire severity  [ee|local] ...
+    wildfire summarize [--no-choropleth] ...
+    wildfire --trace DIR <command> ...      # span tracing (src/tracing.py)
+
+Only argparse is imported here. A subcommand's module, and with it
+geopandas, ee, plotly and the like, is imported when that subcommand runs,
+so `wildfire --help` returns without touching them. Everything after the
+subcommand is handed to the stage's own main(argv), so
+`wildfire <command> --help` lists that stage's flags.
+"""
+
+#-- Packages --#
+import argparse
+import importlib
+import sys
+
+
+#-- Constants --#
+
+# Subcommand -> (module with main(argv, prog), help)
+COMMANDS = {
+    'download': ('src.pipeline.download', 'Download NBAC yearly zips, summary stats and StatsCan provinces'),
+    'merge': ('src.pipeline.merge', 'Clean and merge the NBAC years into one fires layer'),
+    'overlay': ('src.pipeline.overlay', 'Split the fires by Avalanche Canada subregion'),
+    'severity': (None, 'High-severity burn patches: ee (Earth Engine, default) or local rasters'),
+    'summarize': ('src.pipeline.summarize', 'Subregion x year x cause tables and choropleth'),
+}
+SEVERITY_BACKENDS = {
+    'ee': 'src.severe_burns_ee',
+    'local': 'src.severity_local',
+}
+
+
+#-- Helper Functions --#
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='wildfire',
+        description='Wildfire risk analysis pipeline. Run `wildfire <command> --help` for a stage\'s options.',
+    )
+    parser.add_argument('--trace', metavar='DIR', default=None,
+                        help='Write stage spans (JSON lines + Chrome trace) to DIR')
+    parser.add_argument('--profile', metavar='SPAN', action='append', default=None,
+                        help='With --trace: run this span under the sampling profiler (repeatable, * = all)')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+    for name, (_, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def resolve_command(command: str, rest: list[str]) -> tuple[str, list[str], str]:
+    """
+    (module, argv, prog) for a subcommand and its remaining arguments.
+    """
+    if command != 'severity':
+        return COMMANDS[command][0], rest, f'wildfire {command}'
+    backend = rest[0] if rest and rest[0] in SEVERITY_BACKENDS else 'ee'
+    if rest and rest[0] == backend:
+        rest = rest[1:]
+    return SEVERITY_BACKENDS[backend], rest, f'wildfire severity {backend}'
+
+
+def main(argv: list[str] | None = None) -> int:
+    args, rest = build_parser().parse_known_args(argv)
+
+    if args.trace:
+        from src.tracing import enable_tracing
+        enable_tracing(args.trace, profile=args.profile)
+
+    module, stage_argv, prog = resolve_command(args.command, rest)
+    importlib.import_module(module).main(stage_argv, prog=prog)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
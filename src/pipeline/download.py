@@ -0,0 +1,330 @@
+"""
+Download stage: NBAC yearly zips and summary stats (from the CWFIS index)
+and the StatsCan province / territory boundaries.
+
+Downloads are resumable and revalidated: see download_file().
+"""
+
+#-- Packages --#
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from email.utils import formatdate
+import argparse
+import json
+import re
+import zipfile
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.pipeline.paths import EXTERNAL_DIR, RAW_DIR, RAW_ZIPS_DIR
+
+
+#-- Constants --#
+
+BASE_URL = "https://cwfis.cfs.nrcan.gc.ca/downloads/nbac/"
+YEARS = range(2014, 2025)                       # Adjust to chosen years
+
+CHUNK_SIZE = 1024 * 1024                        # 1 MiB reads / buffered writes
+DEFAULT_WORKERS = 4                             # Concurrent downloads (1 = serial)
+
+STATSCAN_URL = (
+    "https://www12.statcan.gc.ca/census-recensement/2021/geo/sip-pis/"
+    "boundary-limites/files-fichiers/lpr_000b21a_e.zip"
+)
+STATSCAN_DIR = EXTERNAL_DIR / "stats_canada"
+PROVINCES_DIR = STATSCAN_DIR / "boundaries"
+
+
+#-- Helper functions --#
+def find_latest_zip_filename(html: str, year: int) -> str | None:
+    """
+    Find the latest NBAC_<year>_YYYYMMDD.zip in the index HTML.
+    """
+    pattern = rf"NBAC_{year}_\d{{8}}\.zip"
+    matches = re.findall(pattern, html)
+    if not matches:
+        return None
+    # If there were multiple, pick the lexicographically last (usually newest)
+    return sorted(set(matches))[-1]
+
+
+def find_latest_stats_filename(html: str) -> str | None:
+    """
+    Find the latest NBAC_summarystats_ filename.
+    """
+    pattern = r"NBAC_summarystats_\d{4}to\d{4}_\d{8}\.xlsx"
+    matches = re.findall(pattern, html)
+    if not matches:
+        return None
+    return sorted(set(matches))[-1]
+
+
+def make_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """
+    Build one pooled session shared by every download worker.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _meta_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".meta.json")
+
+
+def _read_meta(out_path: Path) -> dict:
+    meta_path = _meta_path(out_path)
+    if not meta_path.exists():
+        return {}
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _validators(response: requests.Response) -> dict:
+    return {
+        k: response.headers[h]
+        for k, h in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+        if h in response.headers
+    }
+
+
+def download_file(
+    fname: str,
+    destination: Path,
+    session: requests.Session | None = None,
+    base_url: str = BASE_URL,
+) -> str:
+    """
+    Download fname from base_url into destination.
+
+    Bytes are streamed into <fname>.part and renamed over the final file only
+    once complete, so an interrupted run never leaves a truncated zip behind.
+    A leftover .part is resumed with an HTTP Range request; an existing file is
+    revalidated with its stored ETag / Last-Modified (304 -> keep).
+    Returns one of "downloaded", "resumed" or "unchanged".
+    """
+    session = session or make_session(1)
+    url = base_url + fname
+    out_path = destination / fname
+    part_path = out_path.with_name(out_path.name + ".part")
+    meta = _read_meta(out_path)
+
+    headers = {}
+    if out_path.exists():
+        # Conditional request; fall back on file mtime for pre-existing downloads
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        headers["If-Modified-Since"] = meta.get(
+            "last_modified", formatdate(out_path.stat().st_mtime, usegmt=True)
+        )
+
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        # Only resume if the partial bytes belong to the same remote version
+        if meta.get("part_etag"):
+            headers["If-Range"] = meta["part_etag"]
+        elif meta.get("part_last_modified"):
+            headers["If-Range"] = meta["part_last_modified"]
+
+    with session.get(url, stream=True, timeout=60, headers=headers) as r:
+        if r.status_code == 304:
+            print(f"Already have {fname} (not modified), skipping.")
+            return "unchanged"
+
+        if r.status_code == 416 and offset:
+            # Range beyond the end: the .part already holds the whole file
+            part_path.replace(out_path)
+            _meta_path(out_path).write_text(json.dumps({
+                k: meta[part_k]
+                for k, part_k in (("etag", "part_etag"), ("last_modified", "part_last_modified"))
+                if meta.get(part_k)
+            }))
+            print(f"Saved to {out_path}")
+            return "resumed"
+
+        r.raise_for_status()
+
+        resuming = offset and r.status_code == 206
+        if offset and not resuming:
+            print(f"Server ignored resume for {fname}, restarting download.")
+            offset = 0
+
+        validators = _validators(r)
+        _meta_path(out_path).write_text(json.dumps({
+            **meta,
+            "part_etag": validators.get("etag"),
+            "part_last_modified": validators.get("last_modified"),
+        }))
+
+        print(f"{'Resuming' if resuming else 'Downloading'} {fname} ...")
+        expected = r.headers.get("Content-Length")
+        written = 0
+        mode = "ab" if resuming else "wb"
+        with open(part_path, mode, buffering=CHUNK_SIZE) as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    written += len(chunk)
+
+    if expected is not None and written != int(expected):
+        raise IOError(
+            f"Incomplete download for {fname}: {written} of {expected} bytes. "
+            f"Partial file kept at {part_path} for resume."
+        )
+
+    part_path.replace(out_path)                  # Atomic rename on completion
+    _meta_path(out_path).write_text(json.dumps(validators))
+    print(f"Saved to {out_path}")
+    return "resumed" if resuming else "downloaded"
+
+
+def download_all(
+    jobs: list[tuple[str, Path]],
+    workers: int = DEFAULT_WORKERS,
+    base_url: str = BASE_URL,
+    session: requests.Session | None = None,
+) -> dict[str, str]:
+    """
+    Download (fname, destination) jobs on a bounded thread pool sharing one session.
+    Failed files are reported and left as .part for the next run to resume.
+    """
+    results = {}
+    with nullcontext(session) if session else make_session(workers) as session:
+        if workers <= 1:
+            for fname, destination in jobs:
+                try:
+                    results[fname] = download_file(fname, destination, session, base_url)
+                except Exception as e:
+                    print(f"Failed {fname}: {e}")
+                    results[fname] = "failed"
+            return results
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(download_file, fname, destination, session, base_url): fname
+                for fname, destination in jobs
+            }
+            for future in as_completed(futures):
+                fname = futures[future]
+                try:
+                    results[fname] = future.result()
+                except Exception as e:
+                    print(f"Failed {fname}: {e}")
+                    results[fname] = "failed"
+    return results
+
+
+def find_nbac_jobs(html: str, years, raw_dir: Path, zips_dir: Path) -> list[tuple[str, Path]]:
+    """
+    (fname, destination) for each year's latest zip and the summary stats workbook.
+    """
+    jobs = []
+
+    # --- Yearly ZIPs ---
+    for year in years:
+        zip_name = find_latest_zip_filename(html, year)
+        if not zip_name:
+            print(f"No NBAC zip found for {year}")
+            continue
+        print(f"Found {year} file: {zip_name}")
+        jobs.append((zip_name, Path(zips_dir)))
+
+    # --- Summary stats file ---
+    stats_name = find_latest_stats_filename(html)
+    if not stats_name:
+        print("No NBAC summarystats file found")
+    else:
+        print(f"Found summary stats file: {stats_name}")
+        jobs.append((stats_name, Path(raw_dir)))
+
+    return jobs
+
+
+def download_nbac(
+    years=YEARS,
+    workers: int = DEFAULT_WORKERS,
+    base_url: str = BASE_URL,
+    raw_dir: Path = RAW_DIR,
+    zips_dir: Path = RAW_ZIPS_DIR,
+) -> dict[str, str]:
+    """
+    Latest NBAC zip for each year (into zips_dir) and the summary stats
+    workbook (into raw_dir). Raises if any download failed.
+    """
+    base_url = base_url if base_url.endswith("/") else base_url + "/"
+    Path(raw_dir).mkdir(parents=True, exist_ok=True)
+    Path(zips_dir).mkdir(parents=True, exist_ok=True)
+    print(f"Directory Download ZIP Files: {zips_dir}")
+    print(f"Directory Download Raw Files: {raw_dir}\n")
+    print(f'Source for Canadian Nationaal Burn Area Composites (NBAC): \n {base_url}')
+    print(f'Selected years: {years}\n')
+
+    with make_session(workers) as session:
+        # Grab the index page once, on the pooled session the downloads reuse
+        index = session.get(base_url, timeout=30)
+        index.raise_for_status()
+        jobs = find_nbac_jobs(index.text, years, raw_dir, zips_dir)
+
+        print('Beginning download...')
+        results = download_all(jobs, workers=workers, base_url=base_url, session=session)
+
+    failed = [fname for fname, status in results.items() if status == "failed"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} NBAC download(s) failed: {failed}. Re-run to resume.")
+
+    print("Canada National Burned Area Composite (NBAC) data acquired.")
+    return results
+
+
+def download_statscan_provinces(url: str = STATSCAN_URL, zip_dir: Path = STATSCAN_DIR,
+                                out_dir: Path = PROVINCES_DIR) -> Path:
+    '''
+    Download shapefile of Canadian provinces and territories
+    '''
+    zip_path = Path(zip_dir) / url.rsplit("/", 1)[-1]
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    if zip_path.exists():
+        print(f"Zip already exists at {zip_path}, skipping download.")
+    else:
+        print(f"Downloading StatsCan provinces from {url} ...")
+        with requests.get(url, stream=True, timeout=120) as r:
+            r.raise_for_status()
+            with open(zip_path, "wb") as f:
+                for chunk in r.iter_content(8192):
+                    if chunk:
+                        f.write(chunk)
+        print(f"Saved zip to {zip_path}")
+
+    print("Extracting shapefile...")
+    with zipfile.ZipFile(zip_path, "r") as z:
+        z.extractall(out_dir)
+    print(f"Extracted to {out_dir}")
+    return Path(out_dir)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = argparse.ArgumentParser(prog=prog, description="Download NBAC yearly zips, summary stats and StatsCan provinces.")
+    parser.add_argument("--only", choices=["nbac", "provinces"], default=None,
+                        help="Download one source only (default: both).")
+    parser.add_argument("--years", type=int, nargs="+", default=list(YEARS), help="NBAC years.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Concurrent downloads (1 = serial).")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="NBAC index URL (e.g. a local http.server for testing).")
+    args = parser.parse_args(argv)
+
+    if args.only in (None, "nbac"):
+        download_nbac(args.years, workers=args.workers, base_url=args.base_url)
+    if args.only in (None, "provinces"):
+        download_statscan_provinces()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Merge stage: read every NBAC yearly shapefile (straight from the zips),
+align their columns to a reference year, and write one cleaned fires layer
+in the working CRS (GeoParquet) plus GeoJSON / Shapefile exports.
+
+`wildfire merge --stream` (merge_nbac(stream=True)) merges one year at a
+time into a partitioned GeoParquet dataset instead, rebuilding only the
+years whose source changed.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import argparse
+import os
+
+import pandas as pd
+import geopandas as gpd
+
+from src.nbac_io import (
+    list_nbac_sources,
+    read_nbac_layers,
+    preflight_nbac_sources,
+    print_preflight_report,
+    stream_merge_nbac,
+    source_year,
+    clean_nbac_layer,
+    compact_fire_dtypes,
+    write_fires_parquet,
+)
+from src.pipeline.paths import FIRES_DIR, PROCESSED_DIR, RAW_ZIPS_DIR
+from src.projection import WORKING_CRS, to_export_crs
+from src.tracing import span
+
+
+#-- Constants --#
+
+REFERENCE_YEAR = 2024                                   # Column structure every year is aligned to
+LOAD_WORKERS = os.cpu_count()                           # Processes reading yearly layers in parallel
+STREAM_DATASET = 'Canada_fires_parquet'                 # Streamed dataset folder; fixed so a new year reuses the rest
+
+
+#-- Helper Functions --#
+
+def export_fires(fires: gpd.GeoDataFrame, out_dir: Path = FIRES_DIR) -> dict[str, Path]:
+    """
+    Canada_fires_<min>_<max> as GeoParquet (working CRS, read by default
+    downstream), GeoJSON and Shapefile (both WGS84).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Identify year range (cast to int to avoid "2014.0")
+    stem = f"Canada_fires_{int(fires['year'].min())}_{int(fires['year'].max())}"
+    paths = {
+        'parquet': out_dir / f"{stem}.parquet",
+        'geojson': out_dir / f"{stem}.geojson",
+        'shp': out_dir / f"{stem}.shp",
+    }
+
+    print(f'Exporting Canadian fires GeoParquet ({fires.crs})...')
+    try:
+        with span('merge.write_parquet') as s:
+            write_fires_parquet(fires, paths['parquet'])
+            s.count(fires)
+        print(f"GeoParquet export successful: {paths['parquet']}")
+    except Exception as e:
+        raise RuntimeError(f'Canadian fires GeoParquet failed to export: {e}')
+
+    # Reproject to WGS84 for GeoJSON / broad compatibility (export only)
+    print('Reprojecting CRS...')
+    with span('merge.to_crs', crs='EPSG:4326') as s:
+        fires_4326 = to_export_crs(fires)
+        s.count(fires_4326)
+    print(f' Reprojected CRS for GeoJSON export: {fires_4326.crs}')
+
+    print('Exporting Canadian fires GeoJSON...')
+    try:
+        with span('merge.write_geojson') as s:
+            fires_4326.to_file(paths['geojson'], driver="GeoJSON")
+            s.count(fires_4326)
+        print(f"GeoJSON export successful: {paths['geojson']}")
+    except Exception as e:
+        raise RuntimeError(f'Canadian fires GeoJSON failed to export: {e}')
+
+    print('Exporting Canadian fires Shapefile...')
+    try:
+        with span('merge.write_shp') as s:
+            fires_4326.to_file(paths['shp'], driver="ESRI Shapefile")
+            s.count(fires_4326)
+        print(f"Shapefile export successful: {paths['shp']}")
+    except Exception as e:
+        raise RuntimeError(f'Canadian fires Shapefile failed to export: {e}\n')
+    return paths
+
+
+#-- Merge --#
+
+def merge_nbac(
+    zip_dir: Path = RAW_ZIPS_DIR,
+    out_dir: Path = FIRES_DIR,
+    reference_year: int = REFERENCE_YEAR,
+    extract: bool = False,
+    workers: int | None = LOAD_WORKERS,
+    years=None,
+    bbox=None,
+    stream: bool = False,
+    stream_export_files: bool = True,
+    force: bool = False,
+) -> dict:
+    """
+    Merge the NBAC zips in zip_dir into out_dir; returns the output paths
+    (and, when streaming, the per-year rebuild status).
+
+    extract unzips to processed/shapefiles before reading; years (e.g.
+    range(2014, 2025)) and bbox (NBAC CRS) limit what is read. stream keeps
+    one year in memory at a time and also appends each year to GeoJSON /
+    SHP when stream_export_files; force rebuilds every year.
+    """
+    if extract:
+        print('Unzipping NBAC shapefiles...')
+        shapefile_dir = PROCESSED_DIR / 'shapefiles'
+        nbac_sources = list_nbac_sources(zip_dir, extract_to=shapefile_dir)
+        print(f"Target folder destination: {shapefile_dir} \n")
+    else:
+        print('Reading NBAC shapefiles directly from ZIPs (no extraction)...')
+        nbac_sources = list_nbac_sources(zip_dir)
+
+    for name in nbac_sources:
+        print(f'NBAC Wildfires Year: {name[5:9]} Shapefiles located')
+
+    source_years = sorted(y for y in map(source_year, nbac_sources) if years is None or y in years)
+    if not nbac_sources:
+        raise FileNotFoundError(f'No NBAC_<year>_*.zip found in {zip_dir}. Run `wildfire download` first.')
+    if not source_years:
+        raise ValueError(f'None of the requested years {list(years)} have an NBAC zip in {zip_dir}.')
+
+    #--- Assess each shapefile's (key) column structure ---#
+    # Metadata only: field names / types, CRS, counts and extents, no geometry decoded
+    print(f'Preflight: comparing shapefile structure to reference year {reference_year}...')
+    with span('merge.preflight', sources=len(nbac_sources)):
+        preflight = preflight_nbac_sources(nbac_sources, reference_year=reference_year, target_crs=WORKING_CRS)
+    print_preflight_report(preflight)
+    print('Irregular columns are renamed, filled and reprojected on load. \n')
+
+    #--- Streaming merge (bounded memory) ---#
+    if stream:
+        out_dir = Path(out_dir)
+        stem = f"Canada_fires_{source_years[0]}_{source_years[-1]}"
+        dataset_dir = out_dir / STREAM_DATASET
+        append_files = [
+            (out_dir / f"{stem}.geojson", "GeoJSON"),
+            (out_dir / f"{stem}.shp", "ESRI Shapefile"),
+        ] if stream_export_files else []
+
+        print(f'Streaming NBAC years into partitioned GeoParquet: {dataset_dir}')
+        with span('merge.stream', years=len(source_years)):
+            status = stream_merge_nbac(
+                nbac_sources,
+                preflight['plans'],
+                dataset_dir,
+                target_crs=WORKING_CRS,
+                bbox=bbox,
+                years=years,
+                append_files=append_files,
+                force=force,
+            )
+        rebuilt = sorted(y for y, s in status.items() if s == 'rebuilt')
+        print(f'Rebuilt years: {rebuilt if rebuilt else "none (all partitions current)"}')
+        for path, driver in append_files:
+            print(f'{driver} export: {path}')
+        return {'parquet': dataset_dir, **{driver: path for path, driver in append_files}, 'status': status}
+
+    #--- Open all Shapefiles ---#
+    print('Opening all shapefiles...')
+    with span('merge.read', workers=workers) as s:
+        layers = read_nbac_layers(
+            nbac_sources,
+            plans=preflight['plans'],                   # Reads analysis fields only
+            bbox=bbox,
+            years=years,
+            workers=workers,
+        )
+        s.set(layers=len(layers), rows=sum(len(g) for g in layers.values()))
+    print('All shapefiles opened. \n')
+
+    #--- Singular GDF ---#
+    # Layers are already reprojected once to the working CRS, on load
+    print(f'\nProducing singular GDF..')
+    with span('merge.concat') as s:
+        fires_all_years = gpd.GeoDataFrame(
+            pd.concat(list(layers.values()), ignore_index=True),
+            crs=preflight['target_crs']
+        )
+        s.count(fires_all_years)
+    print(f'All fire geometries dataframe shape: {fires_all_years.shape} \n')
+
+    with span('merge.clean') as s:
+        # Analysis columns and integer year / fireid, as in the streaming path
+        fires = clean_nbac_layer(fires_all_years)
+        print(f'Columns selected for further analysis: \n {list(fires.columns)}')
+        # Compact dtypes: categoricals + smallest-fit integers
+        fires = compact_fire_dtypes(fires.copy())
+        print(f' Compact dtypes: {dict(fires.dtypes.astype(str))}')
+        s.count(rows=len(fires))
+    print(f'\nCleaning complete. \n')
+
+    print(f'Beginning Export procedure.')
+    return export_fires(fires, out_dir)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = argparse.ArgumentParser(prog=prog, description="Clean and merge the NBAC yearly shapefiles.")
+    parser.add_argument("--zips", type=Path, default=RAW_ZIPS_DIR, help="Folder of NBAC_<year>_*.zip")
+    parser.add_argument("--out", type=Path, default=FIRES_DIR, help="Output folder")
+    parser.add_argument("--reference-year", type=int, default=REFERENCE_YEAR,
+                        help="Year whose column structure the others are aligned to")
+    parser.add_argument("--years", type=int, nargs="+", default=None, help="Years to read (default: every zip)")
+    parser.add_argument("--bbox", type=float, nargs=4, default=None, metavar=("MINX", "MINY", "MAXX", "MAXY"),
+                        help="Read window in the NBAC CRS (default: all Canada)")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS, help="Processes reading yearly layers")
+    parser.add_argument("--extract", action="store_true", help="Unzip to processed/shapefiles before reading")
+    parser.add_argument("--stream", action="store_true", help="One year in memory at a time -> partitioned GeoParquet")
+    parser.add_argument("--no-stream-exports", action="store_true", help="Streaming: skip the GeoJSON / SHP appends")
+    parser.add_argument("--force", action="store_true", help="Streaming: ignore the build manifest, rebuild all years")
+    args = parser.parse_args(argv)
+
+    merge_nbac(
+        args.zips, args.out,
+        reference_year=args.reference_year,
+        extract=args.extract,
+        workers=args.workers,
+        years=args.years,
+        bbox=tuple(args.bbox) if args.bbox else None,
+        stream=args.stream,
+        stream_export_files=not args.no_stream_exports,
+        force=args.force,
+    )
+    print('Py file complete.')
+
+
+if __name__ == "__main__":
+    main()
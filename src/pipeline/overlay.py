@@ -0,0 +1,233 @@
+"""
+Overlay stage: split the merged Canada fires across Avalanche Canada
+subregions, tag each fragment with its subregion's province / territory
+and its area, and write the fragments (GeoParquet + fragment index,
+GeoJSON, Shapefile) along with the cleaned subregions.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import argparse
+
+import geopandas as gpd
+
+from src.fragment_index import build_fragment_index
+from src.nbac_io import find_latest_output, read_fires, write_fires_parquet
+from src.overlay import overlay_fires_regions, parallel_overlay_fires_regions
+from src.pipeline.paths import AVCAN_DIR, EXTERNAL_DIR, FIRES_DIR
+from src.projection import WORKING_CRS, read_projected, to_working_crs, to_export_crs
+from src.region_lookup import load_subregion_province_lookup
+from src.tracing import span
+
+
+#-- Constants --#
+AVCAN_PATH = EXTERNAL_DIR / "avalanche_canada" / "canadian_subregions.geojson"
+PROVINCES_PATH = EXTERNAL_DIR / "stats_canada" / "boundaries" / "lpr_000b21a_e.shp"
+LOOKUP_PATH = AVCAN_DIR / "subregion_province_lookup.csv"
+
+OVERLAY_WORKERS = 1                 # >1: partitioned overlay across worker processes
+OVERLAY_PARTITIONS = 16             # Spatial tiles (or year chunks) for the parallel overlay
+OVERLAY_PARTITION_BY = 'tile'       # 'tile' | 'year'
+
+
+#-- Helper Functions --#
+
+def load_subregions(avcan_path: Path = AVCAN_PATH) -> gpd.GeoDataFrame:
+    """
+    AvCan subregions in the working CRS, with region / subregion columns.
+    """
+    print(f'Loading Avalanche Canada (AvCan) regions shapefile...')
+    with span('overlay.read_subregions') as s:
+        avcan_shapes = read_projected(avcan_path)  # Cached in the working CRS
+        s.count(avcan_shapes)
+    print(f" Avalanche Canada Regions loaded. {avcan_shapes.crs.name}\n")
+    print('AvCan column cleaning')
+    return avcan_shapes.rename(columns={
+        'polygon_name': 'subregion',
+        'reference_region': 'region',
+    })
+
+
+def load_fires(fires_path: Path | None = None, fires_dir: Path = FIRES_DIR) -> gpd.GeoDataFrame:
+    """
+    Canada fires (latest merge output by default; GeoParquet preferred,
+    Shapefile fallback) in the working CRS.
+    """
+    fires_path = fires_path or find_latest_output(fires_dir)
+    if fires_path is None:
+        raise FileNotFoundError(f"No Canada fires outputs found in {fires_dir}\n")
+
+    print(f"Loading latest Canada fires output... \n File name: {Path(fires_path).name}")
+    with span('overlay.read_fires', path=Path(fires_path).name) as s:
+        fires = to_working_crs(read_fires(fires_path))  # No-op for GeoParquet outputs
+        s.count(fires)
+    print(f" National Canada Fires loaded. {fires.crs.name}\n")
+    return fires
+
+
+def export_fragments(fire_stats: gpd.GeoDataFrame, subregions: gpd.GeoDataFrame, out_dir: Path = AVCAN_DIR) -> dict[str, Path]:
+    """
+    AvCan_fires_<min>_<max> as GeoParquet (working CRS) with its fragment
+    index, GeoJSON and Shapefile (WGS84), plus the cleaned subregions.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Identify year range (cast to int to avoid "2014.0")
+    stem = f"AvCan_fires_{int(fire_stats['year'].min())}_{int(fire_stats['year'].max())}"
+    paths = {
+        'parquet': out_dir / f"{stem}.parquet",
+        'index': out_dir / f"{stem}_index",
+        'geojson': out_dir / f"{stem}.geojson",
+        'shp': out_dir / f"{stem}.shp",
+        'subregions': out_dir / "AvCan_cleaned_subregions.geojson",
+    }
+
+    print('Exporting AvCan fires GeoParquet...')
+    try:
+        with span('overlay.write_parquet') as s:
+            write_fires_parquet(fire_stats, paths['parquet'])
+            s.count(fire_stats)
+        print(f"AvCan GeoParquet export successful: {paths['parquet']}")
+    except Exception as e:
+        raise RuntimeError(f'AvCan fires GeoParquet failed to export: {e}')
+
+    # Fragment index (R-tree + subregion / region / year / fireid keys)
+    print('Building AvCan fires fragment index...')
+    with span('overlay.fragment_index') as s:
+        build_fragment_index(fire_stats, paths['index'])
+        s.count(rows=len(fire_stats))
+    print(f"Fragment index built: {paths['index']} (query with src.fragment_index.FragmentIndex)")
+
+    # WGS84 only for the GeoJSON / Shapefile exports
+    with span('overlay.to_crs', crs='EPSG:4326') as s:
+        fire_stats_4326 = to_export_crs(fire_stats)
+        s.count(fire_stats_4326)
+
+    print('Exporting AvCan fires GeoJSON...')
+    try:
+        with span('overlay.write_geojson') as s:
+            fire_stats_4326.to_file(paths['geojson'], driver="GeoJSON")
+            s.count(fire_stats_4326)
+        print(f"AvCan GeoJSON export successful: {paths['geojson']}")
+    except Exception as e:
+        raise RuntimeError(f'AvCan fires GeoJSON failed to export: {e}')
+
+    print('Exporting AvCan fires Shapefile...')
+    try:
+        with span('overlay.write_shp') as s:
+            fire_stats_4326.to_file(paths['shp'], driver="ESRI Shapefile")
+            s.count(fire_stats_4326)
+        print(f"Shapefile export successful: {paths['shp']}")
+    except Exception as e:
+        raise RuntimeError(f'AvCan fires Shapefile failed to export: {e}\n')
+
+    print('Exporting AvCan subregions GeoJSON...')
+    try:
+        with span('overlay.write_subregions') as s:
+            to_export_crs(subregions).to_file(paths['subregions'], driver="GeoJSON")
+            s.count(subregions)
+        print(f"AvCan cleaned subregions GeoJSON export successful: {paths['subregions']}")
+    except Exception as e:
+        raise RuntimeError(f'AvCan cleaned subregions GeoJSON failed to export: {e}')
+    return paths
+
+
+#-- Overlay --#
+
+def overlay_avcan_fires(
+    fires_path: Path | None = None,
+    avcan_path: Path = AVCAN_PATH,
+    provinces_path: Path = PROVINCES_PATH,
+    lookup_path: Path = LOOKUP_PATH,
+    out_dir: Path = AVCAN_DIR,
+    workers: int = OVERLAY_WORKERS,
+    partitions: int = OVERLAY_PARTITIONS,
+    partition_by: str = OVERLAY_PARTITION_BY,
+) -> dict[str, Path]:
+    """
+    Split the fires at fires_path (default: latest merge output) by AvCan
+    subregion and export the fragments; returns the output paths.
+    """
+    subregions = load_subregions(avcan_path)
+    canada_fires = load_fires(fires_path)
+    regions = subregions[["region", "subregion", "geometry"]]
+
+    print("Classifying AvCan subregions to Canadian Province / Territory...")
+    # Persisted lookup keyed by hashes of both boundary files, rebuilt only when they change.
+    # Subregions crossing a border go to the province holding most of their area.
+    print(f' Subregion -> province lookup: {Path(lookup_path).name}')
+    with span('overlay.province_lookup'):
+        subregion_provinces = load_subregion_province_lookup(avcan_path, provinces_path, lookup_path)
+
+    regions_with_admin = regions.merge(
+        subregion_provinces[["region", "subregion", "prov_terr"]],
+        on=["region", "subregion"],
+        how="left"
+    )
+
+    print('\nOverlaying Canadian fires with respective AvCan subregions..')
+    canada_fires = canada_fires.drop(columns="prov_terr")
+    print('Splitting fires across AvCan subregions...')
+    # STRtree candidates; contained fires pass through, only border-crossing fires are cut
+    with span('overlay.overlay', workers=workers) as s:
+        s.count(canada_fires)                       # Throughput over the input fires
+        if workers > 1:
+            print(f' Parallel overlay: {partitions} {partition_by} partitions on {workers} workers')
+            fire_stats = parallel_overlay_fires_regions(
+                canada_fires,
+                regions_with_admin,
+                partitions=partitions,
+                workers=workers,
+                by=partition_by,
+            )
+        else:
+            fire_stats = overlay_fires_regions(
+                canada_fires,
+                regions_with_admin,
+            )
+        s.set(fragments=len(fire_stats))
+    print(f' Overlay complete.')
+
+    # Working CRS is equal-area and in metres, so areas need no reprojection
+    print(f'''Fires per region in projected working CRS ({WORKING_CRS}).
+    Projected CRS type: {WORKING_CRS} (metres)
+    Projected CRS name: {fire_stats.crs.name}\n
+''')
+
+    print('Calculating area burned (ha) for each AvCan subregion split fire.')
+    with span('overlay.area') as s:
+        fire_stats["subreg_ha"] = fire_stats.geometry.area / 10_000
+        s.count(rows=len(fire_stats))
+    fire_stats = fire_stats.rename(columns={'adj_ha': 'tot_adj_ha'})
+    print(f' Individual fire per region burn = fire.geometry.area / 10_000 = "subreg_ha')
+    print(f' NBAC Total Region adjusted burn = "tot_adj_ha"\n')
+    print(f'Individual Fire Statistics DF complete. \n')
+
+    print(f'Beginning Export procedure.')
+    return export_fragments(fire_stats, subregions, out_dir)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = argparse.ArgumentParser(prog=prog, description="Split the Canada fires by Avalanche Canada subregion.")
+    parser.add_argument("--fires", type=Path, default=None, help="Canada fires (default: latest merge output)")
+    parser.add_argument("--subregions", type=Path, default=AVCAN_PATH, help="AvCan subregions GeoJSON")
+    parser.add_argument("--provinces", type=Path, default=PROVINCES_PATH, help="StatsCan provinces shapefile")
+    parser.add_argument("--out", type=Path, default=AVCAN_DIR, help="Output folder")
+    parser.add_argument("--workers", type=int, default=OVERLAY_WORKERS, help=">1: partitioned overlay across processes")
+    parser.add_argument("--partitions", type=int, default=OVERLAY_PARTITIONS)
+    parser.add_argument("--partition-by", choices=["tile", "year"], default=OVERLAY_PARTITION_BY)
+    args = parser.parse_args(argv)
+
+    overlay_avcan_fires(
+        args.fires, args.subregions, args.provinces,
+        lookup_path=Path(args.out) / LOOKUP_PATH.name,
+        out_dir=args.out,
+        workers=args.workers,
+        partitions=args.partitions,
+        partition_by=args.partition_by,
+    )
+    print('\nPy file complete.')
+
+
+if __name__ == "__main__":
+    main()
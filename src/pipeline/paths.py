@@ -0,0 +1,18 @@
+"""
+Default repository locations shared by the pipeline stages.
+"""
+
+#-- Packages --#
+from pathlib import Path
+
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = REPO_ROOT / 'data'
+RAW_DIR = DATA_DIR / 'raw'
+RAW_ZIPS_DIR = RAW_DIR / 'zips'
+EXTERNAL_DIR = DATA_DIR / 'external'
+PROCESSED_DIR = DATA_DIR / 'processed'
+FIRES_DIR = PROCESSED_DIR / 'Canada_fires'
+AVCAN_DIR = PROCESSED_DIR / 'avalanche_canada'
+OUTPUTS_DIR = REPO_ROOT / 'ouputs'
@@ -0,0 +1,127 @@
+"""
+Summary stage: refresh the subregion x year x cause fire cube from the
+AvCan fire fragments, write the summary tables and, optionally, an HTML
+choropleth of fire counts per subregion (plotly is only imported for it).
+"""
+
+#-- Packages --#
+from pathlib import Path
+import argparse
+
+from src.fire_cube import INPUT_COLUMNS, refresh_cube, load_cube, cube_to_frame, summarize_cube
+from src.nbac_io import find_latest_output, read_fire_attributes
+from src.pipeline.paths import AVCAN_DIR, OUTPUTS_DIR
+from src.projection import to_export_crs
+from src.tracing import span
+
+
+#-- Constants --#
+MAKE_CHOROPLETH = True              # Write an HTML choropleth of fire counts per subregion
+
+
+#-- Helper Functions --#
+
+def write_choropleth(by_subregion, years, regions_path: Path, figure_dir: Path) -> Path:
+    """
+    HTML choropleth of n_fires per AvCan subregion.
+    """
+    import geopandas as gpd
+    import plotly.express as px
+
+    regions = to_export_crs(gpd.read_file(regions_path))
+    keys = [c for c in ('region', 'subregion') if c in regions.columns]        # Subregion names repeat across regions
+    choropleth_df = regions[keys + ['geometry']].merge(by_subregion, on=keys, how='left').fillna({'n_fires': 0})
+
+    fig = px.choropleth(
+        choropleth_df,
+        geojson=choropleth_df.__geo_interface__,
+        locations=choropleth_df.index,
+        color='n_fires',
+        hover_name='subregion',
+        hover_data={'region': True, 'subreg_ha': ':.0f', 'n_fires': True},
+        color_continuous_scale='OrRd',
+        title=f'Wildfires per Avalanche Canada subregion ({years[0]}–{years[-1]})',
+    )
+    fig.update_geos(fitbounds='locations', visible=False)
+
+    figure_path = Path(figure_dir) / f'nfires_AvCan_{years[0]}_{years[-1]}.html'
+    figure_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.write_html(figure_path)
+    return figure_path
+
+
+#-- Summaries --#
+
+def summarize_fires(avcan_dir: Path = AVCAN_DIR, outputs_dir: Path = OUTPUTS_DIR,
+                    choropleth: bool = MAKE_CHOROPLETH) -> dict[str, Path]:
+    """
+    Summary tables (and choropleth) for the latest AvCan fire fragments in
+    avcan_dir; returns the written paths by name.
+    """
+    avcan_dir, outputs_dir = Path(avcan_dir), Path(outputs_dir)
+    # AvCan fire fragments from the overlay stage
+    fires_path = find_latest_output(avcan_dir, ['AvCan_fires_*.parquet', 'AvCan_fires_*.shp'])
+    if fires_path is None:
+        raise FileNotFoundError(f"No AvCan fires outputs found in {avcan_dir}\n")
+
+    print(f"Loading AvCan fires... \n File name: {fires_path.name}")
+    with span('summarize.read_fires') as s:
+        fire_stats = read_fire_attributes(fires_path, columns=INPUT_COLUMNS)       # No geometry
+        s.count(rows=len(fire_stats))
+    print(f" AvCan fire fragments loaded: {len(fire_stats)}\n")
+
+    # Dense subregion x year x cause cube; only changed years are recomputed
+    cube_dir = avcan_dir / 'AvCan_fire_cube'
+    print('Refreshing subregion x year x cause cube...')
+    with span('summarize.cube') as s:
+        status = refresh_cube(fire_stats, cube_dir)
+        cube = load_cube(cube_dir)
+        s.count(rows=len(fire_stats))
+    rebuilt = sorted(y for y, s in status.items() if s == 'rebuilt')
+    print(f' Recomputed years: {rebuilt if rebuilt else "none (all slices current)"}')
+    print(f" Cube shape (subregion, year, cause): {cube['n_fires'].shape}\n")
+
+    #--- Summary Tables ---#
+    tables_dir = outputs_dir / 'tables'
+    tables_dir.mkdir(parents=True, exist_ok=True)
+
+    summaries = {
+        'avcan_fire_cells.csv': cube_to_frame(cube),
+        'avcan_fire_summary_by_subregion.csv': summarize_cube(cube, by='subregion'),
+        'avcan_fire_summary_by_year.csv': summarize_cube(cube, by='year'),
+        'avcan_fire_summary_by_cause.csv': summarize_cube(cube, by='cause'),
+    }
+    paths = {}
+    for name, table in summaries.items():
+        paths[name] = tables_dir / name
+        table.to_csv(paths[name], index=False)
+        print(f'Summary table written: {paths[name]}')
+
+    by_subregion = summaries['avcan_fire_summary_by_subregion.csv']
+    print('\nTop subregions by fire count:')
+    print(by_subregion.sort_values('n_fires', ascending=False).head(10).to_string(index=False))
+
+    #--- Choropleth ---#
+    if choropleth:
+        with span('summarize.choropleth'):
+            paths['choropleth'] = write_choropleth(
+                by_subregion, cube['axes']['year'],
+                avcan_dir / 'AvCan_cleaned_subregions.geojson', outputs_dir / 'figures',
+            )
+        print(f"\nChoropleth written: {paths['choropleth']}")
+    return paths
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = argparse.ArgumentParser(prog=prog, description="Summarise the AvCan fire fragments.")
+    parser.add_argument("--avcan-dir", type=Path, default=AVCAN_DIR, help="Overlay output folder")
+    parser.add_argument("--out", type=Path, default=OUTPUTS_DIR, help="Outputs folder (tables/, figures/)")
+    parser.add_argument("--no-choropleth", action="store_true", help="Skip the plotly choropleth")
+    args = parser.parse_args(argv)
+
+    summarize_fires(args.avcan_dir, args.out, choropleth=MAKE_CHOROPLETH and not args.no_choropleth)
+    print('\nPy file complete.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Canonical working CRS for the pipeline and a cache of projected inputs.
+
+Every dataset is transformed into WORKING_CRS exactly once; the projected
+geometries are cached as GeoParquet next to the source, keyed by the
+source's content hash and the target CRS. EXPORT_CRS (WGS84) is only
+produced when writing GeoJSON / Shapefile / Earth Engine outputs.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import hashlib
+import re
+
+import geopandas as gpd
+
+from src.manifest import file_sha256, source_files
+
+
+#-- Constants --#
+
+WORKING_CRS = 'ESRI:102001'                     # Canada Albers Equal Area Conic (metres, equal-area)
+EXPORT_CRS = 'EPSG:4326'                        # WGS84 for GeoJSON / web / Earth Engine
+CACHE_DIRNAME = '.projected'                    # Cache folder created beside each source
+
+
+#-- Helper Functions --#
+
+def source_key(path, crs=WORKING_CRS) -> str:
+    """
+    Key for a projected copy of path: hash of the source file (and its
+    Shapefile sidecars) plus the target CRS.
+    """
+    h = hashlib.sha256()
+    for f in source_files(path):
+        h.update(f.name.encode())
+        h.update(file_sha256(f).encode())
+    h.update(str(crs).encode())
+    return h.hexdigest()[:16]
+
+
+def _crs_slug(crs) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '', str(crs))
+
+
+def cache_path(path, crs=WORKING_CRS) -> Path:
+    """
+    Location of the cached projected copy of path.
+    """
+    path = Path(path)
+    return path.parent / CACHE_DIRNAME / f"{path.stem}.{_crs_slug(crs)}.{source_key(path, crs)}.parquet"
+
+
+def to_working_crs(gdf: gpd.GeoDataFrame, crs=WORKING_CRS) -> gpd.GeoDataFrame:
+    """
+    Reproject to the working CRS unless already there.
+    """
+    if gdf.crs is not None and gdf.crs == crs:
+        return gdf
+    return gdf.to_crs(crs)
+
+
+def to_export_crs(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    WGS84 copy for export formats.
+    """
+    return to_working_crs(gdf, EXPORT_CRS)
+
+
+def read_projected(path, crs=WORKING_CRS, columns=None, reader=gpd.read_file) -> gpd.GeoDataFrame:
+    """
+    Read path in crs, from the keyed cache when present. On a miss the
+    source is read with reader, reprojected once and the result cached.
+    """
+    cached = cache_path(path, crs)
+    if cached.exists():
+        return gpd.read_parquet(cached, columns=columns)
+
+    gdf = to_working_crs(reader(path), crs)
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    for stale in cached.parent.glob(f"{Path(path).stem}.{_crs_slug(crs)}.*.parquet"):
+        stale.unlink()                                  # Older versions of this source
+    gdf.to_parquet(cached, index=False)
+    return gdf[columns] if columns is not None else gdf
@@ -0,0 +1,74 @@
+"""
+Pixel grids shared by the local raster modules (severity_local.py,
+terrain_tiles.py).
+
+A grid is a dict (crs, transform, width, height, scale) snapped to
+multiples of scale in its CRS, so grids built at the same scale and CRS
+are pixel-aligned with each other.
+"""
+
+#-- Packages --#
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.transform import from_origin
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window
+
+from src.projection import WORKING_CRS
+from src.severity_params import VECT_SCALE
+
+
+#-- Constants --#
+
+CHUNK_SIZE = 1024                               # Default window side (pixels)
+
+
+#-- Helper Functions --#
+
+def analysis_grid(bounds, scale: float = VECT_SCALE, crs=WORKING_CRS) -> dict:
+    """
+    Pixel grid snapped to multiples of scale covering bounds (in crs).
+    """
+    xmin, ymin, xmax, ymax = bounds
+    xmin, ymin = np.floor(xmin / scale) * scale, np.floor(ymin / scale) * scale
+    xmax, ymax = np.ceil(xmax / scale) * scale, np.ceil(ymax / scale) * scale
+    return {
+        'crs': crs,
+        'transform': from_origin(xmin, ymax, scale, scale),
+        'width': max(int(round((xmax - xmin) / scale)), 1),
+        'height': max(int(round((ymax - ymin) / scale)), 1),
+        'scale': scale,
+    }
+
+
+def grid_bounds(grid: dict) -> tuple:
+    transform = grid['transform']
+    xmin, ymax = transform * (0, 0)
+    xmax, ymin = transform * (grid['width'], grid['height'])
+    return xmin, ymin, xmax, ymax
+
+
+def grid_windows(grid: dict, chunk: int = CHUNK_SIZE):
+    for row in range(0, grid['height'], chunk):
+        for col in range(0, grid['width'], chunk):
+            yield Window(col, row, min(chunk, grid['width'] - col), min(chunk, grid['height'] - row))
+
+
+def window_bounds(grid: dict, window: Window) -> tuple:
+    return rasterio.windows.bounds(window, grid['transform'])
+
+
+def bounds_overlap(a, b) -> bool:
+    return a[0] < b[2] and a[2] > b[0] and a[1] < b[3] and a[3] > b[1]
+
+
+def warp_to_grid(src, grid: dict, resampling=Resampling.nearest, nodata=None) -> WarpedVRT:
+    """
+    Virtual view of src resampled onto grid.
+    """
+    return WarpedVRT(
+        src, crs=grid['crs'], transform=grid['transform'],
+        width=grid['width'], height=grid['height'], resampling=resampling,
+        src_nodata=src.nodata if src.nodata is not None else nodata, nodata=nodata, tolerance=1e-6,
+    )
@@ -0,0 +1,101 @@
+"""
+Persisted AvCan subregion -> province / territory lookup.
+
+The lookup is rebuilt only when either boundary file changes (content
+hashes stored beside the table). Subregions crossing a provincial border
+are assigned to the province holding the largest share of their area, and
+the build runs against a simplified province layer.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import json
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from src.manifest import file_sha256, save_manifest, source_files
+from src.overlay import overlay_indices
+from src.projection import WORKING_CRS, read_projected
+
+
+#-- Constants --#
+
+LOOKUP_VERSION = 1                              # Bump when the assignment rule changes
+PROVINCE_SIMPLIFY_M = 250                       # Province simplification tolerance (m)
+AVCAN_COLUMNS = {'polygon_name': 'subregion', 'reference_region': 'region'}
+
+
+#-- Helper Functions --#
+
+def lookup_key(avcan_path, provinces_path, hash_cache: dict | None = None) -> dict:
+    """
+    Hashes of both boundary inputs plus the build settings.
+    """
+    return {
+        'version': LOOKUP_VERSION,
+        'crs': WORKING_CRS,
+        'simplify_m': PROVINCE_SIMPLIFY_M,
+        'avcan': {f.name: file_sha256(f, hash_cache) for f in source_files(avcan_path)},
+        'provinces': {f.name: file_sha256(f, hash_cache) for f in source_files(provinces_path)},
+    }
+
+
+def build_subregion_province_lookup(avcan_path, provinces_path) -> pd.DataFrame:
+    """
+    Assign every AvCan subregion to a province / territory by area-weighted
+    majority against a simplified province layer.
+
+    Columns: region, subregion, prov_terr, prov_share (fraction of the
+    subregion's area inside prov_terr), n_provinces.
+    """
+    regions = read_projected(avcan_path).rename(columns=AVCAN_COLUMNS)[['region', 'subregion', 'geometry']]
+    provinces = read_projected(provinces_path)[['PRENAME', 'geometry']]
+    province_geoms = shapely.simplify(
+        provinces.geometry.values.to_numpy(), PROVINCE_SIMPLIFY_M, preserve_topology=True
+    )
+
+    region_geoms = regions.geometry.values.to_numpy()
+    region_idx, province_idx, parts = overlay_indices(region_geoms, province_geoms)
+    pairs = pd.DataFrame({
+        'r': region_idx,
+        'prov_terr': provinces['PRENAME'].to_numpy()[province_idx],
+        'area': shapely.area(parts),
+    })
+    pairs = pairs.groupby(['r', 'prov_terr'], as_index=False)['area'].sum()
+    pairs['prov_share'] = pairs['area'] / shapely.area(region_geoms)[pairs['r']]
+    pairs['n_provinces'] = pairs.groupby('r')['r'].transform('size')
+    best = pairs.sort_values(['r', 'area'], ascending=[True, False]).drop_duplicates('r')
+
+    lookup = regions[['region', 'subregion']].reset_index(drop=True)
+    lookup = lookup.join(best.set_index('r')[['prov_terr', 'prov_share', 'n_provinces']])
+    lookup['n_provinces'] = lookup['n_provinces'].fillna(0).astype(int)
+    return lookup
+
+
+def load_subregion_province_lookup(avcan_path, provinces_path, out_path) -> pd.DataFrame:
+    """
+    Read the persisted lookup, rebuilding it first if either boundary file
+    (or the build settings) changed since it was written.
+    """
+    out_path = Path(out_path)
+    meta_path = out_path.with_suffix('.json')
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+
+    hash_cache = meta.get('hash_cache', {})
+    key = lookup_key(avcan_path, provinces_path, hash_cache)
+    if out_path.exists() and meta.get('key') == key:
+        return pd.read_csv(out_path)
+
+    print(' Boundary inputs changed: rebuilding subregion -> province lookup...')
+    lookup = build_subregion_province_lookup(avcan_path, provinces_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    lookup.to_csv(out_path, index=False)
+    save_manifest({'key': key, 'hash_cache': hash_cache}, meta_path)
+
+    split = lookup[lookup['n_provinces'] > 1]
+    if len(split):
+        print(f' {len(split)} subregion(s) cross a provincial border; assigned by majority area.')
+    return lookup
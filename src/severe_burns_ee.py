@@ -4,41 +4,113 @@ mirroring the current Earth Engine JS logic.
 
 - One export per (subregion, fireYear)
 - Uses Brandywine fires asset as in your JS code
+- Everything the run/skip decision needs is fetched in one ee.Dictionary
+  request per batch of combos; ROUND_TRIPS counts every blocking call
+- Exports run concurrently through src/export_scheduler.py, which polls,
+  retries and journals them so a rerun resumes where the last one stopped
+- Pre / post NBR composites are exported once per (footprint tile,
+  window) as assets and looked up in a CompositeCache, so the shared
+  POST_YEAR composite is not rebuilt for every fire year and neighbouring
+  subregions share the tiles they overlap
+
+Nothing touches Earth Engine at import time: `ee` is only imported on
+first use and main() authenticates and initialises, so the module can be
+driven by a stand-in `ee` client (registered as the `ee` module, or
+assigned to severe_burns_ee.ee).
 """
 
-import ee
+import argparse
+import functools
+import importlib
 import math
 import os
-import sys 
+import sys
+import threading
+from collections import Counter
 from pathlib import Path
-import geopandas as gpd
 import re
-import geemap
+
+from pyproj import CRS
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+data_dir = REPO_ROOT / 'data/'
+processed_dir = data_dir / 'processed/'
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.composite_cache import FOOTPRINT_TILE, CompositeCache, composite_key, footprint_tiles, key_id
+from src.export_scheduler import ExportScheduler
+from src.projection import WORKING_CRS, to_export_crs, to_working_crs
+from src.raster_grid import analysis_grid
+from src.severity_params import MAX_CLOUDY_PCT, fire_windows, min_patch_pixels
+from src.tracing import span, traced
+
 
 # ---------------------------------------------------------------------
-# INITIALISE EARTH ENGINE
+# LAZY EARTH ENGINE IMPORT
 # ---------------------------------------------------------------------
 
-# Confirm authentication
-ee.Authenticate(auth_mode='notebook')
-print("Authentification:" ,ee.Authenticate())
 
-# If Authentication issue, force in CLI
-    # earthengine authenticate --quiet --force
+class _LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
 
-# Initialize the Earth Engine module.
-google_project = "wildfire-canada-475322"
-ee.Initialize(project=str(google_project))
-print("Initialized:", ee.data._credentials is not None, f"with {google_project}")
-print(f"Initialized With Google Project {google_project}")
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._name] = module      # Later lookups go straight to the module
+        return getattr(module, attr)
 
 
-# Print current EE version
-print("Earth Engine Version: ",ee.__version__)
+ee = _LazyModule("ee")
 
-# Test data access
-print("Data Access:", ee.Number(1).getInfo())
-print('\n')
+
+# ---------------------------------------------------------------------
+# ROUND TRIPS
+# ---------------------------------------------------------------------
+
+# Blocking server calls made by this module, by label
+ROUND_TRIPS = Counter()
+_ROUND_TRIPS_LOCK = threading.Lock()        # Counted from the export scheduler's threads
+
+
+def count_round_trip(label):
+    with _ROUND_TRIPS_LOCK:
+        ROUND_TRIPS[label] += 1
+
+
+def get_info(obj, label):
+    """obj.getInfo(), counted as one round trip under label."""
+    count_round_trip(label)
+    return obj.getInfo()
+
+
+# ---------------------------------------------------------------------
+# INITIALISE EARTH ENGINE
+# ---------------------------------------------------------------------
+
+@traced("severity.initialize", counter=ROUND_TRIPS)
+def initialize_ee(google_project="wildfire-canada-475322"):
+    # Confirm authentication
+    ee.Authenticate(auth_mode='notebook')
+    print("Authentification:" ,ee.Authenticate())
+
+    # If Authentication issue, force in CLI
+        # earthengine authenticate --quiet --force
+
+    # Initialize the Earth Engine module.
+    ee.Initialize(project=str(google_project))
+    print("Initialized:", ee.data._credentials is not None, f"with {google_project}")
+    print(f"Initialized With Google Project {google_project}")
+
+    # Print current EE version
+    print("Earth Engine Version: ",ee.__version__)
+
+    # Test data access
+    print("Data Access:", get_info(ee.Number(1), 'init'))
+    print('\n')
 
 
 
@@ -46,25 +118,35 @@ print('\n')
 # GLOBAL DATASETS: DEM, TERRAIN, SLOPE, ASPECT
 # ---------------------------------------------------------------------
 
-dem      = ee.Image("USGS/SRTMGL1_003")
-terrain  = ee.Algorithms.Terrain(dem)
-slope    = terrain.select("slope")    # degrees
-aspect   = terrain.select("aspect")   # degrees from north
-
-# 8-way aspect classification (same as your JS)
-aspectCat = aspect.expression(
-    "(d >= 337.5 || d < 22.5) ? 0" +    # N
-    ": (d >= 22.5  && d < 67.5)  ? 1" + # NE
-    ": (d >= 67.5  && d < 112.5) ? 2" + # E
-    ": (d >= 112.5 && d < 157.5) ? 3" + # SE
-    ": (d >= 157.5 && d < 202.5) ? 4" + # S
-    ": (d >= 202.5 && d < 247.5) ? 5" + # SW
-    ": (d >= 247.5 && d < 292.5) ? 6" + # W
-    ": 7",                              # NW
-    {"d": aspect},
-).rename("aspect_cat")
-
-aspectLabels = ee.List(["N", "NE", "E", "SE", "S", "SW", "W", "NW"])
+@functools.lru_cache(maxsize=None)
+def terrain_layers():
+    """DEM, slope, aspect and 8-way aspect class (built once per client)."""
+    dem      = ee.Image("USGS/SRTMGL1_003")
+    terrain  = ee.Algorithms.Terrain(dem)
+    slope    = terrain.select("slope")    # degrees
+    aspect   = terrain.select("aspect")   # degrees from north
+
+    # 8-way aspect classification (same as your JS)
+    aspectCat = aspect.expression(
+        "(d >= 337.5 || d < 22.5) ? 0" +    # N
+        ": (d >= 22.5  && d < 67.5)  ? 1" + # NE
+        ": (d >= 67.5  && d < 112.5) ? 2" + # E
+        ": (d >= 112.5 && d < 157.5) ? 3" + # SE
+        ": (d >= 157.5 && d < 202.5) ? 4" + # S
+        ": (d >= 202.5 && d < 247.5) ? 5" + # SW
+        ": (d >= 247.5 && d < 292.5) ? 6" + # W
+        ": 7",                              # NW
+        {"d": aspect},
+    ).rename("aspect_cat")
+
+    aspectLabels = ee.List(["N", "NE", "E", "SE", "S", "SW", "W", "NW"])
+    return {
+        "dem": dem,
+        "slope": slope,
+        "aspect": aspect,
+        "aspectCat": aspectCat,
+        "aspectLabels": aspectLabels,
+    }
 
 # ---------------------------------------------------------------------
 # HELPER FUNCTIONS (same logic as in JS)
@@ -101,49 +183,80 @@ def addNBR(image):
     return image.addBands(nbr).copyProperties(image, image.propertyNames())
 
 
-def add_aspect_stats(ft):
-    """Continuous mean aspect 0–360° for a polygon."""
-    ft = ee.Feature(ft)
-    geom = ft.geometry()
-
-    aspectRad = aspect.multiply(math.pi / 180.0)
-
-    sinMean = aspectRad.sin().reduceRegion(
-        reducer=ee.Reducer.mean(),
-        geometry=geom,
-        scale=30,
-        maxPixels=1e8,
-    ).get("aspect")
+# ---------------------------------------------------------------------
+# PATCH STATISTICS: ONE STACK, ONE REDUCER, ONE reduceRegions
+# ---------------------------------------------------------------------
 
-    cosMean = aspectRad.cos().reduceRegion(
-        reducer=ee.Reducer.mean(),
-        geometry=geom,
-        scale=30,
-        maxPixels=1e8,
-    ).get("aspect")
+@functools.lru_cache(maxsize=None)
+def patch_stats_stack():
+    """
+    Elevation, slope, sin/cos aspect and aspect class as one 5-band image,
+    paired with a combined reducer whose inputs line up with the bands.
+    """
+    layers = terrain_layers()
+    aspectRad = layers["aspect"].multiply(math.pi / 180.0)
+    stack = ee.Image.cat([
+        layers["dem"].rename("elevation"),
+        layers["slope"],
+        aspectRad.sin().rename("aspect_sin"),
+        aspectRad.cos().rename("aspect_cos"),
+        layers["aspectCat"],
+    ])
+
+    # sharedInputs=False hands each reducer the next band(s) of the stack
+    reducer = (
+        ee.Reducer.minMax()
+        .combine(reducer2=ee.Reducer.mean(), sharedInputs=True)
+        .setOutputs(["elev_min_m", "elev_max_m", "elev_mean_m"])                        # elevation
+        .combine(
+            reducer2=ee.Reducer.mean()
+            .combine(reducer2=ee.Reducer.stdDev(), sharedInputs=True)
+            .setOutputs(["slp_mn_deg", "slp_std_dg"]),                                  # slope
+            sharedInputs=False,
+        )
+        .combine(reducer2=ee.Reducer.mean().setOutputs(["sin_mean"]), sharedInputs=False)      # aspect_sin
+        .combine(reducer2=ee.Reducer.mean().setOutputs(["cos_mean"]), sharedInputs=False)      # aspect_cos
+        .combine(reducer2=ee.Reducer.mode().setOutputs(["aspect_mode"]), sharedInputs=False)   # aspect_cat
+    )
+    return stack, reducer
 
-    meanRad = ee.Number(sinMean).atan2(ee.Number(cosMean))
-    meanDeg = meanRad.multiply(180.0 / math.pi).add(360).mod(360)
 
-    return ft.set({"aspect_mean_deg": meanDeg})
+def finish_patch_stats(p):
+    """Area and the derived fields from one patch's reducer outputs."""
+    p = ee.Feature(p)
+    a_m2 = p.geometry().area(maxError=10)
 
+    slopeMeanPct = (
+        ee.Number(p.get("slp_mn_deg")).multiply(math.pi / 180.0).tan().multiply(100.0)
+    )
+    elev_relief = ee.Number(p.get("elev_max_m")).subtract(ee.Number(p.get("elev_min_m")))
 
-def add_cardinal_aspect(ft):
-    """Dominant cardinal aspect (N, NE, …, NW) for a polygon."""
-    ft = ee.Feature(ft)
-    geom = ft.geometry()
+    # Continuous mean aspect 0–360° and dominant cardinal aspect (N, NE, …, NW)
+    meanRad = ee.Number(p.get("sin_mean")).atan2(ee.Number(p.get("cos_mean")))
+    meanDeg = meanRad.multiply(180.0 / math.pi).add(360).mod(360)
+    domCardinal = terrain_layers()["aspectLabels"].get(ee.Number(p.get("aspect_mode")).round())
+
+    return p.set(
+        {
+            "patch_area_m2": a_m2,
+            "patch_area_ha": a_m2.divide(1e4),
+            "elev_relief_m": elev_relief,
+            "slp_mn_pct": slopeMeanPct,
+            "aspect_mean_deg": meanDeg,
+            "aspect_cardinal": domCardinal,
+        }
+    )
 
-    mode = ee.Number(
-        aspectCat.reduceRegion(
-            reducer=ee.Reducer.mode(),
-            geometry=geom,
-            scale=30,
-            maxPixels=1e8,
-        ).get("aspect_cat")
-    ).round()
 
-    domCardinal = aspectLabels.get(mode)
-    return ft.set({"aspect_cardinal": domCardinal})
+def add_patch_stats(patches):
+    """Terrain, slope and aspect stats for a whole patch collection in one reduceRegions pass."""
+    stack, reducer = patch_stats_stack()
+    reduced = stack.reduceRegions(
+        collection=patches,
+        reducer=reducer,
+        scale=30,
+    )
+    return reduced.map(finish_patch_stats)
 
 
 # ---------------------------------------------------------------------
@@ -152,7 +265,7 @@ def add_cardinal_aspect(ft):
 
 
 def make_process_fire_fn(bigPatchMask):
-    """Return a function that processes a *single* fire using a shared bigPatchMask."""
+    """Return a function that vectorises a *single* fire's patches from a shared bigPatchMask."""
 
     def process_fire(fire):
         fire = ee.Feature(fire)
@@ -185,127 +298,277 @@ def make_process_fire_fn(bigPatchMask):
                 }
             )
 
-        patches = patches.map(add_fire_attrs)
+        return patches.map(add_fire_attrs)
 
-        # Terrain + slope stats per patch
-        def add_terrain(p):
-            p = ee.Feature(p)
-            pGeom = p.geometry()
+    return process_fire
 
-            a_m2 = pGeom.area(maxError=10)
 
-            elevStats = dem.reduceRegion(
-                reducer=ee.Reducer.minMax().combine(
-                    reducer2=ee.Reducer.mean(), sharedInputs=True
-                ),
-                geometry=pGeom,
-                scale=30,
-                maxPixels=1e6,
-            )
+# ---------------------------------------------------------------------
+# CACHED NBR COMPOSITES (one asset per footprint tile + window)
+# ---------------------------------------------------------------------
 
-            slopeStats = slope.reduceRegion(
-                reducer=ee.Reducer.mean().combine(
-                    reducer2=ee.Reducer.stdDev(), sharedInputs=True
-                ),
-                geometry=pGeom,
-                scale=30,
-                maxPixels=1e6,
-            )
 
-            slopeMean = ee.Number(slopeStats.get("slope_mean"))
-            slopeStd = ee.Number(slopeStats.get("slope_stdDev"))
-            slopeMeanPct = (
-                slopeMean.multiply(math.pi / 180.0).tan().multiply(100.0)
-            )
+def s2_collection(geom):
+    """Cloud-filtered, QA60-masked Sentinel-2 with an NBR band over geom."""
+    return (
+        ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+        .filterBounds(geom)
+        .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", MAX_CLOUDY_PCT))
+        .map(maskS2clouds)
+        .map(addNBR)
+    )
 
-            elev_min = elevStats.get("elevation_min")
-            elev_max = elevStats.get("elevation_max")
-            elev_relief = ee.Number(elev_max).subtract(ee.Number(elev_min))
 
-            return p.set(
-                {
-                    "patch_area_m2": a_m2,
-                    "patch_area_ha": a_m2.divide(1e4),
-                    "elev_min_m": elev_min,
-                    "elev_max_m": elev_max,
-                    "elev_mean_m": elevStats.get("elevation_mean"),
-                    "elev_relief_m": elev_relief,
-                    "slp_mn_deg": slopeMean,
-                    "slp_std_dg": slopeStd,
-                    "slp_mn_pct": slopeMeanPct,
-                }
-            )
+def combo_tiles(fires_gdf, combos):
+    """
+    (subName, fireYear) -> sorted (ix, iy) footprint tiles its fires touch.
+    Tiles are FOOTPRINT_TILE pixels at vectScale on the fixed-origin
+    WORKING_CRS grid used by local_composite(), computed from the local
+    fires so no round trip is needed.
+    """
+    fires = to_working_crs(fires_gdf)
+    tiles = {}
+    for subName, fireYear in combos:
+        selected = fires[(fires["subregion"] == subName) & (fires["year"] == fireYear)]
+        tiles[(subName, fireYear)] = sorted({
+            (ix, iy)
+            for geom in selected.geometry
+            for ix, iy, _ in footprint_tiles(analysis_grid(geom.bounds, vectScale, WORKING_CRS))
+        })
+    return tiles
 
-        patches = patches.map(add_terrain)
 
-        # Aspect stats
-        patches = patches.map(add_aspect_stats).map(add_cardinal_aspect)
+def nbr_composite_key(ix, iy, start, end):
+    return composite_key([ix, iy], start, end, scale=vectScale, crs=WORKING_CRS, tile=FOOTPRINT_TILE)
 
-        return patches
 
-    return process_fire
+def composite_asset_id(key):
+    return f"{composite_asset_folder}/nbr_{key_id(key)}"
+
+
+def composite_windows(tiles, fireYear):
+    """(ix, iy, start, end) of the pre and post tile composites one combo uses."""
+    windows = fire_windows(fireYear)
+    return [
+        (ix, iy, windows[f"{w}_start"], windows[f"{w}_end"])
+        for w in ("pre", "post")
+        for ix, iy in tiles
+    ]
+
+
+def median_nbr(coll, tiles, start, end, cache=None):
+    """
+    Mosaic of the cached tile composites when cache holds every one of
+    tiles, else coll's NBR median.
+    """
+    if cache is not None and tiles:
+        asset_ids = [cache.get(nbr_composite_key(ix, iy, start, end)) for ix, iy in tiles]
+        if all(asset_id is not None for asset_id in asset_ids):
+            return ee.ImageCollection([ee.Image(a) for a in asset_ids]).mosaic().select("NBR")
+    return coll.select("NBR").median()
+
+
+def start_composite_export(ix, iy, start, end):
+    """Export the median NBR composite of one footprint tile to its cache asset."""
+    size = FOOTPRINT_TILE * vectScale
+    x0, y0 = ix * size, (iy + 1) * size                      # Upper-left corner, WORKING_CRS metres
+    crs = CRS(WORKING_CRS).to_wkt()                          # EE has no ESRI:102001 code
+    region = ee.Geometry.Rectangle([x0, y0 - size, x0 + size, y0], crs, False)
+    composite = s2_collection(region).filterDate(start, end).select("NBR").median()
+    key = nbr_composite_key(ix, iy, start, end)
+    task = ee.batch.Export.image.toAsset(
+        image=composite.toFloat(),
+        description=f"NBR_{ix}_{iy}_{start}_{end}",
+        assetId=composite_asset_id(key),
+        region=region,
+        crs=crs,
+        crsTransform=[vectScale, 0, x0, 0, -vectScale, y0],     # Pixel-aligned across tiles
+        pyramidingPolicy={"NBR": "mean"},
+        maxPixels=1e10,
+    )
+    count_round_trip("task.start")
+    task.start()
+    return task
+
+
+def delete_asset(asset_id):
+    count_round_trip("asset.delete")
+    ee.data.deleteAsset(asset_id)
+
+
+def asset_bytes(asset_id):
+    count_round_trip("asset.size")
+    return int(ee.data.getAsset(asset_id).get("sizeBytes", 0))
+
+
+@traced("severity.build_composites", counter=ROUND_TRIPS)
+def build_composites(combos, tiles, cache, scheduler):
+    """
+    Export every tile composite the combos (tiles from combo_tiles()) need
+    that cache does not hold yet, each shared tile window only once, and
+    record the finished assets in cache.
+    """
+    needed = sorted({w for s, y in combos for w in composite_windows(tiles[(s, y)], y)})
+    missing = [w for w in needed if cache.get(nbr_composite_key(*w)) is None]
+    print(f"NBR composites: {len(needed) - len(missing)} of {len(needed)} cached, {len(missing)} to build")
+    for window in missing:
+        if scheduler.journal.get(window).get("state") == "completed":
+            # Built before, evicted since
+            scheduler.journal.update(window, state="evicted")
+
+    states = scheduler.run(missing)
+    for window, state in states.items():
+        if state == "completed":
+            asset_id = composite_asset_id(nbr_composite_key(*window))
+            cache.put(nbr_composite_key(*window), asset_id, asset_bytes(asset_id))
 
 
 # ---------------------------------------------------------------------
-# MAIN FUNCTION: ONE (subName, fireYear) → START EXPORT TASK
+# PER-COMBO GRAPH + BATCHED RUN/SKIP SUMMARY
 # ---------------------------------------------------------------------
 
 
-def run_subregion_year(subName, fireYear, fires_fc):
-    """Process one (subregion, fireYear) and start an export task if patches exist."""
-    print(f'\nBegin new Subregion + Year severe fire analysis.\n')
+def build_combo(subName, fireYear, fires_fc, cache=None, tiles=None):
+    """
+    Server-side objects for one (subName, fireYear); nothing is evaluated here.
+    Pre / post composites come from cache (a CompositeCache of assets) when
+    it holds every one of the combo's footprint tiles.
+    """
     fires = (
         fires_fc.filter(ee.Filter.eq("subregion", subName))
         .filter(ee.Filter.eq("year", fireYear))
     )
 
-    n_fires = fires.size().getInfo()
-    if n_fires == 0:
-        print(f"[{subName} {fireYear}] No fires – skipping.")
-        return
-
-    print(f"[{subName} {fireYear}] Number of Fires:", n_fires)
-
     # Geometry to bound the Sentinel-2 search
     allGeom = fires.geometry()
-    
-    # Pre/post windows tied to the fire year (same as JS)
-    preStart = ee.Date.fromYMD(fireYear - 1, 1, 1)
-    preEnd = ee.Date.fromYMD(fireYear - 1, 12, 31)
-    postStart = ee.Date.fromYMD(2025, 1, 1)
-    postEnd = ee.Date.fromYMD(2025, 12, 31)
 
-    # Format on the EE side, then pull to Python
-    preStart_str  = preStart.format('YYYY-MM-dd').getInfo()
-    preEnd_str    = preEnd.format('YYYY-MM-dd').getInfo()
-    postStart_str = postStart.format('YYYY-MM-dd').getInfo()
-    postEnd_str   = postEnd.format('YYYY-MM-dd').getInfo()
+    # Pre/post windows tied to the fire year (same as JS), computed locally
+    windows = fire_windows(fireYear)
+
+    # Sentinel-2 collection
+    s2 = s2_collection(allGeom)
 
-    print(f" Pre-fire window timeframe:  {preStart_str}  –  {preEnd_str}")
-    print(f" Post-fire window timeframe: {postStart_str} –  {postEnd_str}")
+    preColl = s2.filterDate(windows["pre_start"], windows["pre_end"])
+    postColl = s2.filterDate(windows["post_start"], windows["post_end"])
 
+    pre = median_nbr(preColl, tiles, windows["pre_start"], windows["pre_end"], cache)
+    post = median_nbr(postColl, tiles, windows["post_start"], windows["post_end"], cache)
+    dNBR = pre.subtract(post).rename("dNBR")
 
-    # Sentinel-2 collection
-    print(f' Creating Sentinel-2 Composite')
-    s2 = (
-        ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-        .filterBounds(allGeom)
-        .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 40))
-        .map(maskS2clouds)
-        .map(addNBR)
+    # High-severity mask & connected components
+    highMask = dNBR.gte(highThr)
+
+    # for each pixel in a high-severity patch, this holds the *size of that patch in pixels* (0 where not highMask)
+    patchPix = highMask.connectedPixelCount(
+        maxSize=1024,
+        eightConnected=True,
     )
-    print('  Apply QA60 Cloud Masking. \n  Apply Normaliztion Burn Ratio Index')
 
+    # keep only pixels that are BOTH:
+        #   - high severity (highMask == 1)
+        #   - belong to a connected patch whose size >= minPatchPixels
+    bigPatchMask = highMask.updateMask(patchPix.gte(min_patch_pixels(minPatchHa, vectScale)))
+
+    # Per-fire vectorising (returns collection of collections), flattened to one FeatureCollection
+    process_fire = make_process_fire_fn(bigPatchMask)
+    skiablePatches = ee.FeatureCollection(fires.map(process_fire)).flatten()
+
+    # Terrain + aspect stats for every patch in a single reduction
+    skiablePatchesWithAspect = add_patch_stats(skiablePatches)
+
+    return {
+        "windows": windows,
+        "fires": fires,
+        "s2": s2,
+        "preColl": preColl,
+        "postColl": postColl,
+        "patches": skiablePatchesWithAspect,
+    }
+
+
+def combo_summary(combo, count_patches=True):
+    """ee.Dictionary of every number the run/skip decision and log lines need."""
+    n_fires = combo["fires"].size()
+    pre_count = combo["preColl"].size()
+    post_count = combo["postColl"].size()
+    summary = {
+        "n_fires": n_fires,
+        "s2_count": combo["s2"].size(),
+        "pre_count": pre_count,
+        "post_count": post_count,
+    }
+    if count_patches:
+        # Patches are only counted (computed) when the combo would otherwise run
+        ready = n_fires.gt(0).And(pre_count.gt(0)).And(post_count.gt(0))
+        summary["n_patches"] = ee.Algorithms.If(ready, combo["patches"].size(), 0)
+    return ee.Dictionary(summary)
+
+
+def combo_key(subName, fireYear):
+    return f"{subName}|{fireYear}"
+
+
+@traced("severity.summaries", counter=ROUND_TRIPS)
+def fetch_combo_summaries(combos, fires_fc, batch_size=None, count_patches=True, cache=None, tiles=None):
+    """
+    Run/skip summaries for many (subName, fireYear) combos, batch_size
+    combos per getInfo round trip (all in one when batch_size is None).
+    tiles maps each combo to its footprint tiles (see combo_tiles()).
+    """
+    tiles = tiles or {}
+    batch_size = batch_size or max(len(combos), 1)
+    summaries = {}
+    for start in range(0, len(combos), batch_size):
+        batch = combos[start:start + batch_size]
+        request = ee.Dictionary({
+            combo_key(s, y): combo_summary(build_combo(s, y, fires_fc, cache, tiles.get((s, y))), count_patches)
+            for s, y in batch
+        })
+        result = get_info(request, "summary")
+        summaries.update({(s, y): result[combo_key(s, y)] for s, y in batch})
+    return summaries
+
+
+# ---------------------------------------------------------------------
+# MAIN FUNCTION: ONE (subName, fireYear) → START EXPORT TASK
+# ---------------------------------------------------------------------
+
+
+@traced("severity.submit_combo")                 # Runs in scheduler threads: counter deltas would mix combos
+def run_subregion_year(subName, fireYear, fires_fc, summary=None, cache=None, tiles=None):
+    """
+    Process one (subName, fireYear) and start an export task if patches exist.
+
+    summary is this combo's entry from fetch_combo_summaries(); without it
+    the summary is fetched here in a single round trip. The pre / post
+    composites of the combo's footprint tiles are looked up in cache
+    before being computed. Returns the
+    started task, or None when the combo is skipped.
+    """
+    print(f'\nBegin new Subregion + Year severe fire analysis.\n')
+    combo = build_combo(subName, fireYear, fires_fc, cache, tiles)
+    if summary is None:
+        summary = get_info(combo_summary(combo), "summary")
+
+    n_fires = summary["n_fires"]
+    if n_fires == 0:
+        print(f"[{subName} {fireYear}] No fires – skipping.")
+        return None
+
+    print(f"[{subName} {fireYear}] Number of Fires:", n_fires)
+
+    windows = combo["windows"]
+    print(f" Pre-fire window timeframe:  {windows['pre_start']}  –  {windows['pre_end']}")
+    print(f" Post-fire window timeframe: {windows['post_start']} –  {windows['post_end']}")
+
+    print(f' Creating Sentinel-2 Composite')
+    print('  Apply QA60 Cloud Masking. \n  Apply Normaliztion Burn Ratio Index')
     print(
-        f" Sentinel-2 images after cloud filter: {s2.size().getInfo()} \n"
+        f" Sentinel-2 images after cloud filter: {summary['s2_count']} \n"
         f"  (Pre + Post fire windows built server-side)"
     )
 
-    preColl = s2.filterDate(preStart, preEnd)
-    postColl = s2.filterDate(postStart, postEnd)
-
-    pre_count  = preColl.size().getInfo()
-    post_count = postColl.size().getInfo()
+    pre_count, post_count = summary["pre_count"], summary["post_count"]
     print(f"  Pre-window images: {pre_count}, Post-window images: {post_count}")
 
     if pre_count == 0 or post_count == 0:
@@ -314,64 +577,29 @@ def run_subregion_year(subName, fireYear, fires_fc):
             f"   Pre/Post windows have no images "
             f"   (pre={pre_count}, post={post_count}).\n"
         )
-        return
+        return None
 
-
-
-    pre = preColl.select("NBR").median()
-    post = postColl.select("NBR").median()
-    dNBR = pre.subtract(post).rename("dNBR")
-
-    # High-severity mask & connected components
-    highMask = dNBR.gte(highThr)                
+    minPatchPixels = min_patch_pixels(minPatchHa, vectScale)
     print(f' Mask dNBR for high threshold burn scars. \n  Burn Severity dNBR threshold = {highThr}')
-
-    # boolean image: 1 where dNBR >= highThr, 0 elsewhere
-    patchPix = highMask.connectedPixelCount(                
-        maxSize=1024,           
-        eightConnected=True,
-    )
-
-    # for each pixel in a high-severity patch, this holds the *size of that patch in pixels* (0 where not highMask) 
-    pixelArea_m2 = vectScale * vectScale
-    minPatchPixels = (
-        ee.Number(minPatchHa).multiply(1e4).divide(pixelArea_m2)
-    )
-
-    print(
-        f" Min patch pixels at {vectScale} m: "
-        f" {minPatchPixels.getInfo():.1f}"
-    )
-
+    print(f" Min patch pixels at {vectScale} m: {minPatchPixels:.1f}")
     print(
     f" Building bigPatchMask: high-severity patches \n"
     f"   (dNBR ≥ {highThr}) with area ≥ {minPatchHa} ha \n"
-    f"   ({minPatchPixels.getInfo():.1f} pixels at {vectScale} m)"
+    f"   ({minPatchPixels:.1f} pixels at {vectScale} m)"
     )
-    # keep only pixels that are BOTH:
-        #   - high severity (highMask == 1)
-        #   - belong to a connected patch whose size >= minPatchPixels
-    bigPatchMask = highMask.updateMask(patchPix.gte(minPatchPixels))
-
-    # Per-fire processing (returns collection of collections)
-    process_fire = make_process_fire_fn(bigPatchMask)
-    perFirePatches = fires.map(process_fire)
-
-    # Flatten to one FeatureCollection
-    skiablePatchesWithAspect = ee.FeatureCollection(perFirePatches).flatten()
 
-    n_patches = skiablePatchesWithAspect.size().getInfo()
-    print(f"  Total skiable patches: {n_patches}")
-
-    if n_patches == 0:
-        print(
-            f"  No big severe patches for {subName} in {fireYear} – "
-            "no export started."
-        )
-        return
+    n_patches = summary.get("n_patches")
+    if n_patches is not None:
+        print(f"  Total skiable patches: {n_patches}")
+        if n_patches == 0:
+            print(
+                f"  No big severe patches for {subName} in {fireYear} – "
+                "no export started."
+            )
+            return None
 
     # Keep only the fields you care about (same as your JS select)
-    exportPatches = skiablePatchesWithAspect.select(
+    exportPatches = combo["patches"].select(
         [
             "patch_id",
             "gid",
@@ -401,21 +629,15 @@ def run_subregion_year(subName, fireYear, fires_fc):
         folder=output_folder,   # a folder in Google Drive
         fileFormat="SHP",
     )
+    count_round_trip("task.start")
     task.start()
+    return task
 
 
 # ---------------------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------------------
 
-#-- Directories --#
-REPO_ROOT = Path(__file__).resolve().parent.parent
-data_dir = REPO_ROOT / 'data/'
-processed_dir = data_dir / 'processed/'
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
-
-
 subregion_list = ["Brandywine"]          # extend later if you like
 year_list = list(range(2018, 2025))      # 2018–2024 inclusive
 
@@ -423,45 +645,116 @@ highThr   = 0.66     # dNBR threshold for “high severity”
 vectScale = 30       # vectorisation scale (m)
 minPatchHa = 6       # minimum patch area in hectares
 output_folder = "AvCanSevereBurns"
+summary_batch_size = 10     # combos evaluated per getInfo request
+max_concurrent_exports = 4  # export tasks in flight at once
+
+# Export state per combo; reruns resume unfinished / failed combos only
+journal_path = REPO_ROOT / "data/processed/avalanche_canada/severe_burns_export_journal.json"
+
+# Cached NBR composite assets (LRU under a size budget)
+composite_asset_folder = "projects/wildfire-canada-475322/assets/nbr_composites"
+composite_cache_path = REPO_ROOT / "data/processed/avalanche_canada/nbr_composite_cache.json"
+composite_journal_path = REPO_ROOT / "data/processed/avalanche_canada/nbr_composite_export_journal.json"
+composite_cache_mb = 20_000
 
-# Avalanche Canada fires 
+# Avalanche Canada fires
 fires_dir = REPO_ROOT / "data/processed/avalanche_canada"
-shp_files = list(fires_dir.glob("*.shp"))
+AVCAN_FIRES_ASSEST_ID = "projects/wildfire-canada-475322/assets/AvCan_fire_2014_2024"
+
+
+@traced("severity.load_fires", counter=ROUND_TRIPS)
+def load_avcan_fires():
+    """
+    Report the local AvCan fires export; returns the matching EE asset and
+    the local fires (for footprint tiles).
+    """
+    shp_files = list(fires_dir.glob("*.shp"))
 
-if not shp_files:
-    raise FileNotFoundError(f"No shapefiles found in {fires_dir}\n")
+    if not shp_files:
+        raise FileNotFoundError(f"No shapefiles found in {fires_dir}\n")
 
-fires_path = max(shp_files, key=extract_max_year)
+    fires_path = max(shp_files, key=extract_max_year)
 
-print(f"Loading AvCan fires shapefile... \n File name: {fires_path.name}")
-AVCAN_FIRES = gpd.read_file(fires_path)
-print(f" Avalanche Canada Fires loaded. {AVCAN_FIRES.crs}\n")
+    import geopandas as gpd
 
-print(f'Compute AvCan Fires into Geographical CRS')
-# Ensure WGS84 (lat/lon) for EE
-AVCAN_FIRES_wgs = AVCAN_FIRES.to_crs(epsg=4326)
-print(f'Avalanche Canada Fires transformed: {AVCAN_FIRES_wgs.crs}\n')
+    print(f"Loading AvCan fires shapefile... \n File name: {fires_path.name}")
+    AVCAN_FIRES = gpd.read_file(fires_path)
+    print(f" Avalanche Canada Fires loaded. {AVCAN_FIRES.crs}\n")
 
-# --- GeoPandas -> Earth Engine FeatureCollection ---
-print(f'Load AvCan Fires into Google Earth Engine as Feature Collection. \n Loading...')
-AVCAN_FIRES_ASSEST_ID = "projects/wildfire-canada-475322/assets/AvCan_fire_2014_2024"
-AvCan = ee.FeatureCollection(AVCAN_FIRES_ASSEST_ID)
-print("EE FeatureCollection size:", AvCan.size().getInfo())
+    print(f'Compute AvCan Fires into Geographical CRS')
+    # Ensure WGS84 (lat/lon) for EE; AvCan exports are already WGS84, so normally a no-op
+    AVCAN_FIRES_wgs = to_export_crs(AVCAN_FIRES)
+    print(f'Avalanche Canada Fires transformed: {AVCAN_FIRES_wgs.crs}\n')
+
+    # --- GeoPandas -> Earth Engine FeatureCollection ---
+    print(f'Load AvCan Fires into Google Earth Engine as Feature Collection. \n Loading...')
+    AvCan = ee.FeatureCollection(AVCAN_FIRES_ASSEST_ID)
+    print("EE FeatureCollection size:", get_info(AvCan.size(), "asset size"))
+    return AvCan, AVCAN_FIRES
 
 # ---------------------------------------------------------------------
 # ENTRY POINT
 # ---------------------------------------------------------------------
 
 
-def main():
-    # Use the global AvCan we created above
-    for subName in subregion_list:
-        for fireYear in year_list:
-            try:
-                run_subregion_year(subName, fireYear, AvCan)
-            except Exception as e:
-                # Keep going even if one combo fails
-                print(f"[{subName} {fireYear}] ERROR:", e)
+def task_status(task):
+    """task.status(), counted as one round trip."""
+    count_round_trip("task.status")
+    return task.status()
+
+
+def attach_task(task_id):
+    """Handle on an export task started by an earlier run."""
+    return ee.batch.Task(task_id, "EXPORT_FEATURES", "UNKNOWN")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Export high-severity burn patches from Earth Engine.")
+    parser.add_argument("--subregion", action="append", default=None, help="AvCan subregion (repeatable)")
+    parser.add_argument("--years", type=int, nargs="+", default=year_list)
+    parser.add_argument("--project", default="wildfire-canada-475322", help="Google Cloud project for EE")
+    args = parser.parse_args(argv)
+
+    initialize_ee(args.project)
+    AvCan, avcan_fires = load_avcan_fires()
+
+    combos = [(subName, fireYear) for subName in args.subregion or subregion_list for fireYear in args.years]
+    tiles = combo_tiles(avcan_fires, combos)
+    cache = CompositeCache(composite_cache_path, composite_cache_mb, remove=delete_asset)
+    scheduler = ExportScheduler(
+        submit=lambda combo: run_subregion_year(*combo, AvCan, summaries.get(combo), cache, tiles[combo]),
+        journal_path=journal_path,
+        max_concurrent=max_concurrent_exports,
+        attach=attach_task,
+        status=task_status,
+    )
+
+    # Summaries only for combos the journal has not finished
+    pending = scheduler.journal.pending(combos)
+
+    # Shared composites first, so every pending combo reads them from cache
+    composite_scheduler = ExportScheduler(
+        submit=lambda window: start_composite_export(*window),
+        journal_path=composite_journal_path,
+        max_concurrent=max_concurrent_exports,
+        attach=attach_task,
+        status=task_status,
+    )
+    build_composites(pending, tiles, cache, composite_scheduler)
+
+    try:
+        summaries = fetch_combo_summaries(pending, AvCan, summary_batch_size, cache=cache, tiles=tiles)
+    except Exception as e:
+        # Fall back to one summary request per combo
+        print("Batched summary request failed:", e)
+        summaries = {}
+
+    with span("severity.exports", counter=ROUND_TRIPS, combos=len(combos)):
+        states = scheduler.run(combos)
+    for (subName, fireYear), state in states.items():
+        print(f"[{subName} {fireYear}] {state}")
+
+    print(f"\nEarth Engine round trips: {sum(ROUND_TRIPS.values())} {dict(ROUND_TRIPS)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,296 @@
+"""
+Local (offline) engine for the high-severity burn patch workflow in
+severe_burns_ee.py.
+
+Reproduces run_subregion_year on local Sentinel-2 GeoTIFF / COG scenes and
+a local DEM with windowed, chunked NumPy processing:
+- QA60 cloud + cirrus bit masking and NBR per scene, streamed into
+  out-of-core median pre / post composites (src/nbr_composite.py),
+  dNBR = pre - post
+- dNBR >= HIGH_THR, kept only in 8-connected patches of >= MIN_PATCH_HA
+  (connectedPixelCount capped at MAX_PATCH_PIXELS, as in Earth Engine)
+- patches clipped to each fire, labelled once and reduced with
+  vectorised zonal statistics (src/patch_stats.py)
+
+The patches carry the same attribute schema as the Earth Engine exports
+(PATCH_COLUMNS), so both can be cross-checked. All rasters are resampled
+onto one VECT_SCALE grid in WORKING_CRS covering the subregion's fires,
+padded (patch_bounds) so patches crossing the fires' extent are sized as
+in Earth Engine, which counts them on the unclipped image.
+
+Scenes are GeoTIFFs holding B8, B12 and QA60 (matched by band description,
+else taken as bands 1-3) with the acquisition date (YYYYMMDD) in the file
+name; a CLOUDY_PIXEL_PERCENTAGE tag is used when present.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import argparse
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import rasterio
+from rasterio.features import rasterize
+from rasterio.warp import transform_bounds
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+processed_dir = REPO_ROOT / 'data' / 'processed'
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+#--- Local ---#
+from src.composite_cache import CACHE_BUDGET_MB, CompositeCache, local_cache, local_composite
+from src.nbac_io import find_latest_output, read_fires
+from src.nbr_composite import MEMORY_MB
+from src.patch_stats import drop_small_components, label_zones, patch_geometries, patch_zonal_stats
+from src.projection import WORKING_CRS, to_export_crs, to_working_crs
+from src.raster_grid import analysis_grid, bounds_overlap
+from src.severity_params import (
+    ASPECT_LABELS, CIRRUS_BIT, CLOUD_BIT, FIRE_ATTRS, HIGH_THR, MAX_CLOUDY_PCT, MAX_PATCH_PIXELS,
+    MIN_PATCH_HA, PATCH_COLUMNS, VECT_SCALE, fire_windows, min_patch_pixels,
+)
+from src.terrain_tiles import TerrainTiles, terrain_layers
+
+
+#-- Constants --#
+
+S2_BANDS = ('B8', 'B12', 'QA60')
+
+
+#-- Helper Functions --#
+
+#--- Sentinel-2 scenes ---#
+
+def scene_date(path) -> str | None:
+    match = re.search(r'(20\d{2})(\d{2})(\d{2})', Path(path).stem)
+    return f"{match[1]}-{match[2]}-{match[3]}" if match else None
+
+
+def _band_indexes(src) -> dict:
+    names = [str(d).upper() if d else None for d in src.descriptions]
+    if all(b in names for b in S2_BANDS):
+        return {b: names.index(b) + 1 for b in S2_BANDS}
+    return {b: i + 1 for i, b in enumerate(S2_BANDS)}
+
+
+def _cloudy_pct(src, qa_band: int) -> float:
+    tag = src.tags().get('CLOUDY_PIXEL_PERCENTAGE')
+    if tag is not None:
+        return float(tag)
+    # No scene metadata: estimate from a decimated read of QA60
+    step = max(1, max(src.width, src.height) // 512)
+    qa = src.read(qa_band, out_shape=(max(src.height // step, 1), max(src.width // step, 1)))
+    return float(np.mean((qa & (CLOUD_BIT | CIRRUS_BIT)) != 0) * 100)
+
+
+def list_s2_scenes(scenes_dir, crs=WORKING_CRS) -> list[dict]:
+    """
+    Scene records (path, date, bands, cloudy_pct, bounds in crs) for every
+    dated GeoTIFF under scenes_dir.
+    """
+    scenes = []
+    for path in sorted(Path(scenes_dir).rglob('*.tif')):
+        acquired = scene_date(path)
+        if acquired is None:
+            continue
+        with rasterio.open(path) as src:
+            bands = _band_indexes(src)
+            scenes.append({
+                'path': path,
+                'date': acquired,
+                'bands': bands,
+                'cloudy_pct': _cloudy_pct(src, bands['QA60']),
+                'bounds': transform_bounds(src.crs, crs, *src.bounds),
+            })
+    return scenes
+
+
+def filter_scenes(scenes, bounds, start: str, end: str, max_cloudy_pct: float = MAX_CLOUDY_PCT) -> list[dict]:
+    """
+    filterBounds + CLOUDY_PIXEL_PERCENTAGE + filterDate (end exclusive).
+    """
+    return [
+        s for s in scenes
+        if bounds_overlap(s['bounds'], bounds) and s['cloudy_pct'] < max_cloudy_pct and start <= s['date'] < end
+    ]
+
+
+def dnbr_grid(pre_scenes, post_scenes, grid: dict, windows: dict, cache: CompositeCache | None = None,
+              memory_mb: float = MEMORY_MB, workers: int | None = None) -> np.ndarray:
+    """
+    dNBR (pre median - post median) over grid from two streamed composites,
+    served from cache (a local_cache) when it holds them.
+    """
+    pre = local_composite(pre_scenes, grid, windows['pre_start'], windows['pre_end'], cache, memory_mb=memory_mb, workers=workers)
+    post = local_composite(post_scenes, grid, windows['post_start'], windows['post_end'], cache, memory_mb=memory_mb, workers=workers)
+    return pre - post
+
+
+#--- Patches ---#
+
+def big_patch_mask(dnbr: np.ndarray, high_thr: float = HIGH_THR, min_pixels: float = None) -> np.ndarray:
+    """
+    High-severity pixels (dNBR >= high_thr) in 8-connected patches of at
+    least min_pixels pixels; patch sizes are capped at MAX_PATCH_PIXELS
+    like connectedPixelCount.
+    """
+    min_pixels = min_patch_pixels() if min_pixels is None else min_pixels
+    with np.errstate(invalid='ignore'):
+        high = dnbr >= high_thr
+    return drop_small_components(high, min_pixels, MAX_PATCH_PIXELS)
+
+
+def patch_bounds(bounds, min_pixels: float, scale: float = VECT_SCALE) -> tuple:
+    """
+    bounds padded so every patch touching them is counted as far as Earth
+    Engine's connectedPixelCount needs for the min_pixels test. A patch
+    with at least min_pixels pixels has min_pixels of them within
+    ceil(min_pixels) pixels of any of its pixels, so that pad (never more
+    than MAX_PATCH_PIXELS) keeps the same patches as the unclipped image.
+    """
+    pad = min(int(np.ceil(min_pixels)), MAX_PATCH_PIXELS) * scale
+    xmin, ymin, xmax, ymax = bounds
+    return xmin - pad, ymin - pad, xmax + pad, ymax + pad
+
+
+def fire_zones(fires: gpd.GeoDataFrame, grid: dict) -> np.ndarray:
+    """
+    Raster of 1-based fire positions (0 outside every fire). Where fires
+    overlap, the later fire takes the pixel.
+    """
+    return rasterize(
+        ((geom, i + 1) for i, geom in enumerate(fires.geometry)),
+        out_shape=(grid['height'], grid['width']), transform=grid['transform'], fill=0, dtype=np.int32,
+    )
+
+
+def grid_patches(fires: gpd.GeoDataFrame, big_mask: np.ndarray, grid: dict, terrain: dict) -> pd.DataFrame:
+    """
+    Big high-severity patches clipped to each fire, labelled once over the
+    whole grid, with fire attributes and terrain stats. patch_id numbers
+    the patches within each fire.
+    """
+    zones = fire_zones(fires, grid)
+    zones[~big_mask] = 0
+    labels, n, label_zone = label_zones(zones)
+    if n == 0:
+        return pd.DataFrame(columns=PATCH_COLUMNS + ['geometry'])
+
+    stats = patch_zonal_stats(labels, n, terrain, ASPECT_LABELS)
+    attrs = fires[FIRE_ATTRS].iloc[label_zone - 1].reset_index(drop=True)
+    patches = pd.concat([attrs, stats], axis=1)
+    patches['patch_area_m2'] = patches.pop('n_pixels') * float(grid['scale'] ** 2)
+    patches['patch_area_ha'] = patches['patch_area_m2'] / 1e4
+    patches['geometry'] = patch_geometries(labels, n, grid['transform'])
+    patches.insert(0, 'patch_id', pd.Series(label_zone).groupby(label_zone).cumcount().to_numpy() + 1)
+    return patches.iloc[np.argsort(label_zone, kind='stable')].reset_index(drop=True)
+
+
+#-- Main --#
+
+def run_subregion_year_local(sub_name, fire_year, fires, scenes, dem_path, out_dir=None,
+                             high_thr=HIGH_THR, scale=VECT_SCALE, min_patch_ha=MIN_PATCH_HA, terrain_tiles=None,
+                             memory_mb=MEMORY_MB, workers=None, composite_cache=None):
+    """
+    Local equivalent of severe_burns_ee.run_subregion_year. Returns the
+    patches (EXPORT_CRS, PATCH_COLUMNS) and writes them to out_dir when given,
+    or None when the combo is skipped.
+
+    terrain_tiles (a TerrainTiles) serves the terrain layers when it covers
+    the grid; otherwise they are derived from dem_path. memory_mb caps the
+    compositing buffers, shared by workers threads. composite_cache (a
+    local_cache) is checked for the pre / post composites before they are
+    built.
+    """
+    print(f'\nBegin new Subregion + Year severe fire analysis (local).\n')
+    fires = to_working_crs(fires)
+    fires = fires[(fires['subregion'] == sub_name) & (fires['year'] == fire_year)]
+    if fires.empty:
+        print(f"[{sub_name} {fire_year}] No fires – skipping.")
+        return None
+    print(f"[{sub_name} {fire_year}] Number of Fires:", len(fires))
+
+    windows = fire_windows(fire_year)
+    print(f" Pre-fire window timeframe:  {windows['pre_start']}  –  {windows['pre_end']}")
+    print(f" Post-fire window timeframe: {windows['post_start']} –  {windows['post_end']}")
+
+    bounds = tuple(fires.total_bounds)
+    pre_scenes = filter_scenes(scenes, bounds, windows['pre_start'], windows['pre_end'])
+    post_scenes = filter_scenes(scenes, bounds, windows['post_start'], windows['post_end'])
+    print(f"  Pre-window images: {len(pre_scenes)}, Post-window images: {len(post_scenes)}")
+    if not pre_scenes or not post_scenes:
+        print(f"  [SKIP] {sub_name} {fire_year}: Pre/Post windows have no images.\n")
+        return None
+
+    min_pixels = min_patch_pixels(min_patch_ha, scale)
+    grid = analysis_grid(patch_bounds(bounds, min_pixels, scale), scale)
+    print(f" Compositing dNBR on a {grid['width']} x {grid['height']} grid at {scale} m")
+    dnbr = dnbr_grid(pre_scenes, post_scenes, grid, windows, composite_cache, memory_mb, workers)
+
+    print(f" Building bigPatchMask: dNBR ≥ {high_thr}, area ≥ {min_patch_ha} ha ({min_pixels:.1f} pixels at {scale} m)")
+    big_mask = big_patch_mask(dnbr, high_thr, min_pixels)
+
+    if terrain_tiles is not None and terrain_tiles.covers(grid):
+        terrain = terrain_tiles.window(grid)
+    else:
+        terrain = terrain_layers(dem_path, grid)
+    patches = grid_patches(fires, big_mask, grid, terrain)
+    print(f"  Total skiable patches: {len(patches)}")
+    if patches.empty:
+        print(f"  No big severe patches for {sub_name} in {fire_year}.")
+        return None
+
+    patches = gpd.GeoDataFrame(patches, geometry='geometry', crs=grid['crs'])
+    patches = to_export_crs(patches[PATCH_COLUMNS + ['geometry']])
+    if out_dir is not None:
+        out_path = Path(out_dir) / f"AvCan_{sub_name}_{fire_year}_big_severe_patches.shp"
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        patches.to_file(out_path)
+        print(f"  Patches written: {out_path}")
+    return patches
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = argparse.ArgumentParser(prog=prog, description="Run the high-severity burn patch workflow on local rasters.")
+    parser.add_argument("--scenes", type=Path, required=True, help="Folder of Sentinel-2 GeoTIFF/COG scenes")
+    parser.add_argument("--dem", type=Path, required=True, help="Local DEM GeoTIFF")
+    parser.add_argument("--terrain-tiles", type=Path, default=None, help="Tiles from terrain_tiles.py (optional)")
+    parser.add_argument("--fires", type=Path, default=None, help="AvCan fires (default: latest processed output)")
+    parser.add_argument("--subregion", action="append", default=None)
+    parser.add_argument("--years", type=int, nargs="+", default=list(range(2018, 2025)))
+    parser.add_argument("--out", type=Path, default=REPO_ROOT / "ouputs" / "severe_burns_local")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_MB, help="Memory ceiling for compositing")
+    parser.add_argument("--workers", type=int, default=None, help="Compositing threads (default: all cores)")
+    parser.add_argument("--composite-cache", type=Path, default=None, help="NBR composite cache folder (optional)")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_BUDGET_MB, help="Composite cache size budget")
+    args = parser.parse_args(argv)
+
+    fires_dir = processed_dir / 'avalanche_canada'
+    fires_path = args.fires or find_latest_output(fires_dir, ['AvCan_fires_*.parquet', 'AvCan_fires_*.shp'])
+    if fires_path is None:
+        parser.error(f"no AvCan_fires_* output in {fires_dir}; run `wildfire overlay` first or pass --fires")
+    print(f"Loading AvCan fires... \n File name: {fires_path.name}")
+    fires = to_working_crs(read_fires(fires_path))
+    scenes = list_s2_scenes(args.scenes)
+    tiles = TerrainTiles(args.terrain_tiles) if args.terrain_tiles else None
+    cache = local_cache(args.composite_cache, args.cache_mb) if args.composite_cache else None
+    print(f" Sentinel-2 scenes found: {len(scenes)}")
+
+    for sub_name in args.subregion or ["Brandywine"]:
+        for fire_year in args.years:
+            try:
+                run_subregion_year_local(
+                    sub_name, fire_year, fires, scenes, args.dem, args.out,
+                    terrain_tiles=tiles, memory_mb=args.memory_mb, workers=args.workers, composite_cache=cache,
+                )
+            except Exception as e:
+                # Keep going even if one combo fails
+                print(f"[{sub_name} {fire_year}] ERROR:", e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Parameters and small helpers shared by the Earth Engine (severe_burns_ee.py)
+and local (severity_local.py) high-severity burn patch workflows.
+
+Kept free of heavy imports so either backend can use it.
+"""
+
+#-- Packages --#
+from datetime import date
+
+
+#-- Constants --#
+
+HIGH_THR = 0.66                                 # dNBR threshold for "high severity"
+VECT_SCALE = 30                                 # Analysis / vectorisation scale (m)
+MIN_PATCH_HA = 6                                # Minimum patch area (ha)
+POST_YEAR = 2025                                # Post-fire window year (fixed for every fire year)
+MAX_CLOUDY_PCT = 40                             # Scene-level CLOUDY_PIXEL_PERCENTAGE filter
+MAX_PATCH_PIXELS = 1024                         # connectedPixelCount maxSize
+
+CLOUD_BIT = 1 << 10                             # QA60 opaque clouds
+CIRRUS_BIT = 1 << 11                            # QA60 cirrus
+MASK_VERSION = 1                                # Bump when scene masking / NBR changes (cached composites)
+
+ASPECT_LABELS = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+FIRE_ATTRS = ['gid', 'fireid', 'year', 'natpark', 'region', 'subregion']
+PATCH_COLUMNS = [
+    'patch_id', 'gid', 'fireid', 'year', 'natpark', 'region', 'subregion',
+    'patch_area_ha', 'elev_min_m', 'elev_max_m', 'elev_mean_m', 'elev_relief_m',
+    'slp_mn_deg', 'slp_mn_pct', 'aspect_cardinal', 'aspect_mean_deg',
+]
+
+
+#-- Helper Functions --#
+
+def fire_windows(fire_year: int, post_year: int = POST_YEAR) -> dict:
+    """
+    Pre / post composite windows for a fire year. Ends are exclusive, as
+    in ee.ImageCollection.filterDate.
+    """
+    return {
+        'pre_start': date(fire_year - 1, 1, 1).isoformat(),
+        'pre_end': date(fire_year - 1, 12, 31).isoformat(),
+        'post_start': date(post_year, 1, 1).isoformat(),
+        'post_end': date(post_year, 12, 31).isoformat(),
+    }
+
+
+def min_patch_pixels(min_patch_ha: float = MIN_PATCH_HA, scale: float = VECT_SCALE) -> float:
+    """
+    Minimum patch size in pixels at scale.
+    """
+    return min_patch_ha * 1e4 / (scale * scale)
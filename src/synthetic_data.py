@@ -0,0 +1,198 @@
+"""
+Synthetic NBAC-like fires, AvCan-like subregions and dNBR / DEM rasters
+for offline benchmarks.
+
+Fires are star-shaped polygons (always valid) with a configurable vertex
+count and lognormal sizes; overlap_fraction of them are centred inside an
+earlier fire, as reburns and overlapping perimeters are in NBAC. They are
+written as one NBAC_<year>_<release>.zip shapefile per year in the NBAC
+CRS, with the field names (and the older FIREID / FIRECAUS aliases) the
+real releases use. Subregions are clipped Voronoi cells grouped into
+regions. Everything is seeded, so a configuration always produces the
+same data.
+"""
+
+#-- Packages --#
+from pathlib import Path
+import zipfile
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import rasterio
+import shapely
+from rasterio.features import rasterize
+from scipy import ndimage
+
+from src.projection import WORKING_CRS
+from src.raster_grid import analysis_grid
+
+
+#-- Constants --#
+
+NBAC_CRS = 'EPSG:3978'                          # Canada Atlas Lambert, as NBAC ships
+NBAC_RELEASE = '20250506'
+EXTENT = (-1_950_000, 650_000, -1_650_000, 950_000)   # Working-CRS box (m), southern BC Coast / Columbias
+ALIAS_BEFORE_YEAR = 2020                        # Earlier years use the FIREID / FIRECAUS field names
+CAUSES = ['H', 'N', 'U']
+PROVINCES = ['BC', 'AB']
+
+
+#-- Vector Data --#
+
+def star_polygons(centres: np.ndarray, radii: np.ndarray, vertices: int, rng) -> np.ndarray:
+    """
+    One star-shaped polygon per centre: vertices points at even angles with
+    smooth radial noise around radii.
+    """
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    phase = rng.uniform(0, 2 * np.pi, (len(centres), 3, 1))
+    wobble = sum(
+        rng.uniform(0.05, 0.25, (len(centres), 1)) * np.sin((k + 2) * angles + phase[:, k])
+        for k in range(3)
+    )
+    r = radii[:, None] * (1 + wobble) * rng.uniform(0.9, 1.1, (len(centres), vertices))
+    coords = np.stack([centres[:, :1] + r * np.cos(angles), centres[:, 1:] + r * np.sin(angles)], axis=-1)
+    coords = np.concatenate([coords, coords[:, :1]], axis=1)
+    return shapely.polygons(coords)
+
+
+def synthetic_fires(years, fires_per_year: int, vertices: int = 64, overlap_fraction: float = 0.1,
+                    extent=EXTENT, median_radius_m: float = 800, seed: int = 0) -> gpd.GeoDataFrame:
+    """
+    NBAC-like fires (analysis columns, WORKING_CRS) for each year.
+    """
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = extent
+    frames, gid = [], 0
+    for year in years:
+        n = fires_per_year
+        radii = np.minimum(rng.lognormal(np.log(median_radius_m), 0.8, n), (xmax - xmin) / 20)
+        centres = np.column_stack([rng.uniform(xmin, xmax, n), rng.uniform(ymin, ymax, n)])
+
+        # Reburns: centre inside an earlier fire of the same year
+        reburn = np.flatnonzero(rng.random(n) < overlap_fraction)
+        reburn = reburn[reburn > 0]
+        if len(reburn):
+            host = (rng.random(len(reburn)) * reburn).astype(int)
+            offset = rng.uniform(-0.7, 0.7, (len(reburn), 2)) * radii[host, None]
+            centres[reburn] = centres[host] + offset
+
+        geoms = star_polygons(centres, radii, vertices, rng)
+        frames.append(pd.DataFrame({
+            'gid': [f'{year}_{gid + i}' for i in range(n)],
+            'fireid': np.arange(1, n + 1),
+            'year': year,
+            'prov_terr': np.where(centres[:, 0] < (xmin + xmax) / 2, *PROVINCES),
+            'natpark': np.where(rng.random(n) < 0.03, 'Yoho', None),
+            'adj_ha': shapely.area(geoms) / 1e4 * rng.uniform(0.9, 1.0, n),
+            'cause': rng.choice(CAUSES, n, p=[0.4, 0.5, 0.1]),
+            'geometry': geoms,
+        }))
+        gid += n
+    return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), geometry='geometry', crs=WORKING_CRS)
+
+
+def synthetic_subregions(n_subregions: int = 60, n_regions: int = 8, extent=EXTENT, seed: int = 0) -> gpd.GeoDataFrame:
+    """
+    AvCan-like subregions (region, subregion, prov_terr; WORKING_CRS): Voronoi
+    cells of random seeds clipped to extent, grouped west to east into regions.
+    """
+    rng = np.random.default_rng(seed + 1)
+    xmin, ymin, xmax, ymax = extent
+    box = shapely.box(*extent)
+    seeds = shapely.multipoints(np.column_stack([rng.uniform(xmin, xmax, n_subregions), rng.uniform(ymin, ymax, n_subregions)]))
+    cells = shapely.intersection(shapely.get_parts(shapely.voronoi_polygons(seeds, extend_to=box)), box)
+    order = np.argsort(shapely.get_x(shapely.centroid(cells)), kind='stable')
+    region = np.empty(len(cells), dtype=int)
+    region[order] = np.arange(len(cells)) * n_regions // len(cells)
+    x = shapely.get_x(shapely.centroid(cells))
+    return gpd.GeoDataFrame({
+        'region': [f'Region {r + 1}' for r in region],
+        'subregion': [f'Subregion {i + 1}' for i in range(len(cells))],
+        'prov_terr': np.where(x < (xmin + xmax) / 2, *PROVINCES),
+        'geometry': cells,
+    }, geometry='geometry', crs=WORKING_CRS)
+
+
+def write_nbac_zips(fires: gpd.GeoDataFrame, zip_dir, release: str = NBAC_RELEASE) -> list[Path]:
+    """
+    One NBAC_<year>_<release>.zip shapefile per year, in NBAC_CRS with
+    upper-case NBAC field names.
+    """
+    zip_dir = Path(zip_dir)
+    zip_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for year, gdf in fires.to_crs(NBAC_CRS).groupby('year'):
+        old = year < ALIAS_BEFORE_YEAR
+        layer = gdf.rename(columns={
+            'gid': 'GID', 'fireid': 'FIREID' if old else 'NFIREID', 'year': 'YEAR',
+            'prov_terr': 'ADMIN_AREA', 'natpark': 'NATPARK', 'adj_ha': 'ADJ_HA',
+            'cause': 'FIRECAUS' if old else 'FIRECAUSE',
+        })
+        name = f'NBAC_{year}_{release}'
+        shp_dir = zip_dir / f'.{name}'
+        shp_dir.mkdir(exist_ok=True)
+        layer.to_file(shp_dir / f'nbac_{year}_{release}.shp', engine='pyogrio')
+        zip_path = zip_dir / f'{name}.zip'
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for f in sorted(shp_dir.iterdir()):
+                zf.write(f, f.name)
+                f.unlink()
+        shp_dir.rmdir()
+        paths.append(zip_path)
+    return paths
+
+
+#-- Rasters --#
+
+def _raster_profile(extent, scale: float) -> dict:
+    grid = analysis_grid(extent, scale)
+    return {
+        'driver': 'GTiff', 'dtype': 'float32', 'count': 1, 'crs': grid['crs'],
+        'width': grid['width'], 'height': grid['height'], 'transform': grid['transform'], 'nodata': np.nan,
+        'tiled': True, 'blockxsize': 256, 'blockysize': 256, 'compress': 'deflate',
+    }
+
+
+def synthetic_dem(path, extent, scale: float = 30, n_peaks: int = 40, seed: int = 0) -> Path:
+    """
+    Mountain-like DEM: a sum of Gaussian ridges and peaks over a valley floor.
+    """
+    rng = np.random.default_rng(seed + 2)
+    profile = _raster_profile(extent, scale)
+    h, w = profile['height'], profile['width']
+    y, x = np.arange(h, dtype=np.float32), np.arange(w, dtype=np.float32)
+    elev = np.full((h, w), 600, dtype=np.float32)
+    for _ in range(n_peaks):
+        cy, cx = rng.uniform(0, h), rng.uniform(0, w)
+        sy, sx = rng.uniform(0.02, 0.12) * h, rng.uniform(0.02, 0.12) * w
+        # Separable Gaussian: outer product of the row and column profiles
+        elev += rng.uniform(300, 1800) * np.outer(np.exp(-((y - cy) / sy) ** 2), np.exp(-((x - cx) / sx) ** 2))
+    elev += ndimage.gaussian_filter(rng.normal(0, 60, (h, w)).astype(np.float32), 3)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(elev, 1)
+    return Path(path)
+
+
+def synthetic_dnbr(path, fires: gpd.GeoDataFrame, extent, scale: float = 30, seed: int = 0) -> Path:
+    """
+    dNBR raster: low-noise background with fires burnt at a per-fire
+    severity modulated by a smooth random field, so each fire holds a mix
+    of high-severity patches and lightly burnt ground.
+    """
+    rng = np.random.default_rng(seed + 3)
+    profile = _raster_profile(extent, scale)
+    shape = (profile['height'], profile['width'])
+    severity = rasterize(
+        zip(fires.geometry, rng.uniform(0.4, 1.1, len(fires))),
+        out_shape=shape, transform=profile['transform'], fill=0, dtype=np.float32,
+    )
+    field = ndimage.gaussian_filter(rng.normal(0, 1, shape).astype(np.float32), 4)
+    field = 0.5 + field / (4 * field.std() + 1e-6)
+    dnbr = rng.normal(0.02, 0.05, shape).astype(np.float32) + severity * np.clip(field, 0, 1.3)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(dnbr.astype(np.float32), 1)
+    return Path(path)
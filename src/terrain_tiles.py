@@ -0,0 +1,307 @@
+"""
+Precomputed terrain derivative tiles from a local DEM.
+
+Slope, aspect, sin / cos of aspect and the 8-way aspect class are derived
+once on the VECT_SCALE working-CRS grid with a Horn 3x3 kernel. Tiles are
+computed with a one-pixel overlap (halo), so tile seams match a single
+pass over the whole DEM. Each layer is stored as a row-major .npy file;
+TerrainTiles memory-maps them and hands out any aligned window as a
+zero-copy view, so the patch statistics only touch the pixels they read.
+
+Tiles are rebuilt only when the DEM (content hash) or grid settings change.
+"""
+
+#-- Packages --#
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import rasterio
+from pyproj import Proj, Transformer
+from rasterio.enums import Resampling
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+processed_dir = REPO_ROOT / 'data' / 'processed'
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+#--- Local ---#
+from src.manifest import file_sha256, save_manifest
+from src.projection import WORKING_CRS
+from src.raster_grid import analysis_grid, grid_bounds, grid_windows, warp_to_grid
+from src.severity_params import VECT_SCALE
+
+
+#-- Constants --#
+
+TILES_VERSION = 2
+TILE_SIZE = 1024                                # Tile side (pixels) for the build
+ASPECT_NODATA = 255                             # aspect_cat where the DEM has no data
+
+# Layer -> stored dtype
+TERRAIN_LAYERS = {
+    'elev': np.float32,                         # m
+    'slope': np.float32,                        # degrees
+    'aspect': np.float32,                       # degrees clockwise from true north (downslope)
+    'sin_aspect': np.float32,
+    'cos_aspect': np.float32,
+    'aspect_cat': np.uint8,                     # 0 = N ... 7 = NW
+}
+
+
+#-- Terrain Kernels --#
+
+def horn_slope_aspect(z: np.ndarray, res: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Horn (3x3) slope and aspect in degrees for the interior of z, which
+    carries a one-pixel halo. Aspect is the downslope direction clockwise
+    from grid north.
+    """
+    z = z.astype(np.float64)
+    a, b, c = z[:-2, :-2], z[:-2, 1:-1], z[:-2, 2:]
+    d, f = z[1:-1, :-2], z[1:-1, 2:]
+    g, h, i = z[2:, :-2], z[2:, 1:-1], z[2:, 2:]
+    dz_east = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * res)
+    dz_south = ((g + 2 * h + i) - (a + 2 * b + c)) / (8 * res)
+    slope = np.degrees(np.arctan(np.hypot(dz_east, dz_south)))
+    aspect = np.degrees(np.arctan2(-dz_east, dz_south)) % 360
+    return slope.astype(np.float32), aspect.astype(np.float32)
+
+
+def terrain_derivatives(elev: np.ndarray, res: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Horn slope and aspect for a whole array; edges use replicated elevations.
+    """
+    return horn_slope_aspect(np.pad(elev, 1, mode='edge'), res)
+
+
+def aspect_category(aspect: np.ndarray) -> np.ndarray:
+    """
+    8-way aspect class (0 = N ... 7 = NW), same breaks as the EE expression;
+    ASPECT_NODATA where aspect is undefined.
+    """
+    with np.errstate(invalid='ignore'):
+        cat = ((aspect + 22.5) // 45) % 8
+    return np.where(np.isnan(aspect), ASPECT_NODATA, cat).astype(np.uint8)
+
+
+def meridian_convergence(crs, x, y):
+    """
+    Angle (degrees) between grid north and true north at (x, y) in crs;
+    x and y may be arrays.
+    """
+    lon, lat = Transformer.from_crs(crs, 'EPSG:4326', always_xy=True).transform(x, y)
+    return Proj(crs).get_factors(lon, lat).meridian_convergence
+
+
+def pixel_convergence(grid: dict, window: Window | None = None) -> np.ndarray:
+    """
+    Meridian convergence at every pixel centre of window (default the whole
+    grid), so tiles and a single pass rotate each pixel by the same angle.
+    """
+    window = window or Window(0, 0, grid['width'], grid['height'])
+    cols = window.col_off + 0.5 + np.arange(window.width)
+    rows = window.row_off + 0.5 + np.arange(window.height)
+    x, y = grid['transform'] * np.meshgrid(cols, rows)
+    return np.asarray(meridian_convergence(grid['crs'], x, y), dtype=np.float64)
+
+
+def derive_terrain(z: np.ndarray, res: float, convergence=0.0) -> dict:
+    """
+    All TERRAIN_LAYERS for the interior of z (one-pixel halo). Aspect is
+    rotated by convergence (degrees, scalar or per interior pixel) so it is
+    measured from true north.
+    """
+    slope, aspect = horn_slope_aspect(z, res)
+    # Equal-area grid north drifts from true north away from the central meridian
+    aspect = ((aspect + convergence) % 360).astype(np.float32)
+    radians = np.radians(aspect)
+    return {
+        'elev': z[1:-1, 1:-1].astype(np.float32),
+        'slope': slope,
+        'aspect': aspect,
+        'sin_aspect': np.sin(radians).astype(np.float32),
+        'cos_aspect': np.cos(radians).astype(np.float32),
+        'aspect_cat': aspect_category(aspect),
+    }
+
+
+#-- On-the-fly --#
+
+def _read_elev(vrt, window: Window) -> np.ndarray:
+    return vrt.read(1, window=window, masked=True).astype(np.float32).filled(np.nan)
+
+
+def read_dem(dem_path, grid: dict) -> np.ndarray:
+    """
+    DEM resampled (bilinear) onto grid, float32 with NaN for nodata.
+    """
+    with rasterio.open(dem_path) as src:
+        with warp_to_grid(src, grid, Resampling.bilinear, nodata=np.nan if src.nodata is None else src.nodata) as vrt:
+            return _read_elev(vrt, Window(0, 0, grid['width'], grid['height']))
+
+
+def terrain_layers(dem_path, grid: dict) -> dict:
+    """
+    TERRAIN_LAYERS for one grid, derived directly from the DEM.
+    """
+    elev = read_dem(dem_path, grid)
+    return derive_terrain(np.pad(elev, 1, mode='edge'), grid['scale'], pixel_convergence(grid))
+
+
+#-- Build --#
+
+def tiles_key(dem_path, bounds, scale, crs) -> dict:
+    return {
+        'version': TILES_VERSION,
+        'dem': {Path(dem_path).name: file_sha256(dem_path)},
+        'bounds': [float(b) for b in bounds],
+        'scale': scale,
+        'crs': str(crs),
+    }
+
+
+def _halo_window(grid: dict, window: Window) -> tuple[Window, tuple]:
+    """
+    window grown by one pixel, clipped to grid, plus the edge padding that
+    replaces the clipped sides.
+    """
+    row0, col0 = max(window.row_off - 1, 0), max(window.col_off - 1, 0)
+    row1 = min(window.row_off + window.height + 1, grid['height'])
+    col1 = min(window.col_off + window.width + 1, grid['width'])
+    pad = (
+        (1 - (window.row_off - row0), 1 - (row1 - window.row_off - window.height)),
+        (1 - (window.col_off - col0), 1 - (col1 - window.col_off - window.width)),
+    )
+    return Window(col0, row0, col1 - col0, row1 - row0), pad
+
+
+def build_terrain_tiles(dem_path, tiles_dir, bounds=None, scale: float = VECT_SCALE, crs=WORKING_CRS,
+                        tile: int = TILE_SIZE, workers: int | None = None) -> Path:
+    """
+    Derive TERRAIN_LAYERS from dem_path over bounds (in crs; default the
+    DEM's extent) into tiles_dir. Skipped when tiles_dir already holds
+    tiles built from the same DEM and settings.
+    """
+    tiles_dir = Path(tiles_dir)
+    if bounds is None:
+        with rasterio.open(dem_path) as src:
+            bounds = transform_bounds(src.crs, crs, *src.bounds)
+    grid = analysis_grid(bounds, scale, crs)
+    key = tiles_key(dem_path, grid_bounds(grid), scale, crs)
+
+    meta_path = tiles_dir / 'meta.json'
+    if meta_path.exists() and json.loads(meta_path.read_text()).get('key') == key:
+        return tiles_dir
+    if tiles_dir.exists():
+        shutil.rmtree(tiles_dir)
+    tiles_dir.mkdir(parents=True)
+
+    shape = (grid['height'], grid['width'])
+    arrays = {
+        name: np.lib.format.open_memmap(tiles_dir / f'{name}.npy', mode='w+', dtype=dtype, shape=shape)
+        for name, dtype in TERRAIN_LAYERS.items()
+    }
+
+    def build_tile(window):
+        # One dataset per tile: rasterio handles are not shared across threads
+        halo, pad = _halo_window(grid, window)
+        with rasterio.open(dem_path) as src:
+            with warp_to_grid(src, grid, Resampling.bilinear, nodata=np.nan if src.nodata is None else src.nodata) as vrt:
+                z = np.pad(_read_elev(vrt, halo), pad, mode='edge')
+        layers = derive_terrain(z, scale, pixel_convergence(grid, window))
+        rows, cols = window.toslices()
+        for name, values in layers.items():
+            arrays[name][rows, cols] = values
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        list(pool.map(build_tile, grid_windows(grid, tile)))
+    for array in arrays.values():
+        array.flush()
+
+    save_manifest({
+        'key': key,
+        'crs': str(crs),
+        'transform': list(grid['transform'])[:6],
+        'width': grid['width'],
+        'height': grid['height'],
+        'scale': scale,
+        'tile': tile,
+        'layers': {name: np.dtype(dtype).name for name, dtype in TERRAIN_LAYERS.items()},
+    }, meta_path)
+    return tiles_dir
+
+
+#-- Read --#
+
+class TerrainTiles:
+    """
+    Memory-mapped terrain layers.
+
+    tiles = TerrainTiles(path)
+    terrain = tiles.window(grid)    # layer -> zero-copy view aligned with grid
+    """
+
+    def __init__(self, tiles_dir):
+        self.tiles_dir = Path(tiles_dir)
+        self.meta = json.loads((self.tiles_dir / 'meta.json').read_text())
+        self.layers = {name: np.load(self.tiles_dir / f'{name}.npy', mmap_mode='r') for name in self.meta['layers']}
+        self.scale = self.meta['scale']
+        self.crs = self.meta['crs']
+        _, _, self.x0, _, _, self.y0 = self.meta['transform']
+
+    def _offsets(self, grid: dict) -> tuple[int, int] | None:
+        if grid['scale'] != self.scale or str(grid['crs']) != self.crs:
+            return None
+        col = (grid['transform'].c - self.x0) / self.scale
+        row = (self.y0 - grid['transform'].f) / self.scale
+        if abs(col - round(col)) > 1e-6 or abs(row - round(row)) > 1e-6:
+            return None
+        col, row = int(round(col)), int(round(row))
+        if col < 0 or row < 0 or col + grid['width'] > self.meta['width'] or row + grid['height'] > self.meta['height']:
+            return None
+        return row, col
+
+    def covers(self, grid: dict) -> bool:
+        """
+        True when grid is pixel-aligned with the tiles and inside them.
+        """
+        return self._offsets(grid) is not None
+
+    def window(self, grid: dict) -> dict:
+        """
+        Every layer over grid as views into the memory-mapped arrays.
+        """
+        offsets = self._offsets(grid)
+        if offsets is None:
+            raise ValueError(f"Grid is not aligned with or not covered by the terrain tiles in {self.tiles_dir}")
+        row, col = offsets
+        return {name: layer[row:row + grid['height'], col:col + grid['width']] for name, layer in self.layers.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute memory-mapped terrain derivative tiles from a DEM.")
+    parser.add_argument("--dem", type=Path, required=True)
+    parser.add_argument("--bounds", type=float, nargs=4, default=None, metavar=("XMIN", "YMIN", "XMAX", "YMAX"),
+                        help=f"Extent in {WORKING_CRS} (default: the DEM's extent)")
+    parser.add_argument("--scale", type=float, default=VECT_SCALE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", type=Path, default=processed_dir / 'terrain' / f'terrain_{VECT_SCALE}m')
+    args = parser.parse_args(argv)
+
+    print(f'Building terrain tiles from {args.dem.name} -> {args.out}')
+    build_terrain_tiles(args.dem, args.out, args.bounds, args.scale, workers=args.workers)
+    tiles = TerrainTiles(args.out)
+    print(f"Terrain tiles ready: {tiles.meta['width']} x {tiles.meta['height']} px, layers {list(tiles.layers)}")
+
+
+if __name__ == "__main__":
+    main()
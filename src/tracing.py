@@ -0,0 +1,324 @@
+"""
+Span tracing for the pipeline stages.
+
+    from src.tracing import span
+
+    with span('read', path=str(path)) as s:
+        gdf = read_fires(path)
+        s.count(gdf)                    # rows + vertices for the throughput figures
+
+Each span records wall and CPU time, rows and vertices per second, the
+RSS change and the growth of the peak RSS during the span, and, when
+given a counter (e.g. severe_burns_ee.ROUND_TRIPS), how many Earth Engine
+round trips it made. Spans nest per thread; counter deltas are
+process-wide, so give counters only to spans that do not overlap others
+running in parallel threads.
+
+Tracing is off unless enable_tracing() is called or WILDFIRE_TRACE names
+an output folder; then every finished span is appended to
+trace-<run>.jsonl and a Chrome trace (trace-<run>.json, open in
+chrome://tracing or Perfetto) is written at exit. While off, span()
+returns one shared no-op object, so instrumented code pays a function
+call per stage and nothing else.
+
+Spans named in WILDFIRE_TRACE_PROFILE (comma separated, or *) also run
+under a sampling profiler (pyinstrument, when installed) and save its
+report next to the trace.
+"""
+
+#-- Packages --#
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+import atexit
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+
+
+#-- Constants --#
+
+TRACE_ENV = 'WILDFIRE_TRACE'                    # Output folder; tracing is on when set
+PROFILE_ENV = 'WILDFIRE_TRACE_PROFILE'          # Span names to profile (comma separated, * = all)
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+#-- Memory --#
+
+def rss_mb() -> float | None:
+    """
+    Current resident set size (Linux; None elsewhere).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / 2 ** 20
+    except OSError:
+        return None
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10     # bytes on macOS, KiB on Linux
+
+
+def count_vertices(geoms) -> int:
+    """
+    Total coordinates in a GeoDataFrame / GeoSeries / geometry array.
+    """
+    import shapely
+    geoms = getattr(geoms, 'geometry', geoms)
+    return int(shapely.get_num_coordinates(getattr(geoms, 'values', geoms)).sum())
+
+
+#-- Spans --#
+
+class _NoopSpan:
+    """
+    Stand-in returned while tracing is off.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        return self
+
+    def count(self, gdf=None, rows=None):
+        return self
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, counter=None, attrs=None):
+        self.tracer = tracer
+        self.name = name
+        self.counter = counter
+        self.attrs = dict(attrs or {})
+        self.rows = None
+        self.vertices = None
+        self.counted = None
+        self.profiler = None
+
+    def set(self, **attrs):
+        """
+        Attach attributes (rows= and vertices= feed the throughput figures).
+        """
+        self.rows = attrs.pop('rows', self.rows)
+        self.vertices = attrs.pop('vertices', self.vertices)
+        self.attrs.update(attrs)
+        return self
+
+    def count(self, gdf=None, rows=None):
+        """
+        Rows and vertices of a (Geo)DataFrame processed by this span
+        (counted on exit, outside the timed section).
+        """
+        if gdf is not None:
+            self.counted = gdf
+        elif rows is not None:
+            self.rows = rows
+        return self
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.profiler = self.tracer.start_profiler(self.name)
+        self.counter_start = Counter(self.counter) if self.counter is not None else None
+        self.rss_start, self.peak_start = rss_mb(), peak_rss_mb()
+        self.cpu_start = time.process_time()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        cpu = time.process_time() - self.cpu_start
+        rss_end, peak_end = rss_mb(), peak_rss_mb()
+        self.tracer.stack().pop()
+        if self.counted is not None:
+            self.rows = len(self.counted)
+            if hasattr(self.counted, 'geometry'):
+                self.vertices = count_vertices(self.counted)
+            self.counted = None
+
+        wall = (end_ns - self.start_ns) / 1e9
+        record = {
+            'name': self.name,
+            'parent': self.parent,
+            'depth': self.depth,
+            'thread': threading.current_thread().name,
+            'start_s': round((self.start_ns - self.tracer.t0_ns) / 1e9, 6),
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'rss_delta_mb': round(rss_end - self.rss_start, 1) if rss_end is not None and self.rss_start is not None else None,
+            'peak_rss_delta_mb': round(peak_end - self.peak_start, 1),
+            'peak_rss_mb': round(peak_end, 1),
+            'status': 'error' if exc_type else 'ok',
+        }
+        if self.rows is not None:
+            record['rows'] = self.rows
+            record['rows_per_s'] = round(self.rows / wall, 1) if wall else None
+        if self.vertices is not None:
+            record['vertices'] = self.vertices
+            record['vertices_per_s'] = round(self.vertices / wall, 1) if wall else None
+        if self.counter_start is not None:
+            delta = Counter(self.counter)
+            delta.subtract(self.counter_start)
+            record['round_trips'] = sum(delta.values())
+            record['round_trips_by_label'] = {k: v for k, v in delta.items() if v}
+        if exc_type:
+            record['error'] = f'{exc_type.__name__}: {exc}'
+        if self.profiler is not None:
+            record['profile'] = self.tracer.stop_profiler(self.profiler, self.name)
+        record.update(self.attrs)
+        self.tracer.emit(record, self.start_ns, end_ns)
+        return False
+
+
+#-- Tracer --#
+
+class Tracer:
+    """
+    Collects finished spans into a JSON-lines file and a Chrome trace.
+    """
+
+    def __init__(self, out_dir, profile=None, run_id=None):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self.jsonl_path = self.out_dir / f'trace-{self.run_id}.jsonl'
+        self.chrome_path = self.out_dir / f'trace-{self.run_id}.json'
+        self.profile = set(profile or ())
+        self.t0_ns = time.perf_counter_ns()
+        self.events = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._jsonl = open(self.jsonl_path, 'a')
+        self._threads = {}
+
+    def stack(self) -> list:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def emit(self, record, start_ns, end_ns) -> None:
+        with self._lock:
+            self._jsonl.write(json.dumps({'run_id': self.run_id, **record}, default=str) + '\n')
+            self._jsonl.flush()
+            tid = self._threads.setdefault(threading.get_ident(), len(self._threads) + 1)
+            self.events.append({
+                'name': record['name'], 'cat': 'stage', 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                'ts': (start_ns - self.t0_ns) / 1e3, 'dur': (end_ns - start_ns) / 1e3,
+                'args': {k: v for k, v in record.items() if k not in ('name', 'start_s', 'wall_s', 'thread')},
+            })
+
+    def write_chrome_trace(self) -> Path:
+        with self._lock:
+            meta = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': f'thread {tid}'}}
+                for tid in self._threads.values()
+            ]
+            self.chrome_path.write_text(json.dumps({'traceEvents': meta + self.events, 'displayTimeUnit': 'ms'}, default=str))
+        return self.chrome_path
+
+    def close(self) -> None:
+        self.write_chrome_trace()
+        self._jsonl.close()
+
+    #--- Sampling profiler hook ---#
+
+    def start_profiler(self, name):
+        if not self.profile or ('*' not in self.profile and name not in self.profile):
+            return None
+        if threading.current_thread() is not threading.main_thread():
+            return None                                 # Signal-based samplers run on the main thread only
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print(f' Tracing: pyinstrument not installed, span {name!r} not profiled')
+            self.profile.discard(name)
+            return None
+        profiler = Profiler()
+        profiler.start()
+        return profiler
+
+    def stop_profiler(self, profiler, name) -> str:
+        profiler.stop()
+        path = self.out_dir / f'profile-{self.run_id}-{name.replace("/", "_")}-{time.perf_counter_ns()}.html'
+        path.write_text(profiler.output_html())
+        return path.name
+
+
+_TRACER = None
+
+
+def enable_tracing(out_dir, profile=None, run_id=None) -> Tracer:
+    """
+    Start writing spans to out_dir. profile lists span names to run under
+    the sampling profiler ('*' for all).
+    """
+    global _TRACER
+    if _TRACER is not None:
+        _TRACER.close()
+    _TRACER = Tracer(out_dir, profile, run_id)
+    atexit.register(_TRACER.close)
+    print(f'Tracing stages to {_TRACER.jsonl_path}')
+    return _TRACER
+
+
+def tracing_enabled() -> bool:
+    return _TRACER is not None
+
+
+def span(name, counter=None, **attrs):
+    """
+    Context manager timing one stage; a shared no-op while tracing is off.
+    """
+    if _TRACER is None:
+        return NOOP_SPAN
+    return Span(_TRACER, name, counter, attrs)
+
+
+def traced(name=None, counter=None):
+    """
+    Decorator form of span() (span name defaults to the function name).
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return fn(*args, **kwargs)
+            with Span(_TRACER, label, counter):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+if os.environ.get(TRACE_ENV):
+    enable_tracing(
+        os.environ[TRACE_ENV],
+        profile=[p.strip() for p in os.environ.get(PROFILE_ENV, '').split(',') if p.strip()],
+    )
@@ -0,0 +1,301 @@
+"""
+Build a multi-resolution vector tile pyramid (MBTiles) from the processed
+Canada fires and AvCan fires outputs.
+
+Each zoom level gets geometry simplified to that level's pixel size, is
+clipped to tiles, encoded as Mapbox Vector Tiles and written gzip-compressed
+into one MBTiles archive. Tiles are generated in parallel worker processes.
+The web maps then request only the visible tiles instead of full GeoJSON.
+"""
+
+#-- Packages --#
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import argparse
+import gzip
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import mapbox_vector_tile
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+processed_dir = REPO_ROOT / 'data' / 'processed'
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+#--- Local ---#
+from src.nbac_io import find_latest_output, read_fires
+
+
+#-- Constants --#
+
+WEB_MERCATOR_HALF = 20037508.342789244          # EPSG:3857 half world width (m)
+TILE_EXTENT = 4096                              # MVT integer grid per tile
+TILE_BUFFER = 64                                # Clip buffer in tile units (avoids seams)
+SIMPLIFY_PIXELS = 1.0                           # Simplification tolerance in tile units
+MIN_ZOOM = 3
+MAX_ZOOM = 12
+
+# Layer name -> (folder, output patterns)
+TILE_LAYERS = {
+    'canada_fires': (processed_dir / 'Canada_fires', ['*_parquet', 'Canada_fires_*.parquet', 'Canada_fires_*.shp']),
+    'avcan_fires': (processed_dir / 'avalanche_canada', ['AvCan_fires_*.parquet', 'AvCan_fires_*.shp']),
+}
+
+# Per-zoom layers shared with forked tile workers
+_ZOOM_LAYERS = {}
+
+
+#-- Helper Functions --#
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """
+    EPSG:3857 bounds of XYZ tile (z, x, y), y counted from the top.
+    """
+    size = 2 * WEB_MERCATOR_HALF / 2 ** z
+    minx = -WEB_MERCATOR_HALF + x * size
+    maxy = WEB_MERCATOR_HALF - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tiles_for_bounds(bounds, z: int) -> list[tuple[int, int, int]]:
+    """
+    Every XYZ tile at zoom z intersecting EPSG:3857 bounds.
+    """
+    n = 2 ** z
+    size = 2 * WEB_MERCATOR_HALF / n
+    minx, miny, maxx, maxy = bounds
+    x0 = max(0, int((minx + WEB_MERCATOR_HALF) // size))
+    x1 = min(n - 1, int((maxx + WEB_MERCATOR_HALF) // size))
+    y0 = max(0, int((WEB_MERCATOR_HALF - maxy) // size))
+    y1 = min(n - 1, int((WEB_MERCATOR_HALF - miny) // size))
+    return [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def occupied_tiles(zoom_layers: dict, z: int) -> list[tuple[int, int, int]]:
+    """
+    XYZ tiles at zoom z that some prepared layer geometry actually reaches
+    (within the clip buffer). Candidates come from each geometry's bounds
+    and are pruned with the layer STRtrees, so the empty tiles of the
+    layers' bounding box are never enumerated or sent to a worker.
+    """
+    size = 2 * WEB_MERCATOR_HALF / 2 ** z
+    pad = size * TILE_BUFFER / TILE_EXTENT
+    candidates = set()
+    for layer in zoom_layers.values():
+        for minx, miny, maxx, maxy in shapely.bounds(layer['geoms']):
+            candidates.update(tiles_for_bounds((minx - pad, miny - pad, maxx + pad, maxy + pad), z))
+    if not candidates:
+        return []
+
+    tiles = sorted(candidates)
+    bounds = np.array([tile_bounds(*t) for t in tiles])
+    boxes = shapely.box(bounds[:, 0] - pad, bounds[:, 1] - pad, bounds[:, 2] + pad, bounds[:, 3] + pad)
+    hit = np.zeros(len(tiles), dtype=bool)
+    for layer in zoom_layers.values():
+        hit[np.unique(layer['tree'].query(boxes, predicate='intersects')[0])] = True
+    return [t for t, keep in zip(tiles, hit) if keep]
+
+
+def _json_value(value):
+    """
+    MVT-compatible property value (drops missing values).
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def prepare_zoom_layer(gdf: gpd.GeoDataFrame, z: int) -> dict:
+    """
+    Simplify a layer (EPSG:3857) to zoom z's pixel size and index it.
+    """
+    tolerance = SIMPLIFY_PIXELS * (2 * WEB_MERCATOR_HALF / 2 ** z) / TILE_EXTENT
+    geoms = shapely.simplify(gdf.geometry.values, tolerance, preserve_topology=True)
+    keep = ~shapely.is_empty(geoms)
+    props = gdf.drop(columns=gdf.geometry.name)[keep]
+    records = [
+        {k: v for k, v in ((k, _json_value(v)) for k, v in row.items()) if v is not None}
+        for row in props.to_dict('records')
+    ]
+    geoms = geoms[keep]
+    return {'geoms': geoms, 'props': records, 'tree': shapely.STRtree(geoms)}
+
+
+def quantize(geoms: np.ndarray, bounds) -> np.ndarray:
+    """
+    Geometries in tile bounds (EPSG:3857) -> integer tile coordinates
+    (0..TILE_EXTENT, y up), rounded as mapbox_vector_tile's quantize_bounds.
+    """
+    minx, miny, maxx, maxy = bounds
+    scale = np.array([TILE_EXTENT / (maxx - minx), TILE_EXTENT / (maxy - miny)])
+    return shapely.transform(geoms, lambda xy: np.round((xy - (minx, miny)) * scale))
+
+
+def encode_tile(tile: tuple[int, int, int]) -> tuple[tuple[int, int, int], bytes | None]:
+    """
+    Clip every prepared layer to one tile and encode it as gzipped MVT.
+    """
+    z, x, y = tile
+    minx, miny, maxx, maxy = tile_bounds(z, x, y)
+    pad = (maxx - minx) * TILE_BUFFER / TILE_EXTENT
+
+    layers = []
+    for name, layer in _ZOOM_LAYERS.items():
+        idx = layer['tree'].query(shapely.box(minx - pad, miny - pad, maxx + pad, maxy + pad))
+        if not len(idx):
+            continue
+        idx = np.sort(idx)
+        clipped = shapely.clip_by_rect(layer['geoms'][idx], minx - pad, miny - pad, maxx + pad, maxy + pad)
+        tile_geoms = quantize(clipped, (minx, miny, maxx, maxy))
+        features = [
+            {'geometry': geom, 'properties': layer['props'][i]}
+            for i, geom in zip(idx, tile_geoms)
+            if not geom.is_empty
+        ]
+        if features:
+            layers.append({'name': name, 'features': features})
+
+    if not layers:
+        return tile, None
+    data = mapbox_vector_tile.encode(layers, default_options={'extents': TILE_EXTENT})
+    return tile, gzip.compress(data)
+
+
+def _tile_pool(workers: int):
+    """
+    Process pool sharing _ZOOM_LAYERS with workers through fork.
+    """
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+
+
+def init_mbtiles(out_path, layers: dict, min_zoom: int, max_zoom: int, bounds_4326) -> sqlite3.Connection:
+    """
+    Create an empty MBTiles archive with its metadata.
+    """
+    out_path = Path(out_path)
+    out_path.unlink(missing_ok=True)
+    con = sqlite3.connect(out_path)
+    con.executescript('''
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+    ''')
+    minx, miny, maxx, maxy = bounds_4326
+    vector_layers = [
+        {
+            'id': name,
+            'fields': {
+                c: 'Number' if pd.api.types.is_numeric_dtype(gdf[c]) else 'String'
+                for c in gdf.columns if c != gdf.geometry.name
+            },
+            'minzoom': min_zoom,
+            'maxzoom': max_zoom,
+        }
+        for name, gdf in layers.items()
+    ]
+    metadata = {
+        'name': out_path.stem,
+        'format': 'pbf',
+        'type': 'overlay',
+        'minzoom': str(min_zoom),
+        'maxzoom': str(max_zoom),
+        'bounds': f"{minx},{miny},{maxx},{maxy}",
+        'center': f"{(minx + maxx) / 2},{(miny + maxy) / 2},{min_zoom}",
+        'json': json.dumps({'vector_layers': vector_layers}),
+    }
+    con.executemany('INSERT INTO metadata VALUES (?, ?)', metadata.items())
+    return con
+
+
+def build_tile_pyramid(layers: dict, out_path, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+                       workers: int | None = None) -> dict:
+    """
+    Write layers (name -> GeoDataFrame) as an MBTiles vector tile pyramid.
+    Returns zoom -> number of non-empty tiles written.
+    """
+    layers = {name: gdf.to_crs(3857) for name, gdf in layers.items() if len(gdf)}
+    if not layers:
+        raise ValueError('No features to tile.')
+    bounds = np.array([gdf.total_bounds for gdf in layers.values()])
+    bounds_3857 = (*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0))
+    bounds_4326 = gpd.GeoSeries([shapely.box(*bounds_3857)], crs=3857).to_crs(4326).total_bounds
+
+    workers = workers or os.cpu_count() or 1
+    con = init_mbtiles(out_path, layers, min_zoom, max_zoom, bounds_4326)
+    counts = {}
+    try:
+        for z in range(min_zoom, max_zoom + 1):
+            _ZOOM_LAYERS.clear()
+            _ZOOM_LAYERS.update({name: prepare_zoom_layer(gdf, z) for name, gdf in layers.items()})
+
+            tiles = occupied_tiles(_ZOOM_LAYERS, z)
+            pool = _tile_pool(min(workers, len(tiles)))
+            n = 0
+            with pool or nullcontext():
+                results = pool.map(encode_tile, tiles, chunksize=64) if pool else map(encode_tile, tiles)
+                for (tz, tx, ty), data in results:
+                    if data is None:
+                        continue
+                    # MBTiles rows are TMS (counted from the bottom)
+                    con.execute('INSERT INTO tiles VALUES (?, ?, ?, ?)', (tz, tx, 2 ** tz - 1 - ty, data))
+                    n += 1
+            con.commit()
+            counts[z] = n
+            print(f' Zoom {z}: {n} tiles')
+    finally:
+        _ZOOM_LAYERS.clear()
+        con.close()
+    return counts
+
+
+def load_tile_layers(layer_specs: dict = TILE_LAYERS) -> dict:
+    """
+    Latest processed output for each tile layer that exists on disk.
+    """
+    layers = {}
+    for name, (folder, patterns) in layer_specs.items():
+        path = find_latest_output(folder, patterns)
+        if path is None:
+            print(f'No output found for layer {name} in {folder}, skipping.')
+            continue
+        print(f'Loading {name}: {path.name}')
+        layers[name] = read_fires(path)
+    return layers
+
+
+#-- Run --#
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = argparse.ArgumentParser(prog=prog, description="Build an MBTiles vector tile pyramid from processed fire layers.")
+    parser.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", type=Path, default=REPO_ROOT / "docs" / "tiles" / "fires.mbtiles")
+    args = parser.parse_args(argv)
+
+    layers = load_tile_layers()
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    print(f'Building vector tile pyramid z{args.min_zoom}-{args.max_zoom} -> {args.out}')
+    counts = build_tile_pyramid(layers, args.out, args.min_zoom, args.max_zoom, args.workers)
+    print(f'Vector tiles complete: {sum(counts.values())} tiles written to {args.out}')
+
+
+if __name__ == "__main__":
+    main()
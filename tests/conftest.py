@@ -0,0 +1,8 @@
+#-- Packages --#
+from pathlib import Path
+import sys
+
+#-- Directories --#
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
@@ -0,0 +1,111 @@
+"""
+Minimal offline stand-in for the `ee` client.
+
+Constructors and methods return lazy Nodes and compute nothing. getInfo()
+is the only call that would reach the server: every call is recorded in
+CALLS and resolves a Node to its value (an ee.Dictionary to a dict of its
+resolved entries). A Node's value is passed on to everything derived from
+it, so FeatureCollection(value=0) makes every count taken from it zero.
+"""
+
+__version__ = 'fake'
+
+CALLS = []                                      # Label of every getInfo() call, in order
+
+
+class Node:
+    def __init__(self, name='node', value=1):
+        self.name, self.value = name, value
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        def method(*args, **kwargs):
+            if attr == 'map':
+                args[0](Node(f'{self.name}.element', self.value))     # Trace the mapped function once
+            return Node(f'{self.name}.{attr}', self.value)
+        return method
+
+    def __call__(self, *args, **kwargs):
+        return Node(self.name, self.value)
+
+    def getInfo(self):
+        CALLS.append(self.name)
+        return self.value
+
+
+class Dictionary(Node):
+    def __init__(self, entries=None):
+        super().__init__('Dictionary')
+        self.entries = dict(entries or {})
+
+    def getInfo(self):
+        CALLS.append(self.name)
+        return _resolve(self)
+
+
+def _resolve(value):
+    if isinstance(value, Dictionary):
+        return {k: _resolve(v) for k, v in value.entries.items()}
+    if isinstance(value, Node):
+        return value.value
+    return value
+
+
+class _Namespace:
+    """ee.Filter, ee.Reducer, ... : any attribute is a Node constructor."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return Node(f'{self._name}.{attr}')
+
+
+class _Constructor(_Namespace):
+    """ee.Image(...), ee.Image.cat(...), ..."""
+
+    def __call__(self, *args, value=1, **kwargs):
+        return Node(self._name, value)
+
+
+Image = _Constructor('Image')
+ImageCollection = _Constructor('ImageCollection')
+FeatureCollection = _Constructor('FeatureCollection')
+Feature = _Constructor('Feature')
+Geometry = _Constructor('Geometry')
+Number = _Constructor('Number')
+List = _Constructor('List')
+Date = _Constructor('Date')
+Filter = _Namespace('Filter')
+Reducer = _Namespace('Reducer')
+Algorithms = _Namespace('Algorithms')
+Terrain = _Namespace('Terrain')
+
+
+class _Export:
+    table = _Namespace('Export.table')
+    image = _Namespace('Export.image')
+
+
+class batch:
+    Export = _Export
+    Task = _Constructor('Task')
+
+
+data = _Namespace('data')
+
+
+def Authenticate(**kwargs):
+    return True
+
+
+def Initialize(**kwargs):
+    pass
+
+
+def reset():
+    CALLS.clear()
@@ -0,0 +1,151 @@
+"""
+Resumable, revalidated downloads against a local http.server.
+"""
+
+import hashlib
+import json
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.pipeline import download
+
+FNAME = "NBAC_2020_20240530.zip"
+PAYLOAD = bytes(range(256)) * 64                # 16 KiB
+
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    """
+    Static files with an ETag, If-None-Match (304), Range (206 / 416) and
+    If-Range (200 on a stale validator). Request headers are recorded.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        path = self.translate_path(self.path)
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except (IsADirectoryError, FileNotFoundError):
+            return super().do_GET()                                       # Index listing / 404
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        status, start = 200, 0
+        if self.headers.get("Range") and self.headers.get("If-Range", etag) == etag:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "remote"
+    root.mkdir()
+    (root / FNAME).write_bytes(PAYLOAD)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(RangeHandler, directory=str(root)))
+    httpd.requests = []
+    httpd.root = root
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def dest(tmp_path):
+    path = tmp_path / "zips"
+    path.mkdir()
+    return path
+
+
+def etag_of(body):
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def read_meta(dest):
+    return json.loads((dest / f"{FNAME}.meta.json").read_text())
+
+
+def write_part(dest, body, part_etag):
+    (dest / f"{FNAME}.part").write_bytes(body)
+    (dest / f"{FNAME}.meta.json").write_text(json.dumps({"part_etag": part_etag}))
+
+
+def test_fresh_download(server, dest):
+    assert download.download_file(FNAME, dest, base_url=server.base_url) == "downloaded"
+
+    assert (dest / FNAME).read_bytes() == PAYLOAD
+    assert not (dest / f"{FNAME}.part").exists()
+    assert read_meta(dest)["etag"] == etag_of(PAYLOAD)
+
+
+def test_resume_truncated_part(server, dest):
+    write_part(dest, PAYLOAD[:5000], etag_of(PAYLOAD))
+
+    assert download.download_file(FNAME, dest, base_url=server.base_url) == "resumed"
+    assert (dest / FNAME).read_bytes() == PAYLOAD
+    assert server.requests[-1]["Range"] == "bytes=5000-"
+    assert read_meta(dest) == {"etag": etag_of(PAYLOAD)}
+
+
+def test_unchanged_file_not_modified(server, dest):
+    download.download_file(FNAME, dest, base_url=server.base_url)
+
+    assert download.download_file(FNAME, dest, base_url=server.base_url) == "unchanged"
+    assert server.requests[-1]["If-None-Match"] == etag_of(PAYLOAD)
+    assert (dest / FNAME).read_bytes() == PAYLOAD
+
+
+def test_stale_part_restarts_on_if_range(server, dest):
+    write_part(dest, b"x" * 5000, '"an-older-release"')
+
+    assert download.download_file(FNAME, dest, base_url=server.base_url) == "downloaded"
+    assert server.requests[-1]["If-Range"] == '"an-older-release"'
+    assert (dest / FNAME).read_bytes() == PAYLOAD                          # Not appended to the stale bytes
+
+
+def test_complete_part_416_keeps_validators(server, dest):
+    write_part(dest, PAYLOAD, etag_of(PAYLOAD))
+
+    assert download.download_file(FNAME, dest, base_url=server.base_url) == "resumed"
+    assert (dest / FNAME).read_bytes() == PAYLOAD
+    assert read_meta(dest) == {"etag": etag_of(PAYLOAD)}
+    assert download.download_file(FNAME, dest, base_url=server.base_url) == "unchanged"
+
+
+def test_download_nbac_latest_release_per_year(server, tmp_path):
+    (server.root / "NBAC_2020_20230101.zip").write_bytes(b"older release")
+    (server.root / "NBAC_summarystats_1972to2023_20240530.xlsx").write_bytes(b"stats")
+    raw_dir, zips_dir = tmp_path / "raw", tmp_path / "raw" / "zips"
+
+    results = download.download_nbac([2020, 2021], workers=2, base_url=server.base_url,
+                                     raw_dir=raw_dir, zips_dir=zips_dir)
+
+    assert results == {FNAME: "downloaded", "NBAC_summarystats_1972to2023_20240530.xlsx": "downloaded"}
+    assert (zips_dir / FNAME).read_bytes() == PAYLOAD
+    assert not (zips_dir / "NBAC_2020_20230101.zip").exists()
@@ -0,0 +1,125 @@
+"""
+ExportScheduler driven by the LocalBatch stand-in for ee.batch.
+"""
+
+import pytest
+
+from src.export_scheduler import ExportJournal, ExportScheduler, LocalBatch, combo_key
+
+COMBOS = [("Brandywine", year) for year in range(2018, 2022)]
+
+
+def make_scheduler(batch, journal_path, started=None, **kwargs):
+    """
+    Scheduler whose submit() starts a LocalTask per combo (recorded in
+    started) and whose sleeps are recorded instead of slept.
+    """
+    sleeps = []
+
+    def submit(combo):
+        if started is not None:
+            started.append(combo)
+        task = batch.create_task(combo_key(combo))
+        task.start()
+        return task
+
+    scheduler = ExportScheduler(
+        submit, journal_path, max_concurrent=2, attach=batch.get_task,
+        sleep=sleeps.append, rng=lambda: 0.5, **kwargs,
+    )
+    return scheduler, sleeps
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / "journal.json"
+
+
+def test_all_complete(journal_path):
+    scheduler, sleeps = make_scheduler(LocalBatch(polls=3), journal_path)
+
+    assert scheduler.run(COMBOS) == {c: "completed" for c in COMBOS}
+    assert sleeps == [scheduler.poll_interval] * 2 * len(COMBOS)          # Two RUNNING polls each
+    assert all(scheduler.journal.get(c)["attempts"] == 1 for c in COMBOS)
+
+
+def test_transient_failure_is_retried(journal_path):
+    flaky = combo_key(COMBOS[1])
+    batch = LocalBatch(polls=1, errors={flaky: [LocalBatch.TRANSIENT_ERROR, LocalBatch.TRANSIENT_ERROR]})
+    scheduler, sleeps = make_scheduler(batch, journal_path, backoff_base=10, backoff_cap=600)
+
+    assert scheduler.run(COMBOS) == {c: "completed" for c in COMBOS}
+    assert scheduler.journal.get(COMBOS[1])["attempts"] == 3
+    assert sorted(sleeps) == [5.0, 10.0]                                 # Jittered 10 s, then 20 s
+    assert all(scheduler.journal.get(c)["attempts"] == 1 for c in COMBOS if c != COMBOS[1])
+
+
+def test_transient_failures_give_up_after_max_attempts(journal_path):
+    flaky = combo_key(COMBOS[0])
+    batch = LocalBatch(polls=1, errors={flaky: [LocalBatch.TRANSIENT_ERROR] * 5})
+    scheduler, _ = make_scheduler(batch, journal_path, max_attempts=3)
+
+    assert scheduler.run(COMBOS)[COMBOS[0]] == "failed"
+    assert scheduler.journal.get(COMBOS[0])["attempts"] == 3
+
+
+def test_fatal_failure_is_not_retried(journal_path):
+    broken = combo_key(COMBOS[2])
+    batch = LocalBatch(polls=1, errors={broken: [LocalBatch.FATAL_ERROR]})
+    scheduler, sleeps = make_scheduler(batch, journal_path)
+
+    states = scheduler.run(COMBOS)
+    assert states[COMBOS[2]] == "failed"
+    assert scheduler.journal.get(COMBOS[2])["attempts"] == 1
+    assert scheduler.journal.get(COMBOS[2])["error"] == LocalBatch.FATAL_ERROR
+    assert all(states[c] == "completed" for c in COMBOS if c != COMBOS[2])
+    assert sleeps == []
+
+
+def test_transient_submit_error_is_retried(journal_path):
+    batch = LocalBatch(polls=1)
+    calls = []
+
+    def submit(combo):
+        calls.append(combo)
+        if len(calls) == 1:
+            raise RuntimeError("Too many concurrent aggregations.")
+        task = batch.create_task(combo_key(combo))
+        task.start()
+        return task
+
+    scheduler = ExportScheduler(submit, journal_path, sleep=lambda s: None, rng=lambda: 0.0)
+    assert scheduler.run(COMBOS[:1]) == {COMBOS[0]: "completed"}
+    assert calls == [COMBOS[0], COMBOS[0]]
+
+
+def test_skipped_combo(journal_path):
+    scheduler = ExportScheduler(lambda combo: None, journal_path, sleep=lambda s: None)
+    assert scheduler.run(COMBOS[:1]) == {COMBOS[0]: "skipped"}
+
+
+def test_rerun_resubmits_only_failed_combos(journal_path):
+    broken = combo_key(COMBOS[2])
+    batch = LocalBatch(polls=1, errors={broken: [LocalBatch.FATAL_ERROR]})
+    first, _ = make_scheduler(batch, journal_path)
+    assert first.run(COMBOS)[COMBOS[2]] == "failed"
+
+    # Fresh scheduler on the same journal: the fixed combo is the only one started
+    started = []
+    rerun, _ = make_scheduler(batch, journal_path, started=started)
+    assert rerun.journal.pending(COMBOS) == [COMBOS[2]]
+    assert rerun.run(COMBOS) == {c: "completed" for c in COMBOS}
+    assert started == [COMBOS[2]]
+
+
+def test_rerun_reattaches_running_task(journal_path):
+    batch = LocalBatch(polls=2)
+    task = batch.create_task(combo_key(COMBOS[0]))
+    task.start()
+    ExportJournal(journal_path).update(COMBOS[0], state="running", attempts=1, task_id=task.id)
+
+    started = []
+    scheduler, _ = make_scheduler(batch, journal_path, started=started)
+    assert scheduler.run(COMBOS[:1]) == {COMBOS[0]: "completed"}
+    assert started == []                                                  # Polled, not resubmitted
+    assert scheduler.journal.get(COMBOS[0])["attempts"] == 1
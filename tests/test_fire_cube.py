@@ -0,0 +1,55 @@
+"""
+Fire cube: distinct-fire year / cause totals and (region, subregion) cells.
+"""
+
+import pandas as pd
+import pytest
+
+from src import fire_cube
+
+
+@pytest.fixture
+def fire_stats():
+    """Fire 1 crosses two subregions; 'North' exists in two regions."""
+    return pd.DataFrame({
+        'gid': ['2020_1', '2020_1', '2020_2', '2021_3'],
+        'fireid': [1, 1, 2, 3],
+        'year': [2020, 2020, 2020, 2021],
+        'cause': ['L', 'L', 'H', 'L'],
+        'region': ['Coast', 'Coast', 'Rockies', 'Coast'],
+        'subregion': ['North', 'South', 'North', 'North'],
+        'subreg_ha': [60.0, 40.0, 5.0, 20.0],
+        'tot_adj_ha': [100.0, 100.0, 5.0, 20.0],
+    })
+
+
+@pytest.fixture
+def cube(fire_stats, tmp_path):
+    fire_cube.refresh_cube(fire_stats, tmp_path)
+    return fire_cube.load_cube(tmp_path)
+
+
+def test_year_and_cause_totals_count_each_fire_once(cube):
+    by_year = fire_cube.summarize_cube(cube, by='year').set_index('year')
+    assert by_year.loc[2020, 'n_fires'] == 2
+    assert by_year.loc[2020, 'tot_adj_ha'] == 105.0
+    assert by_year.loc[2020, 'subreg_ha'] == 105.0
+
+    by_cause = fire_cube.summarize_cube(cube, by='cause').set_index('cause')
+    assert by_cause.loc['L', 'n_fires'] == 2
+    assert by_cause.loc['L', 'tot_adj_ha'] == 120.0
+    assert by_cause.loc['L', 'largest_fire_ha'] == 100.0
+
+
+def test_subregions_are_keyed_on_region(cube):
+    by_subregion = fire_cube.summarize_cube(cube, by='subregion').set_index(['region', 'subregion'])
+    assert by_subregion.loc[('Coast', 'North'), 'n_fires'] == 2
+    assert by_subregion.loc[('Rockies', 'North'), 'n_fires'] == 1
+    assert by_subregion.loc[('Coast', 'South'), 'subreg_ha'] == 40.0
+
+
+def test_refresh_reuses_unchanged_years(fire_stats, tmp_path):
+    fire_cube.refresh_cube(fire_stats, tmp_path)
+    changed = fire_stats.assign(subreg_ha=fire_stats['subreg_ha'].where(fire_stats['year'] != 2021, 25.0))
+
+    assert fire_cube.refresh_cube(changed, tmp_path) == {2020: 'reused', 2021: 'rebuilt'}
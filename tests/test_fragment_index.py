@@ -0,0 +1,61 @@
+"""
+Fragment index: R-tree and key queries against brute force.
+"""
+
+import numpy as np
+import pytest
+import shapely
+
+from src.fragment_index import FragmentIndex, build_fragment_index
+from src.synthetic_data import synthetic_fires
+
+
+@pytest.fixture(scope="module")
+def fragments():
+    fires = synthetic_fires([2019, 2020, 2021], fires_per_year=300).reset_index(drop=True)
+    rng = np.random.default_rng(0)
+    fires["subregion"] = rng.choice(["North Rockies", "Kootenay Boundary", "South Coast"], len(fires))
+    fires["region"] = fires["subregion"].str.split().str[0]
+    return fires
+
+
+@pytest.fixture(scope="module", params=[2, 16])
+def index(fragments, tmp_path_factory, request):
+    index_dir = tmp_path_factory.mktemp("index") / f"fanout_{request.param}"
+    return FragmentIndex(build_fragment_index(fragments, index_dir, fanout=request.param))
+
+
+def windows(fires):
+    xmin, ymin, xmax, ymax = fires.total_bounds
+    w, h = xmax - xmin, ymax - ymin
+    return [
+        (xmin, ymin, xmin + w / 4, ymin + h / 4),
+        (xmin + w / 3, ymin + h / 3, xmin + w / 2, ymin + h / 2),
+        (xmin - 10 * w, ymin, xmin - 9 * w, ymax),           # Outside every fragment
+        (xmin, ymin, xmax, ymax),
+    ]
+
+
+def test_bbox_query_matches_brute_force(fragments, index):
+    geoms = fragments.geometry.values
+    boxes = shapely.box(*shapely.bounds(geoms).T)
+    for window in windows(fragments):
+        box = shapely.box(*window)
+        rows = index.query(bbox=window)
+        np.testing.assert_array_equal(rows, np.flatnonzero(shapely.intersects(boxes, box)))
+
+        hits = rows[shapely.intersects(index.geometries(rows), box)]
+        np.testing.assert_array_equal(hits, np.flatnonzero(shapely.intersects(geoms, box)))
+
+
+def test_key_and_bbox_filters_combine(fragments, index):
+    window = windows(fragments)[1]
+    rows = index.query(subregion="Kootenay Boundary", years=(2020, 2021), bbox=window)
+
+    mask = (
+        (fragments["subregion"] == "Kootenay Boundary")
+        & fragments["year"].between(2020, 2021)
+        & shapely.intersects(shapely.box(*shapely.bounds(fragments.geometry.values).T), shapely.box(*window))
+    )
+    np.testing.assert_array_equal(rows, np.flatnonzero(mask))
+    assert index.frame(rows)["gid"].tolist() == fragments.loc[mask, "gid"].tolist()
@@ -0,0 +1,79 @@
+"""
+Merge stage on synthetic NBAC zips.
+"""
+
+import pytest
+
+from src.nbac_io import read_fires
+from src.pipeline.merge import merge_nbac
+from src.synthetic_data import synthetic_fires, write_nbac_zips
+
+
+@pytest.fixture
+def zip_dir(tmp_path):
+    write_nbac_zips(synthetic_fires([2020, 2021], fires_per_year=5), tmp_path / "zips")
+    return tmp_path / "zips"
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_no_zips(tmp_path, stream):
+    with pytest.raises(FileNotFoundError, match="No NBAC"):
+        merge_nbac(tmp_path, tmp_path / "out", reference_year=2020, stream=stream)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_no_requested_years(zip_dir, tmp_path, stream):
+    with pytest.raises(ValueError, match=r"\[1999\]"):
+        merge_nbac(zip_dir, tmp_path / "out", reference_year=2020, years=[1999], stream=stream)
+
+
+def stream_merge(zip_dir, out_dir, **kwargs):
+    return merge_nbac(zip_dir, out_dir, reference_year=2020, stream=True, workers=1, **kwargs)
+
+
+def test_stream_exports_use_selected_years(zip_dir, tmp_path):
+    paths = stream_merge(zip_dir, tmp_path / "out", years=[2021])
+
+    assert paths["parquet"].name == "Canada_fires_parquet"
+    assert paths["GeoJSON"].name == "Canada_fires_2021_2021.geojson"
+    assert paths["status"] == {2021: "rebuilt"}
+
+
+def test_stream_reuses_unchanged_years(zip_dir, tmp_path):
+    stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+    paths = stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+
+    assert paths["status"] == {2020: "reused", 2021: "reused"}
+
+
+def test_stream_rebuilds_only_the_changed_year(zip_dir, tmp_path):
+    stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+    write_nbac_zips(synthetic_fires([2021], fires_per_year=7, seed=1), zip_dir)
+    paths = stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+
+    assert paths["status"] == {2020: "reused", 2021: "rebuilt"}
+    assert len(read_fires(paths["parquet"])) == 12
+
+
+def test_stream_new_year_keeps_the_dataset(zip_dir, tmp_path):
+    first = stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+    write_nbac_zips(synthetic_fires([2022], fires_per_year=3), zip_dir)
+    paths = stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+
+    assert paths["parquet"] == first["parquet"]
+    assert paths["status"] == {2020: "reused", 2021: "reused", 2022: "rebuilt"}
+
+
+def test_stream_force_rebuilds_every_year(zip_dir, tmp_path):
+    stream_merge(zip_dir, tmp_path / "out", stream_export_files=False)
+    paths = stream_merge(zip_dir, tmp_path / "out", stream_export_files=False, force=True)
+
+    assert paths["status"] == {2020: "rebuilt", 2021: "rebuilt"}
+
+
+def test_in_memory_and_stream_merges_agree(zip_dir, tmp_path):
+    in_memory = read_fires(merge_nbac(zip_dir, tmp_path / "mem", reference_year=2020, workers=1)["parquet"])
+    streamed = read_fires(stream_merge(zip_dir, tmp_path / "stream", stream_export_files=False)["parquet"])
+
+    assert set(in_memory.columns) == set(streamed.columns)
+    assert in_memory.sort_values("gid")["fireid"].tolist() == streamed.sort_values("gid")["fireid"].tolist()
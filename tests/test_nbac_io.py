@@ -0,0 +1,99 @@
+"""
+NBAC readers and writers: preflight column plan, compact dtypes, GeoParquet
+bbox covering and partitioned dataset schema.
+"""
+
+import json
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import shapely
+
+from src import nbac_io
+from src.synthetic_data import synthetic_fires, write_nbac_zips
+
+
+@pytest.fixture
+def uneven_years():
+    """A 50-fire year (fireid fits int8) next to a 300-fire year (needs int16)."""
+    return {
+        2020: synthetic_fires([2020], fires_per_year=50),
+        2021: synthetic_fires([2021], fires_per_year=300, seed=1),
+    }
+
+
+def test_partitions_share_one_schema(uneven_years, tmp_path):
+    for year, gdf in uneven_years.items():
+        nbac_io.write_year_partition(gdf, tmp_path, year, f"NBAC_{year}_20240530")
+
+    schemas = [pq.read_schema(p) for p in sorted(tmp_path.glob("year=*/*.parquet"))]
+    assert schemas[0].remove_metadata() == schemas[1].remove_metadata()
+    assert schemas[0].field("fireid").type == "int32"
+
+    fires = nbac_io.read_fires(tmp_path)
+    assert len(fires) == 350
+    assert fires.groupby("year")["fireid"].max().to_dict() == {2020: 50, 2021: 300}
+
+
+def test_single_file_writer_compacts(uneven_years, tmp_path):
+    path = nbac_io.write_fires_parquet(pd.concat(uneven_years.values()).reset_index(drop=True), tmp_path / "fires.parquet")
+
+    assert pq.read_schema(path).field("fireid").type == "int16"
+
+
+def test_plan_columns_fills_missing_year_from_source_name():
+    plan = nbac_io.plan_columns(['GID', 'FIREID', 'ADJ_HA'], name='NBAC_2019_20240530')
+
+    assert plan['rename'] == {'GID': 'gid', 'FIREID': 'fireid', 'ADJ_HA': 'adj_ha'}
+    assert plan['fill']['year'] == 2019
+    assert plan['fill']['cause'] is None
+    assert set(plan['missing']) == {'year', 'prov_terr', 'natpark', 'cause'}
+
+
+def test_preflight_aligns_aliased_and_missing_fields(tmp_path):
+    fires = synthetic_fires([2019, 2020], fires_per_year=5)
+    write_nbac_zips(fires[fires['year'] == 2019].drop(columns='natpark'), tmp_path)   # Old names, no NATPARK
+    write_nbac_zips(fires[fires['year'] == 2020], tmp_path)
+    sources = nbac_io.list_nbac_sources(tmp_path)
+
+    preflight = nbac_io.preflight_nbac_sources(sources, reference_year=2020)
+    old = next(k for k in sources if k.startswith('NBAC_2019'))
+    assert 'NATPARK' in preflight['drift'][old]['missing']
+    assert preflight['plans'][old]['fill'] == {'natpark': None}
+
+    layer = nbac_io.read_nbac_layer(sources[old], plan=preflight['plans'][old])
+    assert list(layer.columns) == nbac_io.NBAC_ANALYSIS_COLUMNS
+    assert layer['fireid'].tolist() == fires.loc[fires['year'] == 2019, 'fireid'].tolist()
+    assert layer['natpark'].isna().all()
+
+
+def test_compact_fire_dtypes_picks_smallest_widths():
+    df = pd.DataFrame({
+        'fireid': pd.array([1, 300, None], dtype='Int64'),
+        'year': [2020, 2021, 2022],
+        'cause': ['H', 'N', 'H'],
+    })
+    out = nbac_io.compact_fire_dtypes(df)
+
+    assert out['fireid'].dtype == 'Int16'                  # Nullable kept for the missing id
+    assert out['year'].dtype == 'int16'
+    assert isinstance(out['cause'].dtype, pd.CategoricalDtype)
+
+
+def test_geoparquet_bbox_covering_round_trip(tmp_path):
+    fires = synthetic_fires([2020], fires_per_year=100)
+    path = nbac_io.write_fires_parquet(fires, tmp_path / 'fires.parquet')
+
+    geo = json.loads(pq.read_schema(path).metadata[b'geo'])
+    assert 'bbox' in pq.read_schema(path).names
+    assert geo['columns']['geometry']['covering']['bbox']['xmin'] == ['bbox', 'xmin']
+
+    xmin, ymin, xmax, ymax = fires.total_bounds
+    window = (xmin, ymin, (xmin + xmax) / 2, (ymin + ymax) / 2)
+    row_boxes = shapely.box(*fires.bounds.to_numpy().T)         # The reader filters on each row's bbox
+    expected = fires.loc[shapely.intersects(row_boxes, shapely.box(*window)), 'gid']
+
+    subset = nbac_io.read_fires(path, bbox=window)
+    assert 0 < len(subset) < len(fires)
+    assert set(subset['gid']) == set(expected)
@@ -0,0 +1,60 @@
+"""
+Parallel overlay against the serial engine, including empty inputs.
+"""
+
+import geopandas as gpd
+import pytest
+import shapely
+
+from src.overlay import overlay_fires_regions, parallel_overlay_fires_regions, partition_fires
+
+CRS = "ESRI:102001"
+
+
+@pytest.fixture
+def regions():
+    return gpd.GeoDataFrame(
+        {"subregion": ["West", "East"]},
+        geometry=[shapely.box(0, 0, 10, 10), shapely.box(10, 0, 20, 10)],
+        crs=CRS,
+    )
+
+
+@pytest.fixture
+def fires():
+    return gpd.GeoDataFrame(
+        {"fire_id": [1, 2, 3, 4], "year": [2018, 2019, 2020, 2021]},
+        geometry=[
+            shapely.box(1, 1, 3, 3),                                      # Inside West
+            shapely.box(8, 2, 12, 4),                                     # Crosses West / East
+            shapely.box(15, 5, 16, 6),                                    # Inside East
+            shapely.box(30, 30, 31, 31),                                  # Outside both
+        ],
+        crs=CRS,
+    )
+
+
+@pytest.mark.parametrize("by", ["tile", "year"])
+def test_parallel_matches_serial(fires, regions, by):
+    serial = overlay_fires_regions(fires, regions)
+    parallel = parallel_overlay_fires_regions(fires, regions, partitions=4, workers=1, by=by)
+
+    assert list(parallel.columns) == list(serial.columns)
+    assert parallel[["fire_id", "subregion"]].values.tolist() == serial[["fire_id", "subregion"]].values.tolist()
+    assert shapely.equals(parallel.geometry.values, serial.geometry.values).all()
+
+
+@pytest.mark.parametrize("by", ["tile", "year"])
+def test_partition_no_fires(fires, by):
+    assert partition_fires(fires.iloc[:0], 4, by=by) == []
+
+
+@pytest.mark.parametrize("empty", ["fires", "regions"])
+def test_parallel_empty_input(fires, regions, empty):
+    inputs = {"fires": fires, "regions": regions}
+    inputs[empty] = inputs[empty].iloc[:0]
+
+    result = parallel_overlay_fires_regions(inputs["fires"], inputs["regions"], workers=2)
+
+    assert result.empty
+    assert list(result.columns) == list(overlay_fires_regions(fires, regions).columns)
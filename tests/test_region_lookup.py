@@ -0,0 +1,60 @@
+"""
+Subregion -> province lookup: area-weighted majority and rebuild on change.
+"""
+
+import geopandas as gpd
+import pytest
+import shapely
+
+from src.projection import WORKING_CRS
+from src.region_lookup import load_subregion_province_lookup
+
+KM = 1000
+
+
+@pytest.fixture
+def boundaries(tmp_path):
+    """Two provinces split at x = 0; 'Border' lies 30% west / 70% east of it."""
+    provinces = gpd.GeoDataFrame({
+        'PRENAME': ['British Columbia', 'Alberta'],
+        'geometry': [shapely.box(-500 * KM, 0, 0, 500 * KM), shapely.box(0, 0, 500 * KM, 500 * KM)],
+    }, crs=WORKING_CRS)
+    subregions = gpd.GeoDataFrame({
+        'polygon_name': ['Coast', 'Border', 'Foothills'],
+        'reference_region': ['West', 'Rockies', 'East'],
+        'geometry': [
+            shapely.box(-400 * KM, 100 * KM, -200 * KM, 300 * KM),
+            shapely.box(-30 * KM, 100 * KM, 70 * KM, 300 * KM),
+            shapely.box(200 * KM, 100 * KM, 400 * KM, 300 * KM),
+        ],
+    }, crs=WORKING_CRS)
+    paths = {'avcan': tmp_path / 'avcan.geojson', 'provinces': tmp_path / 'provinces.geojson'}
+    subregions.to_file(paths['avcan'])
+    provinces.to_file(paths['provinces'])
+    return paths
+
+
+def test_border_subregion_goes_to_majority_province(boundaries, tmp_path):
+    lookup = load_subregion_province_lookup(boundaries['avcan'], boundaries['provinces'], tmp_path / 'lookup.csv')
+    lookup = lookup.set_index('subregion')
+
+    assert lookup.loc['Coast', 'prov_terr'] == 'British Columbia'
+    assert lookup.loc['Foothills', 'prov_terr'] == 'Alberta'
+    assert lookup.loc['Border', 'prov_terr'] == 'Alberta'
+    assert lookup.loc['Border', 'prov_share'] == pytest.approx(0.7)
+    assert lookup.loc['Border', 'n_provinces'] == 2
+    assert lookup.loc['Coast', 'n_provinces'] == 1
+
+
+def test_lookup_rebuilds_only_when_a_boundary_changes(boundaries, tmp_path, capsys):
+    args = (boundaries['avcan'], boundaries['provinces'], tmp_path / 'lookup.csv')
+    load_subregion_province_lookup(*args)
+    capsys.readouterr()
+
+    load_subregion_province_lookup(*args)
+    assert 'rebuilding' not in capsys.readouterr().out
+
+    gpd.read_file(boundaries['provinces']).assign(PRENAME=['BC', 'AB']).to_file(boundaries['provinces'])
+    lookup = load_subregion_province_lookup(*args)
+    assert 'rebuilding' in capsys.readouterr().out
+    assert set(lookup['prov_terr']) == {'BC', 'AB'}
@@ -0,0 +1,137 @@
+"""
+Round trips per (subregion, fire year) combo and footprint-tile composites,
+against the fake ee client.
+"""
+
+import sys
+
+import pytest
+
+import fake_ee
+from src import severe_burns_ee
+from src.composite_cache import CompositeCache
+from src.export_scheduler import ExportJournal
+
+COMBOS = [("Brandywine", year) for year in range(2018, 2023)]
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch):
+    monkeypatch.setitem(sys.modules, "ee", fake_ee)
+    monkeypatch.setattr(severe_burns_ee, "ee", fake_ee)
+    severe_burns_ee.ROUND_TRIPS.clear()
+    fake_ee.reset()
+    yield fake_ee
+    severe_burns_ee.ROUND_TRIPS.clear()
+
+
+def fires(value=1):
+    return fake_ee.FeatureCollection("fires", value=value)
+
+
+def test_batched_summaries_one_round_trip():
+    summaries = severe_burns_ee.fetch_combo_summaries(COMBOS, fires())
+
+    assert set(summaries) == set(COMBOS)
+    assert set(summaries[COMBOS[0]]) == {"n_fires", "s2_count", "pre_count", "post_count", "n_patches"}
+    assert severe_burns_ee.ROUND_TRIPS == {"summary": 1}
+    assert fake_ee.CALLS == ["Dictionary"]
+
+
+@pytest.mark.parametrize("batch_size, round_trips", [(1, 5), (2, 3), (5, 1), (10, 1)])
+def test_summary_batches(batch_size, round_trips):
+    severe_burns_ee.fetch_combo_summaries(COMBOS, fires(), batch_size=batch_size)
+
+    assert severe_burns_ee.ROUND_TRIPS == {"summary": round_trips}
+    assert len(fake_ee.CALLS) == round_trips
+
+
+def test_batched_run_adds_only_task_starts():
+    summaries = severe_burns_ee.fetch_combo_summaries(COMBOS, fires())
+    for combo in COMBOS:
+        before = sum(severe_burns_ee.ROUND_TRIPS.values())
+        assert severe_burns_ee.run_subregion_year(*combo, fires(), summaries[combo]) is not None
+        assert sum(severe_burns_ee.ROUND_TRIPS.values()) - before == 1       # task.start only
+
+    assert severe_burns_ee.ROUND_TRIPS == {"summary": 1, "task.start": len(COMBOS)}
+
+
+def test_unbatched_run_two_round_trips_per_combo():
+    for combo in COMBOS:
+        before = severe_burns_ee.ROUND_TRIPS.copy()
+        severe_burns_ee.run_subregion_year(*combo, fires())
+        delta = severe_burns_ee.ROUND_TRIPS - before
+        assert delta == {"summary": 1, "task.start": 1}
+
+    assert severe_burns_ee.ROUND_TRIPS == {"summary": len(COMBOS), "task.start": len(COMBOS)}
+
+
+def test_skipped_combo_starts_no_task():
+    assert severe_burns_ee.run_subregion_year("Brandywine", 2020, fires(value=0)) is None
+    assert severe_burns_ee.ROUND_TRIPS == {"summary": 1}
+
+
+SIZE = severe_burns_ee.FOOTPRINT_TILE * severe_burns_ee.vectScale         # Footprint tile side (m)
+
+
+@pytest.fixture
+def avcan_fires():
+    import geopandas as gpd
+    import shapely
+
+    return gpd.GeoDataFrame(
+        {"subregion": ["A", "A", "B", "B"], "year": [2020, 2021, 2020, 2020]},
+        geometry=[
+            shapely.box(100, 100, 900, 900),                              # Tile (0, 0)
+            shapely.box(100, 100, 900, 900),
+            shapely.box(SIZE - 500, 200, SIZE + 500, 800),                 # Tiles (0, 0) and (1, 0)
+            shapely.box(5 * SIZE + 10, 10, 5 * SIZE + 20, 20),            # Tile (5, 0)
+        ],
+        crs=severe_burns_ee.WORKING_CRS,
+    )
+
+
+class RecordingScheduler:
+    def __init__(self, journal_path):
+        self.journal = ExportJournal(journal_path)
+        self.submitted = []
+
+    def run(self, windows):
+        self.submitted.append(list(windows))
+        return {w: "completed" for w in windows}
+
+
+def test_overlapping_subregions_share_tiles(avcan_fires):
+    tiles = severe_burns_ee.combo_tiles(avcan_fires, [("A", 2020), ("B", 2020)])
+
+    assert tiles == {("A", 2020): [(0, 0)], ("B", 2020): [(0, 0), (1, 0), (5, 0)]}
+    assert severe_burns_ee.ROUND_TRIPS == {}
+
+
+def test_composites_built_once_per_tile_window(avcan_fires, tmp_path, monkeypatch):
+    monkeypatch.setattr(severe_burns_ee, "asset_bytes", lambda asset_id: 100)
+    combos = [("A", 2020), ("B", 2020), ("A", 2021)]
+    tiles = severe_burns_ee.combo_tiles(avcan_fires, combos)
+    cache = CompositeCache(tmp_path / "cache.json", budget_mb=1)
+    scheduler = RecordingScheduler(tmp_path / "journal.json")
+
+    severe_burns_ee.build_composites(combos, tiles, cache, scheduler)
+    windows = scheduler.submitted[0]
+    assert len(windows) == len(set(windows))
+    assert {w[:2] for w in windows} == {(0, 0), (1, 0), (5, 0)}
+
+    severe_burns_ee.build_composites(combos, tiles, cache, scheduler)
+    assert scheduler.submitted[1] == []                                   # All cached
+
+
+def test_median_nbr_needs_every_tile_cached(tmp_path):
+    cache = CompositeCache(tmp_path / "cache.json", budget_mb=1)
+    key = severe_burns_ee.nbr_composite_key(0, 0, "2020-06-01", "2020-09-30")
+    cache.put(key, severe_burns_ee.composite_asset_id(key), 100)
+    coll = fake_ee.ImageCollection("s2")
+
+    cached = severe_burns_ee.median_nbr(coll, [(0, 0)], "2020-06-01", "2020-09-30", cache)
+    moved = severe_burns_ee.median_nbr(coll, [(0, 0), (1, 0)], "2020-06-01", "2020-09-30", cache)
+
+    assert cached.name == "ImageCollection.mosaic.select"
+    assert moved.name == "ImageCollection.select.median"                  # A changed footprint misses the cache
@@ -0,0 +1,52 @@
+"""
+Local severity engine: grid padding for patch sizes and the CLI.
+"""
+
+import numpy as np
+import pytest
+
+from src import severity_local
+from src.severity_local import big_patch_mask, patch_bounds
+
+MIN_PIXELS = 20
+HIGH = 1.0
+
+
+def test_patch_bounds_pad():
+    assert patch_bounds((0, 0, 300, 300), MIN_PIXELS, scale=30) == (-600, -600, 900, 900)
+    assert patch_bounds((0, 0, 1, 1), 10 ** 6, scale=1) == (-1024, -1024, 1025, 1025)   # Capped at MAX_PATCH_PIXELS
+
+
+def test_straddling_patch_needs_pad():
+    dnbr = np.zeros((60, 60))
+    dnbr[30, 15:45] = HIGH                                                # 30-pixel line across the edge at col 30
+    r0, r1, c0, c1 = 20, 40, 20, 30                                       # Fires' extent: 10 of the 30 pixels
+    xmin, _, _, _ = patch_bounds((c0, 0, c1, 1), MIN_PIXELS, scale=1)
+    pad = c0 - int(xmin)
+
+    clipped = big_patch_mask(dnbr[r0:r1, c0:c1], HIGH, MIN_PIXELS)
+    padded = big_patch_mask(dnbr[r0 - pad:r1 + pad, c0 - pad:c1 + pad], HIGH, MIN_PIXELS)[pad:-pad, pad:-pad]
+
+    assert not clipped.any()                                              # Clipped patch looks too small
+    assert np.array_equal(padded, big_patch_mask(dnbr, HIGH, MIN_PIXELS)[r0:r1, c0:c1])
+    assert padded.sum() == 10
+
+
+def test_padded_mask_matches_unclipped_image():
+    rng = np.random.default_rng(0)
+    dnbr = (rng.random((200, 200)) < 0.55).astype(float)                  # Near the percolation threshold
+    r0, r1, c0, c1 = 70, 130, 60, 140
+    pad = c0 - int(patch_bounds((c0, r0, c1, r1), MIN_PIXELS, scale=1)[0])
+
+    padded = big_patch_mask(dnbr[r0 - pad:r1 + pad, c0 - pad:c1 + pad], HIGH, MIN_PIXELS)[pad:-pad, pad:-pad]
+    assert np.array_equal(padded, big_patch_mask(dnbr, HIGH, MIN_PIXELS)[r0:r1, c0:c1])
+
+
+def test_main_without_fires_exits_with_message(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(severity_local, "processed_dir", tmp_path)
+
+    with pytest.raises(SystemExit) as exit_info:
+        severity_local.main(["--scenes", str(tmp_path), "--dem", str(tmp_path / "dem.tif")])
+
+    assert exit_info.value.code == 2
+    assert "no AvCan_fires_* output" in capsys.readouterr().err
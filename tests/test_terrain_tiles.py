@@ -0,0 +1,49 @@
+"""
+Tiled terrain build against the single on-the-fly pass.
+"""
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from src import terrain_tiles
+from src.projection import WORKING_CRS
+from src.raster_grid import analysis_grid
+
+SCALE = 30.0
+ORIGIN = (-1_950_000.0, 1_200_000.0)            # Southern BC, far from the Albers central meridian
+
+
+@pytest.fixture
+def dem_path(tmp_path):
+    rows, cols = np.mgrid[0:40, 0:50]
+    elev = (1500 + 40 * np.sin(rows / 6) + 25 * np.cos(cols / 4) + 3 * rows).astype(np.float32)
+    path = tmp_path / "dem.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=50, height=40, count=1, dtype="float32",
+                       crs=WORKING_CRS, transform=from_origin(*ORIGIN, SCALE, SCALE)) as dst:
+        dst.write(elev, 1)
+    return path
+
+
+def test_pixel_convergence_varies_across_grid():
+    grid = analysis_grid((ORIGIN[0], ORIGIN[1] - 40 * SCALE, ORIGIN[0] + 50 * SCALE, ORIGIN[1]), SCALE, WORKING_CRS)
+    convergence = terrain_tiles.pixel_convergence(grid)
+
+    assert convergence.shape == (grid["height"], grid["width"])
+    assert np.ptp(convergence[0]) > 0                                     # Changes along a row
+    window = Window(7, 7, 7, 7)
+    assert np.array_equal(terrain_tiles.pixel_convergence(grid, window), convergence[7:14, 7:14])
+
+
+def test_tiles_match_single_pass(dem_path, tmp_path):
+    tiles_dir = terrain_tiles.build_terrain_tiles(dem_path, tmp_path / "tiles", scale=SCALE, tile=7, workers=2)
+    tiles = terrain_tiles.TerrainTiles(tiles_dir)
+    with rasterio.open(dem_path) as src:
+        grid = analysis_grid(src.bounds, SCALE, WORKING_CRS)
+    single = terrain_tiles.terrain_layers(dem_path, grid)
+
+    tiled = tiles.window(grid)
+    for name in terrain_tiles.TERRAIN_LAYERS:
+        np.testing.assert_array_equal(tiled[name], single[name], err_msg=name)
@@ -0,0 +1,85 @@
+"""
+Span tracing: JSON-lines records, Chrome trace events, nesting and the
+no-op span while tracing is off.
+"""
+
+import atexit
+import json
+from collections import Counter
+
+import pytest
+
+from src import tracing
+from src.synthetic_data import synthetic_fires
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, '_TRACER', None)            # Restored (off) after the test
+    tracer = tracing.enable_tracing(tmp_path, run_id='test')
+    yield tracer
+    atexit.unregister(tracer.close)
+    tracer._jsonl.close()
+
+
+def read_records(tracer):
+    return {r['name']: r for r in map(json.loads, tracer.jsonl_path.read_text().splitlines())}
+
+
+def test_span_is_noop_while_tracing_is_off(monkeypatch):
+    monkeypatch.setattr(tracing, '_TRACER', None)
+
+    assert not tracing.tracing_enabled()
+    assert tracing.span('read', path='x') is tracing.NOOP_SPAN
+    with tracing.span('read') as s:
+        assert s.count(rows=3) is tracing.NOOP_SPAN
+
+
+def test_span_records_and_chrome_trace(tracer):
+    fires = synthetic_fires([2020], fires_per_year=10)
+    round_trips = Counter()
+    with tracing.span('read', counter=round_trips, path='fires.parquet') as s:
+        round_trips['getInfo'] += 2
+        s.count(fires)
+    with pytest.raises(ValueError):
+        with tracing.span('fail'):
+            raise ValueError('boom')
+    tracer.close()
+
+    records = read_records(tracer)
+    read = records['read']
+    assert read['run_id'] == 'test'
+    assert read['status'] == 'ok'
+    assert read['rows'] == 10
+    assert read['vertices'] == tracing.count_vertices(fires)
+    assert read['round_trips'] == 2
+    assert read['round_trips_by_label'] == {'getInfo': 2}
+    assert read['path'] == 'fires.parquet'
+    assert {'wall_s', 'cpu_s', 'rss_delta_mb', 'peak_rss_mb', 'rows_per_s'} <= set(read)
+    assert records['fail']['status'] == 'error'
+    assert records['fail']['error'] == 'ValueError: boom'
+
+    events = json.loads(tracer.chrome_path.read_text())['traceEvents']
+    spans = {e['name']: e for e in events if e['ph'] == 'X'}
+    assert set(spans) == {'read', 'fail'}
+    assert spans['read']['dur'] >= 0
+    assert spans['read']['args']['rows'] == 10
+    assert any(e['ph'] == 'M' and e['tid'] == spans['read']['tid'] for e in events)
+
+
+def test_nested_spans_record_parent_and_depth(tracer):
+    @tracing.traced()
+    def inner():
+        with tracing.span('leaf'):
+            pass
+
+    with tracing.span('stage'):
+        inner()
+    with tracing.span('next'):
+        pass
+
+    records = read_records(tracer)
+    assert (records['stage']['parent'], records['stage']['depth']) == (None, 0)
+    assert (records['inner']['parent'], records['inner']['depth']) == ('stage', 1)
+    assert (records['leaf']['parent'], records['leaf']['depth']) == ('inner', 2)
+    assert (records['next']['parent'], records['next']['depth']) == (None, 0)
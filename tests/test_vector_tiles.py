@@ -0,0 +1,63 @@
+"""
+Vector tile pyramid: only tiles with features are encoded, and tiles match
+mapbox_vector_tile's own quantization.
+"""
+
+import gzip
+
+import pytest
+import shapely
+
+mapbox_vector_tile = pytest.importorskip("mapbox_vector_tile")
+
+from src import vector_tiles
+from src.synthetic_data import synthetic_fires
+
+
+@pytest.fixture
+def fires():
+    return synthetic_fires([2020], fires_per_year=200).to_crs(3857)
+
+
+@pytest.mark.parametrize("z", [3, 8, 11])
+def test_occupied_tiles_are_the_non_empty_tiles(fires, z):
+    zoom_layers = {"fires": vector_tiles.prepare_zoom_layer(fires, z)}
+    vector_tiles._ZOOM_LAYERS.update(zoom_layers)
+    try:
+        bbox_tiles = vector_tiles.tiles_for_bounds(fires.total_bounds, z)
+        non_empty = {t for t in bbox_tiles if vector_tiles.encode_tile(t)[1] is not None}
+        occupied = vector_tiles.occupied_tiles(zoom_layers, z)
+    finally:
+        vector_tiles._ZOOM_LAYERS.clear()
+
+    assert set(occupied) == non_empty
+    assert set(occupied) <= set(bbox_tiles)
+
+
+def test_pyramid_counts(fires, tmp_path):
+    counts = vector_tiles.build_tile_pyramid({"fires": fires}, tmp_path / "fires.mbtiles", 3, 9, workers=1)
+
+    assert counts[3] == 1
+    assert all(counts[z] <= counts[z + 1] for z in range(3, 9))
+
+
+@pytest.mark.filterwarnings("ignore:The 'shapely.ops.transform:DeprecationWarning")
+def test_quantize_matches_library_quantize_bounds(fires):
+    z = 8
+    layer = vector_tiles.prepare_zoom_layer(fires, z)
+    vector_tiles._ZOOM_LAYERS.update({"fires": layer})
+    try:
+        tile = vector_tiles.occupied_tiles({"fires": layer}, z)[0]
+        data = gzip.decompress(vector_tiles.encode_tile(tile)[1])
+    finally:
+        vector_tiles._ZOOM_LAYERS.clear()
+
+    minx, miny, maxx, maxy = bounds = vector_tiles.tile_bounds(*tile)
+    pad = (maxx - minx) * vector_tiles.TILE_BUFFER / vector_tiles.TILE_EXTENT
+    clipped = shapely.clip_by_rect(layer["geoms"], minx - pad, miny - pad, maxx + pad, maxy + pad)
+    features = [{"geometry": g, "properties": p} for g, p in zip(clipped, layer["props"]) if not g.is_empty]
+    expected = mapbox_vector_tile.encode(
+        [{"name": "fires", "features": features}],
+        default_options={"quantize_bounds": bounds, "extents": vector_tiles.TILE_EXTENT},
+    )
+    assert data == expected